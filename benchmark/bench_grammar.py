@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+##
+## Copyright (c) 2019 Thomas Benz.
+##
+## This file is part of librecell-layout
+## (see https://codeberg.org/thommythomaso/spectre2spice/master/)
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the CERN Open Hardware License (CERN OHL-S) as it will be published
+## by the CERN, either version 2.0 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## CERN Open Hardware License for more details.
+##
+## You should have received a copy of the CERN Open Hardware License
+## along with this program. If not, see <http://ohwr.org/licenses/>.
+##
+##
+##
+
+# coding=utf8
+#-------------------------------------------------------------------------------
+#-- Title      : Grammar Benchmark
+#-- Project    : Spectre2Spice
+#-------------------------------------------------------------------------------
+#-- File       : bench_grammar.py
+#-------------------------------------------------------------------------------
+#-- Description: Compares the default and the optimized grammar on expression
+#                heavy parameters cards
+#-------------------------------------------------------------------------------
+
+# usage: python benchmark/bench_grammar.py [--cards N] [--depth D]
+#
+# The default grammar is measured first, as the packrat cache of pyparsing is a
+# global switch: as soon as the optimized grammar is built, it is on for every grammar.
+#
+# parse_main hands the parameters cards to the hand written parser first (see
+# parameter_parser.py), the grammar would only see the few cards it declines. The
+# equations are therefore scanned with the equation rule of the grammar directly.
+
+import argparse
+import os
+import random
+import sys
+import time
+
+# the repository, the package does not need to be installed
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from spectre2spice.preprocessor        import preprocessor
+from spectre2spice.spectre_bnf         import get_grammar
+from spectre2spice.translation_context import TranslationContext
+
+
+# creates a nested parameter expression, like the ones found in the PDK parameter files
+def random_expression(depth):
+    if(depth == 0):
+        return random.choice(['dvth', 'w', 'l', 'toxe', '0.5u', '1e-3', '2', 'nf'])
+
+    choice = random.random()
+    if(choice < 0.4):
+        return '(1+' + random_expression(depth-1) + '*' + random_expression(depth-1) + ')'
+    if(choice < 0.7):
+        return 'sqrt(' + random_expression(depth-1) + ')'
+    if(choice < 0.85):
+        return '(' + random_expression(depth-1) + '>0 ? ' + random_expression(depth-1) + ' : 0)'
+    return random_expression(depth-1) + '/' + random_expression(depth-1)
+
+
+def parameter_cards(num_cards, depth):
+    cards = []
+    for card in range(num_cards):
+        equations = ['p' + str(card) + '_' + str(eq) + '=' + random_expression(depth) for eq in range(4)]
+        cards.append('parameters ' + ' '.join(equations))
+    return preprocessor('\n'.join(cards)).split('\n')
+
+
+# parses the equations of all cards with the grammar and returns the time needed and
+# the translated equations
+def run(cards, grammar):
+    context = TranslationContext(memo_cards=False)
+    start   = time.perf_counter()
+    printed = []
+    with context.activate():
+        for card in cards:
+            for result, begin, end in grammar.equation.scanString(card):
+                printed.append(result[0].spice_print())
+    return [time.perf_counter() - start, printed]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Benchmark of the default and the optimized grammar')
+    arg_parser.add_argument('--cards', type=int, default=20, help='Number of parameters cards')
+    arg_parser.add_argument('--depth', type=int, default=2, help='Nesting depth of the expressions')
+    arg_parser.add_argument('--seed',  type=int, default=1, help='Seed of the card generator')
+    args = arg_parser.parse_args()
+
+    random.seed(args.seed)
+    cards = parameter_cards(args.cards, args.depth)
+
+    [default_time, default_cards]     = run(cards, get_grammar(optimized=False))
+    [optimized_time, optimized_cards] = run(cards, get_grammar(optimized=True))
+
+    if(default_cards != optimized_cards):
+        raise SystemExit('The grammars produced different cards')
+
+    print('cards:     ' + str(args.cards) + ' parameters cards, expression depth ' + str(args.depth))
+    print('default:   ' + '%.3f s' % default_time)
+    print('optimized: ' + '%.3f s' % optimized_time)
+    print('speedup:   ' + '%.1fx' % (default_time / optimized_time))
+
+
+if __name__ == '__main__':
+    main()
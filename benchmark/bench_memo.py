@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+##
+## Copyright (c) 2019 Thomas Benz.
+##
+## This file is part of librecell-layout
+## (see https://codeberg.org/thommythomaso/spectre2spice/master/)
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the CERN Open Hardware License (CERN OHL-S) as it will be published
+## by the CERN, either version 2.0 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## CERN Open Hardware License for more details.
+##
+## You should have received a copy of the CERN Open Hardware License
+## along with this program. If not, see <http://ohwr.org/licenses/>.
+##
+##
+##
+
+# coding=utf8
+#-------------------------------------------------------------------------------
+#-- Title      : Card Memo Benchmark
+#-- Project    : Spectre2Spice
+#-------------------------------------------------------------------------------
+#-- File       : bench_memo.py
+#-------------------------------------------------------------------------------
+#-- Description: Measures the translation of a corner library, whose corners
+#                repeat the same cards, with and without the card memo
+#-------------------------------------------------------------------------------
+
+# usage: python benchmark/bench_memo.py [--corners N] [--scale S] [--fast_grammar]
+#
+# The parameters and the models of netlist_generator.py are written once for every
+# corner, like the sections tt, ff, ss, ... of a corner library, that include the same
+# cards. The cards are parsed and printed (parse_main and spice_print) once with the card
+# memo of the context and once without (see card_memo.py). The time, the statistics of
+# the memo and a digest of the printed cards are shown, the digest is the same for both.
+
+import argparse
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# the repository and this folder, the package does not need to be installed
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from netlist_generator                 import generate
+from spectre2spice.preprocessor        import preprocess_lines
+from spectre2spice.parser_core         import parse_main
+from spectre2spice.spectre_bnf         import get_grammar
+from spectre2spice.chunk_parser        import render_cards
+from spectre2spice.translation_context import TranslationContext
+from spectre2spice.card_memo           import format_stats
+
+
+# the preprocessed cards of the corner library
+def corner_cards(folder, corners):
+    cards = []
+    for name in ['params.scs', 'models.scs']:
+        netlist = open(os.path.join(folder, name))
+        cards  += list(preprocess_lines(netlist))
+        netlist.close()
+    return cards * corners
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Translation of a corner library with and without the card memo')
+    arg_parser.add_argument('--corners',      type=int, default=5, help='Number of corners')
+    arg_parser.add_argument('--scale',        type=float, default=0.1, help='Scale of the generated netlists')
+    arg_parser.add_argument('--fast_grammar', action='store_true', help='Use the optimized grammar')
+    args = arg_parser.parse_args()
+
+    folder = tempfile.mkdtemp(prefix='s2s_bench_')
+    try:
+        generate(folder, args.scale)
+        cards   = corner_cards(folder, args.corners)
+        grammar = get_grammar(args.fast_grammar, False)
+        print(str(len(cards)) + ' cards in ' + str(args.corners) + ' corners')
+
+        for memo_cards in [False, True]:
+            context = TranslationContext(tech_path=os.path.join(folder, 'tech') + '/', thr=999,
+                                         memo_cards=memo_cards)
+            start    = time.perf_counter()
+            printed  = [card for rendered in render_cards(parse_main(cards, grammar, context), context)
+                        for card in rendered]
+            duration = time.perf_counter() - start
+
+            digest = hashlib.sha256('\n'.join(printed).encode()).hexdigest()[:12]
+            print('%-8s %8.3f s, %8.1f us per card, output %s' % ('memo' if memo_cards else 'no memo',
+                  duration, duration / len(cards) * 1e6, digest))
+            if(memo_cards):
+                print(format_stats(context.memo.stats()))
+    finally:
+        shutil.rmtree(folder)
+
+
+if __name__ == '__main__':
+    main()
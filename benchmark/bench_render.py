@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+##
+## Copyright (c) 2019 Thomas Benz.
+##
+## This file is part of librecell-layout
+## (see https://codeberg.org/thommythomaso/spectre2spice/master/)
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the CERN Open Hardware License (CERN OHL-S) as it will be published
+## by the CERN, either version 2.0 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## CERN Open Hardware License for more details.
+##
+## You should have received a copy of the CERN Open Hardware License
+## along with this program. If not, see <http://ohwr.org/licenses/>.
+##
+##
+##
+
+# coding=utf8
+#-------------------------------------------------------------------------------
+#-- Title      : Render Benchmark
+#-- Project    : Spectre2Spice
+#-------------------------------------------------------------------------------
+#-- File       : bench_render.py
+#-------------------------------------------------------------------------------
+#-- Description: Measures spice_print on deeply nested expressions
+#-------------------------------------------------------------------------------
+
+# usage: python benchmark/bench_render.py [--cards N] [--depths D ...] [--repeat N]
+#
+# Every parameters card holds one equation, whose right side is nested depth times:
+# each level wraps the level below in a sub expression and adds a function call and
+# an operator, e.g. (sqrt(x)+(sqrt(x)+(...)*2)*2). The cards are parsed once by the
+# hand written parameters parser, only the rendering is timed (best of five runs).
+#
+# The printed digest of the rendered cards stays the same as long as the output does,
+# it can be compared between two commits.
+
+import argparse
+import hashlib
+import os
+import sys
+import time
+
+# the repository, the package does not need to be installed
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from spectre2spice.parameter_parser import parse_parameters
+
+
+# a parameters card with an expression nested depth times
+def nested_card(index, depth):
+    expression = 'x' + str(index)
+    for level in range(depth):
+        expression = '(sqrt(w' + str(level) + ')+' + expression + '*2)'
+    return 'parameters p' + str(index) + '=' + expression
+
+
+# renders all parsed cards repeat times, returns the best time of five runs and the cards
+def run(parsed_cards, repeat):
+    best = None
+    for attempt in range(5):
+        start = time.perf_counter()
+        for run in range(repeat):
+            printed = [equation.spice_print() for equations in parsed_cards for equation in equations]
+        duration = time.perf_counter() - start
+        if(best is None or duration < best):
+            best = duration
+    return [best, printed]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Benchmark of spice_print on deep expressions')
+    arg_parser.add_argument('--cards',  type=int, default=200, help='Number of parameters cards per depth')
+    arg_parser.add_argument('--depths', type=int, nargs='+', default=[5, 20, 80], help='Nesting depths of the expressions')
+    arg_parser.add_argument('--repeat', type=int, default=5, help='Number of times the cards are rendered')
+    args = arg_parser.parse_args()
+
+    for depth in args.depths:
+        parsed_cards = [parse_parameters(nested_card(index, depth)) for index in range(args.cards)]
+        [duration, printed] = run(parsed_cards, args.repeat)
+
+        chars  = sum(len(card) for card in printed)
+        digest = hashlib.sha256('\n'.join(printed).encode()).hexdigest()[:12]
+        print('depth %4d: %8.3f s, %8.1f us per card, %6.1f MB/s, output %s' % (depth, duration,
+              duration / (args.cards * args.repeat) * 1e6, chars * args.repeat / duration / 1e6, digest))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+##
+## Copyright (c) 2019 Thomas Benz.
+##
+## This file is part of librecell-layout
+## (see https://codeberg.org/thommythomaso/spectre2spice/master/)
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the CERN Open Hardware License (CERN OHL-S) as it will be published
+## by the CERN, either version 2.0 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## CERN Open Hardware License for more details.
+##
+## You should have received a copy of the CERN Open Hardware License
+## along with this program. If not, see <http://ohwr.org/licenses/>.
+##
+##
+##
+
+# coding=utf8
+#-------------------------------------------------------------------------------
+#-- Title      : Sharing Benchmark
+#-- Project    : Spectre2Spice
+#-------------------------------------------------------------------------------
+#-- File       : bench_sharing.py
+#-------------------------------------------------------------------------------
+#-- Description: Measures the memory and the time saved by the node table on
+#                parameters with repeated sub expressions
+#-------------------------------------------------------------------------------
+
+# usage: python benchmark/bench_sharing.py [--bins N] [--corners N] [--repeat N]
+#
+# The parameters look like the binned parameters of a foundry: every bin and corner has
+# its own name, but the right sides repeat the same mismatch and corner terms, e.g.
+# vth0_3_tt=(0.42+dvth0_tt)*(1+sqrt(1/(w*l*mult))*mis_vth0). The cards are parsed by the
+# hand written parameters parser, once with the node table of the context and once
+# without (see node_table.py). For both runs the memory held by the parsed cards (without
+# the table), the memory of the table, the parse time, the render time and their total are
+# printed, together with the statistics of the table. The times are the best of five runs,
+# the parse time is measured without tracemalloc.
+
+import argparse
+import gc
+import hashlib
+import os
+import sys
+import time
+import tracemalloc
+
+# the repository, the package does not need to be installed
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from spectre2spice.parameter_parser    import parse_parameters
+from spectre2spice.translation_context import TranslationContext
+from spectre2spice.node_table          import format_stats
+
+
+# the terms, that every parameter is made of
+terms = ['(1+sqrt(1/(w*l*mult))*mis_{name})',
+         '(dvth0_{corner}+dlvth0_{corner}/l)',
+         '(1+(temper-25)*tc1_{name}+pow(temper-25,2)*tc2_{name})',
+         '(w>1e-6?1:w/1e-6)']
+
+names = ['vth0', 'u0', 'k1', 'rdsw', 'voff', 'eta0']
+
+
+# the parameters cards of every bin and corner
+def binned_cards(bins, corners):
+    cards = []
+    for corner in range(corners):
+        for index in range(bins):
+            for name in names:
+                right = '*'.join(term.format(name=name, corner='c' + str(corner)) for term in terms)
+                cards.append('parameters ' + name + '_' + str(index) + '_c' + str(corner) + '='
+                             + str(index) + '.' + str(corner) + '*' + right)
+    return cards
+
+
+# parses the cards with a new context, returns the best time of five runs
+def parse_time(cards, share_nodes):
+    best = None
+    for attempt in range(5):
+        gc.collect()
+        context = TranslationContext(share_nodes=share_nodes)
+        start   = time.perf_counter()
+        with context.activate():
+            parsed = [parse_parameters(card) for card in cards]
+        duration = time.perf_counter() - start
+        if(best is None or duration < best):
+            best = duration
+    return best
+
+
+# parses the cards, returns the parsed cards and the memory of the cards and of the table
+# in MB
+def parse_all(cards, context):
+    gc.collect()
+    tracemalloc.start()
+    with context.activate():
+        parsed = [parse_parameters(card) for card in cards]
+    gc.collect()
+    total = tracemalloc.get_traced_memory()[0]
+    if(context.nodes is not None):
+        context.nodes.clear()
+    gc.collect()
+    ast = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return [parsed, ast / 1e6, max(total - ast, 0) / 1e6]
+
+
+# renders all parsed cards repeat times, returns the best time of five runs and the cards
+def render_all(parsed, context, repeat):
+    best = None
+    with context.activate():
+        for attempt in range(5):
+            start = time.perf_counter()
+            for run in range(repeat):
+                printed = [equation.spice_print() for equations in parsed for equation in equations]
+            duration = time.perf_counter() - start
+            if(best is None or duration < best):
+                best = duration
+    return [best, printed]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Memory and time saved by sharing the expressions')
+    arg_parser.add_argument('--bins',    type=int, default=50, help='Number of bins')
+    arg_parser.add_argument('--corners', type=int, default=5, help='Number of corners')
+    arg_parser.add_argument('--repeat',  type=int, default=3, help='Number of times the cards are rendered')
+    args = arg_parser.parse_args()
+
+    cards = binned_cards(args.bins, args.corners)
+    print(str(len(cards)) + ' cards, ' + str(sum(len(card) for card in cards)) + ' characters')
+
+    for share_nodes in [False, True]:
+        context = TranslationContext(share_nodes=share_nodes)
+        [parsed, ast_mb, table_mb] = parse_all(cards, context)
+        [render_time, printed] = render_all(parsed, context, args.repeat)
+        parse_seconds = parse_time(cards, share_nodes)
+
+        digest = hashlib.sha256('\n'.join(printed).encode()).hexdigest()[:12]
+        print('%-10s parse %7.3f s, render %7.3f s, total %7.3f s, cards %7.2f MB, table %7.2f MB, output %s' % (
+              'shared' if share_nodes else 'not shared', parse_seconds, render_time, parse_seconds + render_time,
+              ast_mb, table_mb, digest))
+        if(share_nodes):
+            print(format_stats(context.nodes.stats()))
+
+
+if __name__ == '__main__':
+    main()
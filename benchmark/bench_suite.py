@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+##
+## Copyright (c) 2019 Thomas Benz.
+##
+## This file is part of librecell-layout
+## (see https://codeberg.org/thommythomaso/spectre2spice/master/)
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the CERN Open Hardware License (CERN OHL-S) as it will be published
+## by the CERN, either version 2.0 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## CERN Open Hardware License for more details.
+##
+## You should have received a copy of the CERN Open Hardware License
+## along with this program. If not, see <http://ohwr.org/licenses/>.
+##
+##
+##
+
+# coding=utf8
+#-------------------------------------------------------------------------------
+#-- Title      : Benchmark Suite
+#-- Project    : Spectre2Spice
+#-------------------------------------------------------------------------------
+#-- File       : bench_suite.py
+#-------------------------------------------------------------------------------
+#-- Description: Measures the throughput and the peak memory of every stage of the
+#                translation on the synthetic netlists of netlist_generator.py
+#-------------------------------------------------------------------------------
+
+# usage: python benchmark/bench_suite.py [--scale S] [--seed N] [--netlists DIR]
+#                                        [--fast_grammar] [--no_memory]
+#                                        [--output FILE] [--compare FILE]
+#
+# The netlists are written by netlist_generator.py to a temporary folder, or taken from
+# a folder it wrote before (--netlists). Every kind of netlist (parameters, models,
+# cells and layout) is run through the stages one after another:
+#
+#   preprocessor    preprocess_lines of the file
+#   parse_main      parse_main of the preprocessed cards
+#   spice_print     spice_print of the parsed cards
+#
+# Finally the whole include tree is translated by the netlist manager, like the command
+# line tool does with --silent. The throughput is given in cards/s and MB/s of the input
+# netlist, the times are wall times. The peak memory of a stage is measured with
+# tracemalloc in a second run, as tracemalloc slows everything down (--no_memory skips it).
+#
+# The results are written as json (--output), together with the versions and the git
+# commit, so two runs can be compared (--compare prints the speed up of every stage).
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# the repository and this folder, the package does not need to be installed
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from netlist_generator                 import generate
+from spectre2spice.preprocessor        import preprocess_lines
+from spectre2spice.parser_core         import parse_main
+from spectre2spice.spectre_bnf         import get_grammar
+from spectre2spice.chunk_parser        import render_cards
+from spectre2spice.translation_context import TranslationContext
+from spectre2spice.netlist_manager     import netlist_manager
+
+
+# the netlists measured stage by stage
+netlist_kinds = ['params', 'models', 'cells', 'layout']
+
+
+# the stages of a single netlist, every stage gets the result of the previous one
+def preprocess_stage(path, data, context, grammar):
+    netlist = open(path)
+    cards   = list(preprocess_lines(netlist))
+    netlist.close()
+    return cards
+
+def parse_stage(path, cards, context, grammar):
+    return list(parse_main(cards, grammar, context))
+
+def print_stage(path, parsed, context, grammar):
+    return list(render_cards(parsed, context))
+
+stages = [['preprocessor', preprocess_stage],
+          ['parse_main',   parse_stage],
+          ['spice_print',  print_stage]]
+
+
+# runs the function and returns [result, seconds, peak memory in MB or None]
+def measure(function, args, memory):
+    if(memory):
+        tracemalloc.start()
+        tracemalloc.reset_peak()
+        result = function(*args)
+        peak   = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return [result, None, peak / 1e6]
+
+    start  = time.perf_counter()
+    result = function(*args)
+    return [result, time.perf_counter() - start, None]
+
+
+# all .scs files below the folder
+def netlist_files(folder):
+    paths = []
+    for [root, dirs, files] in os.walk(folder):
+        paths += [os.path.join(root, name) for name in files if name.endswith('.scs')]
+    return sorted(paths)
+
+
+# the number of cards and the size in bytes of the files
+def count_cards(paths):
+    cards = 0
+    size  = 0
+    for path in paths:
+        netlist = open(path)
+        cards  += sum(1 for card in preprocess_lines(netlist))
+        netlist.close()
+        size   += os.path.getsize(path)
+    return [cards, size]
+
+
+# a result entry, the throughput is computed from the time
+def result_entry(stage, netlist, cards, size, seconds, peak):
+    return {'stage'       : stage,
+            'netlist'     : netlist,
+            'cards'       : cards,
+            'bytes'       : size,
+            'seconds'     : seconds,
+            'cards_per_s' : cards / seconds if seconds else None,
+            'mb_per_s'    : size / 1e6 / seconds if seconds else None,
+            'peak_mb'     : peak}
+
+
+# measures the stages of a single netlist, every pass gets a context of its own with the
+# tables of base and without the card memo, a card is never taken from an earlier pass
+def run_netlist(folder, kind, base, grammar, memory):
+    path    = os.path.join(folder, kind + '.scs')
+    size    = os.path.getsize(path)
+    results = []
+    timings = []
+
+    for measure_memory in ([False, True] if memory else [False]):
+        context = TranslationContext(tech_path=base.tech_path, thr=base.thr, tables=base.tables, memo_cards=False)
+        data    = None
+        for [index, [stage, function]] in enumerate(stages):
+            [data, seconds, peak] = measure(function, [path, data, context, grammar], measure_memory)
+            if(index == 0):
+                cards = len(data)
+            if(measure_memory):
+                timings[index][1] = peak
+            else:
+                timings.append([seconds, None])
+
+    for [[stage, function], [seconds, peak]] in zip(stages, timings):
+        results.append(result_entry(stage, kind, cards, size, seconds, peak))
+    return results
+
+
+# translates the whole include tree with the netlist manager
+def run_manager(folder, optimized, memory):
+    output = tempfile.mkdtemp(prefix='s2s_bench_out_')
+    args   = {'parent_path'  : [folder + '/'],
+              'top_file'     : ['top.scs'],
+              'output_path'  : [output + '/'],
+              'tech_path'    : [os.path.join(folder, 'tech') + '/'],
+              'log_path'     : None,
+              'debug'        : None,
+              'silent'       : 1,
+              'fast_grammar' : 1 if optimized else None}
+
+    [cards, size] = count_cards(netlist_files(folder))
+    try:
+        [result, seconds, peak] = measure(netlist_manager, [args], False)
+        if(memory):
+            peak = measure(netlist_manager, [args], True)[2]
+    finally:
+        shutil.rmtree(output)
+    return result_entry('netlist_manager', 'top', cards, size, seconds, peak)
+
+
+# the versions and the settings of the run
+def metadata(args, sizes):
+    import pyparsing
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ''
+
+    return {'date'         : datetime.datetime.now().isoformat(timespec='seconds'),
+            'commit'       : commit,
+            'python'       : platform.python_version(),
+            'pyparsing'    : pyparsing.__version__,
+            'machine'      : platform.machine(),
+            'scale'        : args.scale,
+            'seed'         : args.seed,
+            'netlists'     : args.netlists or '',
+            'fast_grammar' : bool(args.fast_grammar),
+            'sizes'        : vars(sizes) if sizes is not None else {}}
+
+
+def format_result(result):
+    text = '%-16s %-7s %8d cards %10.3f s' % (result['stage'], result['netlist'], result['cards'], result['seconds'])
+    text += '%12.0f cards/s %8.2f MB/s' % (result['cards_per_s'] or 0, result['mb_per_s'] or 0)
+    if(result['peak_mb'] is not None):
+        text += '%10.1f MB peak' % result['peak_mb']
+    return text
+
+
+# prints the speed up of every stage against an older run
+def compare(results, old_path):
+    old_file = open(old_path)
+    old      = json.load(old_file)
+    old_file.close()
+
+    old_results = {(result['stage'], result['netlist']) : result for result in old['results']}
+    print('\ncompared to ' + old_path + ' (commit ' + old['meta'].get('commit', '')[:10] + ')')
+    for result in results:
+        before = old_results.get((result['stage'], result['netlist']))
+        if(before is None or not result['seconds']):
+            continue
+        text = '%-16s %-7s speed up %6.2fx' % (result['stage'], result['netlist'], before['seconds'] / result['seconds'])
+        if(result['peak_mb'] is not None and before.get('peak_mb')):
+            text += ', memory %6.2fx' % (result['peak_mb'] / before['peak_mb'])
+        print(text)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Throughput and memory of the translation stages')
+    arg_parser.add_argument('--scale',        type=float, default=0.1, help='Scale of the generated netlists')
+    arg_parser.add_argument('--seed',         type=int, default=1, help='Seed of the generator')
+    arg_parser.add_argument('--netlists',     type=str, default=None, help='Folder written by netlist_generator.py, instead of a new one')
+    arg_parser.add_argument('--fast_grammar', action='store_true', help='Use the optimized grammar')
+    arg_parser.add_argument('--no_memory',    action='store_true', help='Do not measure the peak memory')
+    arg_parser.add_argument('--output',       type=str, default=None, help='Write the results to this json file')
+    arg_parser.add_argument('--compare',      type=str, default=None, help='Compare with the results of an older run')
+    args = arg_parser.parse_args()
+
+    folder = args.netlists
+    sizes  = None
+    if(folder is None):
+        folder = tempfile.mkdtemp(prefix='s2s_bench_')
+        sizes  = generate(folder, args.scale, args.seed)
+
+    try:
+        # the console output of the translation is suppressed like with --silent, the
+        # tables are read once and not measured
+        context = TranslationContext(tech_path=os.path.join(folder, 'tech') + '/', thr=999)
+        context.component_table()
+        context.model_table()
+        grammar = get_grammar(args.fast_grammar, False)
+        memory  = not args.no_memory
+
+        results = []
+        for kind in netlist_kinds:
+            for result in run_netlist(folder, kind, context, grammar, memory):
+                print(format_result(result))
+                results.append(result)
+
+        result = run_manager(folder, args.fast_grammar, memory)
+        print(format_result(result))
+        results.append(result)
+    finally:
+        if(args.netlists is None):
+            shutil.rmtree(folder)
+
+    if(args.output):
+        output = open(args.output, 'w')
+        json.dump({'meta' : metadata(args, sizes), 'results' : results}, output, indent=2)
+        output.close()
+
+    if(args.compare):
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
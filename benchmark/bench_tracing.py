@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+##
+## Copyright (c) 2019 Thomas Benz.
+##
+## This file is part of librecell-layout
+## (see https://codeberg.org/thommythomaso/spectre2spice/master/)
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the CERN Open Hardware License (CERN OHL-S) as it will be published
+## by the CERN, either version 2.0 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## CERN Open Hardware License for more details.
+##
+## You should have received a copy of the CERN Open Hardware License
+## along with this program. If not, see <http://ohwr.org/licenses/>.
+##
+##
+##
+
+# coding=utf8
+#-------------------------------------------------------------------------------
+#-- Title      : Tracing Benchmark
+#-- Project    : Spectre2Spice
+#-------------------------------------------------------------------------------
+#-- File       : bench_tracing.py
+#-------------------------------------------------------------------------------
+#-- Description: Measures the cost of the debug trace of the parse actions, if
+#                neither --debug nor --log_path is given
+#-------------------------------------------------------------------------------
+
+# usage: python benchmark/bench_tracing.py [--netlists DIR] [--repeat N]
+#
+# A grammar built with tracing, but with the debug output switched off, behaves like
+# every grammar did before the trace was moved out of the wrappers: every parse action
+# formats the trace and throws it away. It is compared to the grammar without tracing.
+# The default grammar is measured first, as the packrat cache of pyparsing is a
+# global switch.
+#
+# The parse times are CPU times, the best of five runs. Additionally the number of parse
+# actions and the cost of a single traced parse action are measured, the saved time
+# per parse is their product.
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+# the repository, the package does not need to be installed
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from spectre2spice.preprocessor   import preprocess_lines
+from spectre2spice.parser_core    import parse_main
+from spectre2spice.spectre_bnf    import get_grammar
+from spectre2spice.parser_classes import var_wrapper
+from spectre2spice.parser_logging import parse_action
+from spectre2spice.translation_context import TranslationContext
+import spectre2spice.parser_logging as parser_logging
+
+
+# all preprocessed cards of the netlists in the folder
+def netlist_cards(folder):
+    cards = []
+    for path in sorted(glob.glob(folder + '/**/*.scs', recursive=True)):
+        netlist = open(path)
+        cards  += list(preprocess_lines(netlist))
+        netlist.close()
+    return cards
+
+
+# A context without debug output, neither to the terminal nor to a log file. The card memo
+# is off, every card is parsed each time (see card_memo.py).
+def bench_context():
+    return TranslationContext(memo_cards=False)
+
+
+# parses the cards repeat times, returns the best of five runs
+def run(cards, grammar, repeat):
+    best = None
+    for attempt in range(5):
+        context = bench_context()
+        start   = time.process_time()
+        for run in range(repeat):
+            for card in parse_main(cards, grammar, context):
+                pass
+        duration = time.process_time() - start
+        if(best is None or duration < best):
+            best = duration
+    return best
+
+
+# counts the parse actions, that write a trace, while the cards are parsed once
+def count_actions(cards, grammar):
+    count          = [0]
+    debug_find_ele = parser_logging.debug_find_ele
+
+    def counting_find_ele(string, start, tocs, ele_type):
+        count[0] += 1
+    parser_logging.debug_find_ele = counting_find_ele
+    try:
+        for card in parse_main(cards, grammar, bench_context()):
+            pass
+    finally:
+        parser_logging.debug_find_ele = debug_find_ele
+    return count[0]
+
+
+# the time of a single parse action (a variable) with and without trace
+def action_cost(calls):
+    string = 'nch_mac d g s b nch_mac l=0.35u w=0.51u'
+    costs  = []
+    for tracing in [True, False]:
+        action = parse_action(var_wrapper, tracing)
+        start  = time.process_time()
+        for call in range(calls):
+            action(string, 8, ['d'])
+        costs.append((time.process_time() - start) / calls)
+    return costs
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Benchmark of the parse actions with and without tracing')
+    arg_parser.add_argument('--netlists', type=str, default='example', help='Folder with the netlists to parse')
+    arg_parser.add_argument('--repeat',   type=int, default=20, help='Number of times the netlists are parsed')
+    args = arg_parser.parse_args()
+
+
+    cards = netlist_cards(args.netlists)
+    print('cards:     ' + str(len(cards)) + ' cards, parsed ' + str(args.repeat) + ' times')
+
+    [traced_cost, plain_cost] = action_cost(100000)
+    print('action:    with trace ' + '%.2f us' % (traced_cost * 1e6) + ', without trace '
+          + '%.2f us' % (plain_cost * 1e6))
+
+    for optimized in [False, True]:
+        traced  = run(cards, get_grammar(optimized=optimized, tracing=True), args.repeat)
+        plain   = run(cards, get_grammar(optimized=optimized, tracing=False), args.repeat)
+        actions = count_actions(cards, get_grammar(optimized=optimized, tracing=True))
+        saved   = actions * args.repeat * (traced_cost - plain_cost)
+
+        name = 'optimized' if optimized else 'default  '
+        print(name + ':   with trace ' + '%.3f s' % traced + ', without trace ' + '%.3f s' % plain
+              + ', ' + str(actions) + ' parse actions per parse, ' + '%.3f s' % saved + ' saved')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+##
+## Copyright (c) 2019 Thomas Benz.
+##
+## This file is part of librecell-layout
+## (see https://codeberg.org/thommythomaso/spectre2spice/master/)
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the CERN Open Hardware License (CERN OHL-S) as it will be published
+## by the CERN, either version 2.0 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## CERN Open Hardware License for more details.
+##
+## You should have received a copy of the CERN Open Hardware License
+## along with this program. If not, see <http://ohwr.org/licenses/>.
+##
+##
+##
+
+# coding=utf8
+#-------------------------------------------------------------------------------
+#-- Title      : Startup Check
+#-- Project    : Spectre2Spice
+#-------------------------------------------------------------------------------
+#-- File       : check_startup.py
+#-------------------------------------------------------------------------------
+#-- Description: Measures the start up time of spectre2spice and fails, if it is
+#                over budget
+#-------------------------------------------------------------------------------
+
+# usage: python benchmark/check_startup.py [--import_budget MS] [--help_budget MS]
+#
+# The heavy modules (pyparsing, toml, multiprocessing) are only imported, when they are
+# needed. This script checks that importing the netlist manager does not pull them in,
+# measures the import time with python -X importtime and the time of spectre2spice -h,
+# and exits with 1 if a check fails, so it can run in CI (make startup_check).
+#
+# Every measurement runs in a fresh interpreter, the best of a few runs is taken.
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+
+# the modules, that must not be imported by the netlist manager itself
+lazy_modules = ['pyparsing', 'toml', 'multiprocessing', 'concurrent.futures']
+
+package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# the environment of the measured interpreter, the package is taken from this folder
+def environment():
+    env = dict(os.environ)
+    env['PYTHONPATH'] = package_dir + os.pathsep + env.get('PYTHONPATH', '')
+    return env
+
+
+# imports the module with -X importtime, returns the total time in ms and the
+# cumulative time of every imported module
+def import_times(module):
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import ' + module],
+                            env=environment(), stderr=subprocess.PIPE, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if(not line.startswith('import time:') or 'cumulative' in line):
+            continue
+        [self_time, cumulative, name] = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative) / 1000
+    return [times[module], times]
+
+
+# the best wall time of the command in ms
+def wall_time(command, runs):
+    best = None
+    for run in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, env=environment(), stdout=subprocess.DEVNULL, check=True)
+        duration = (time.perf_counter() - start) * 1000
+        if(best is None or duration < best):
+            best = duration
+    return best
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Start up time check of spectre2spice')
+    arg_parser.add_argument('--import_budget', type=float, default=100, help='Budget for importing the netlist manager in ms')
+    arg_parser.add_argument('--help_budget',   type=float, default=300, help='Budget for spectre2spice -h in ms')
+    arg_parser.add_argument('--runs',          type=int, default=5, help='Number of runs, the best one counts')
+    args = arg_parser.parse_args()
+
+    failed = []
+
+    # the slowest of the imports
+    best = None
+    for run in range(args.runs):
+        [total, times] = import_times('spectre2spice.netlist_manager')
+        if(best is None or total < best[0]):
+            best = [total, times]
+    [total, times] = best
+
+    print('import:    spectre2spice.netlist_manager ' + '%.1f ms' % total)
+    slowest = sorted(times.items(), key=lambda item: item[1], reverse=True)
+    for [name, cumulative] in slowest[1:9]:
+        print('           ' + '%7.1f ms ' % cumulative + name)
+    if(total > args.import_budget):
+        failed.append('import takes ' + '%.1f ms' % total + ', the budget is ' + '%.1f ms' % args.import_budget)
+
+    for module in lazy_modules:
+        if(module in times):
+            failed.append(module + ' is imported by the netlist manager')
+
+    # the whole command line tool
+    help_time = wall_time([sys.executable, os.path.join(package_dir, 'bin', 'spectre2spice'), '-h'], args.runs)
+    print('help:      spectre2spice -h ' + '%.1f ms' % help_time)
+    if(help_time > args.help_budget):
+        failed.append('spectre2spice -h takes ' + '%.1f ms' % help_time + ', the budget is ' + '%.1f ms' % args.help_budget)
+
+    for failure in failed:
+        print('failed:    ' + failure)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
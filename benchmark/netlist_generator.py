@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+##
+## Copyright (c) 2019 Thomas Benz.
+##
+## This file is part of librecell-layout
+## (see https://codeberg.org/thommythomaso/spectre2spice/master/)
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the CERN Open Hardware License (CERN OHL-S) as it will be published
+## by the CERN, either version 2.0 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## CERN Open Hardware License for more details.
+##
+## You should have received a copy of the CERN Open Hardware License
+## along with this program. If not, see <http://ohwr.org/licenses/>.
+##
+##
+##
+
+# coding=utf8
+#-------------------------------------------------------------------------------
+#-- Title      : Netlist Generator
+#-- Project    : Spectre2Spice
+#-------------------------------------------------------------------------------
+#-- File       : netlist_generator.py
+#-------------------------------------------------------------------------------
+#-- Description: Writes synthetic Spectre netlists of any size, together with the
+#                tech tables to translate them
+#-------------------------------------------------------------------------------
+
+# usage: python benchmark/netlist_generator.py output_folder [--scale S] [--seed N]
+#
+# The generated folder looks like a small PDK with a testbench on top:
+#
+#   top.scs          testbench, includes everything below
+#   params.scs       parameters cards with thousands of nested expressions
+#   models.scs       BSIM like model cards with hundreds of parameters each
+#   cells.scs        nested subcircuits, every level instantiates the one below twice
+#   layout.scs       post layout netlist: a subcircuit with R/C chains
+#   tree/            a deep include tree, every file has a parameters card
+#   tech/            component and model tables, that cover all generated cards
+#
+# The sizes are given by the Sizes below, --scale multiplies all of them (the depths
+# excluded). With the same seed the same netlists are written.
+
+import argparse
+import os
+import random
+
+
+# the base parameters of the models, every one exists with the binning prefixes l, w and p
+bsim_parameters = ['vth0', 'k1', 'k2', 'k3', 'k3b', 'w0', 'dvt0', 'dvt1', 'dvt2', 'dvt0w', 'dvt1w',
+                   'dvt2w', 'u0', 'ua', 'ub', 'uc', 'eu', 'vsat', 'a0', 'ags', 'a1', 'a2', 'b0',
+                   'b1', 'keta', 'rdsw', 'prwg', 'prwb', 'wr', 'nfactor', 'cit', 'cdsc', 'cdscb',
+                   'cdscd', 'eta0', 'etab', 'dsub', 'voff', 'voffl', 'minv', 'pclm', 'pdiblc1',
+                   'pdiblc2', 'pdiblcb', 'drout', 'pscbe1', 'pscbe2', 'pvag', 'delta', 'fprout',
+                   'pdits', 'pditsl', 'pditsd', 'alpha0', 'beta0', 'agidl', 'bgidl', 'cgidl', 'egidl']
+binning_prefixes = ['', 'l', 'w', 'p']
+
+# the variables of the expressions in the parameters cards
+expression_variables = ['dvth_n', 'dvth_p', 'dl', 'dw', 'toxe_n', 'mismatch_flag']
+
+
+class Sizes:
+    def __init__(self, scale=1):
+
+        # params.scs: cards and equations per card
+        self.param_cards     = int(200 * scale)
+        self.param_equations = 10
+        self.param_depth     = 3
+
+        # models.scs: number of models, each with all bsim parameters, at least one
+        # nch and one pch
+        self.models          = max(2, int(10 * scale))
+
+        # cells.scs: depth of the subcircuit hierarchy
+        self.cell_depth      = 6
+
+        # layout.scs: number of resistors and capacitors each
+        self.rc_elements     = int(2000 * scale)
+
+        # tree/: depth and fan out of the include tree
+        self.tree_depth      = 3
+        self.tree_fanout     = 3
+
+
+def write_file(path, lines):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    netlist = open(path, 'w')
+    netlist.write('\n'.join(lines) + '\n')
+    netlist.close()
+
+
+# A random positive number, as written in a PDK. A number with a unit (like 10k) is only used
+# on its own: the BNF would take an operator right after the unit as part of the number.
+def number(unit=False):
+    choice = random.random()
+    if(choice < 0.5):
+        return '%.4g' % random.uniform(0.01, 2)
+    if(choice < 0.8 or not unit):
+        return '%.3ge-%d' % (random.uniform(1, 9), random.randint(3, 12))
+    return str(random.randint(1, 999)) + random.choice(['m', 'u', 'n', 'p', 'f', 'k'])
+
+
+# an operand of an expression: a variable, a number, a function call or a sub expression
+def operand(depth, variables):
+    choice = random.random()
+    if(depth == 0 or choice < 0.5):
+        return random.choice(variables) if random.random() < 0.6 else number()
+    if(choice < 0.75):
+        return random.choice(['sqrt', 'exp', 'abs']) + '(' + expression(depth-1, variables) + ')'
+    return '(' + expression(depth-1, variables) + ')'
+
+
+# a nested expression over the given variables, like the ones in PDK parameter files
+def expression(depth, variables):
+    terms = [operand(depth, variables) for term in range(random.randint(1, 4))]
+    text  = terms[0]
+    for term in terms[1:]:
+        text += random.choice(['+', '-', '*', '/']) + term
+    return text
+
+
+# the right side of an equation, some of them are a case
+def equation_value(depth, variables):
+    if(random.random() < 0.1):
+        return (random.choice(variables) + '>' + number() + ' ? ' + expression(depth-1, variables)
+                + ' : ' + expression(depth-1, variables))
+    return expression(depth, variables)
+
+
+# parameters cards, every card is split over several lines
+def params_netlist(sizes):
+    lines     = ['// global parameters', 'simulator lang=spectre', '']
+    variables = list(expression_variables)
+    lines.append('parameters ' + ' '.join(name + '=0' for name in expression_variables))
+
+    for card in range(sizes.param_cards):
+        equations = []
+        for eq in range(sizes.param_equations):
+            name = 'p' + str(card) + '_' + str(eq)
+            equations.append(name + '=' + equation_value(sizes.param_depth, variables[-20:]))
+            variables.append(name)
+        lines.append('parameters ' + equations[0])
+        lines.extend('+ ' + equation for equation in equations[1:])
+    return lines
+
+
+# the names of all model parameters
+def model_parameters():
+    return [prefix + name for prefix in binning_prefixes for name in bsim_parameters]
+
+
+# model cards, one parameter per continuation line like in a PDK
+def models_netlist(sizes):
+    lines = ['// device models', 'simulator lang=spectre', '']
+    for model in range(sizes.models):
+        channel = 'n' if model % 2 == 0 else 'p'
+        lines.append('model ' + channel + 'ch_' + str(model) + ' bsim4 type=' + channel)
+        for name in model_parameters():
+            if(name == 'vth0'):
+                value = number() + '+dvth_' + channel
+            else:
+                value = number(unit=True)
+            lines.append('+ ' + name + '=' + value)
+        lines.append('')
+    return lines
+
+
+# nested subcircuits, the lowest level contains the devices
+def cells_netlist(sizes):
+    lines = ['// standard cells', 'simulator lang=spectre', '']
+
+    lines.append('subckt cell_0 (a b vdd vss)')
+    lines.append('parameters wn=1u wp=2u')
+    lines.append('M0 b a vss vss nch_0 l=0.1u w=wn')
+    lines.append('M1 b a vdd vdd pch_1 l=0.1u w=wp')
+    lines.append('R0 a b resistor r=1k')
+    lines.append('C0 b vss capacitor c=1f')
+    lines.append('ends cell_0')
+    lines.append('')
+
+    # the instances of subcircuits get a multiplier, an instance card needs at least
+    # one parameter
+    for level in range(1, sizes.cell_depth + 1):
+        lines.append('subckt cell_' + str(level) + ' (a b vdd vss)')
+        lines.append('X0 a mid vdd vss cell_' + str(level - 1) + ' m=1')
+        lines.append('X1 mid b vdd vss cell_' + str(level - 1) + ' m=1')
+        lines.append('C0 mid vss capacitor c=' + number(unit=True))
+        lines.append('ends cell_' + str(level))
+        lines.append('')
+    return lines
+
+
+# an extracted netlist: a chain of resistors with a capacitor at every node
+def layout_netlist(sizes):
+    lines = ['// extracted parasitics', 'simulator lang=spectre', '', 'subckt layout (in out vss)']
+    for element in range(sizes.rc_elements):
+        start = 'in' if element == 0 else 'n' + str(element)
+        end   = 'out' if element == sizes.rc_elements - 1 else 'n' + str(element + 1)
+        lines.append('R' + str(element) + ' ' + start + ' ' + end + ' resistor r=' + '%.4g' % random.uniform(0.1, 100))
+        lines.append('C' + str(element) + ' ' + end + ' vss capacitor c=' + '%.3gf' % random.uniform(0.01, 5))
+    lines.append('ends layout')
+    return lines
+
+
+# writes the include tree below folder, returns the path of the root file
+def write_tree(folder, name, depth, sizes):
+    lines = ['// include tree ' + name]
+    if(depth < sizes.tree_depth):
+        for child in range(sizes.tree_fanout):
+            child_name = name + '_' + str(child)
+            write_tree(folder, child_name, depth + 1, sizes)
+            lines.append('include "' + child_name + '.scs"')
+    lines.append('parameters ' + name + '_corner=' + expression(2, expression_variables))
+    write_file(os.path.join(folder, name + '.scs'), lines)
+
+
+def top_netlist(sizes):
+    return ['// testbench',
+            'simulator lang=spectre',
+            '',
+            'include "params.scs"',
+            'include "models.scs"',
+            'include "cells.scs"',
+            'include "layout.scs"',
+            'include "tree/t.scs"',
+            '',
+            'V0 vdd 0 vsource dc=1.8 type=dc',
+            'V1 a 0 vsource dc=0.9 type=dc',
+            'X0 a b vdd 0 cell_' + str(sizes.cell_depth) + ' m=1',
+            'X1 b c 0 layout m=1']
+
+
+# the toml tables, every generated card can be translated
+def component_table(sizes):
+    lines = ['[resistor]', 'spice_prefix = ["R"]', 'keep_type    = "No"', 'removed      = [""]',
+             'translated   = [["r", "r"]]', '',
+             '[capacitor]', 'spice_prefix = ["C"]', 'keep_type    = "No"', 'removed      = [""]',
+             'translated   = [["c", "c"]]', '',
+             '[vsource]', 'spice_prefix = ["V"]', 'keep_type    = "No"', 'removed      = ["type"]',
+             'translated   = [["dc", "dc"]]', '']
+    for model in range(sizes.models):
+        channel = 'n' if model % 2 == 0 else 'p'
+        lines += ['[' + channel + 'ch_' + str(model) + ']', 'spice_prefix = ["M"]', 'keep_type    = "Yes"',
+                  'removed      = [""]', 'translated   = [["l", "l"], ["w", "w"]]', '']
+    return lines
+
+
+def model_table(sizes):
+    translated = ',\n'.join('    ["' + name + '", "' + name + '"]' for name in model_parameters())
+    lines = []
+    for model in range(sizes.models):
+        channel = 'n' if model % 2 == 0 else 'p'
+        lines += ['[' + channel + 'ch_' + str(model) + ']', 'ignored    = "No"', 'added      = ["' + channel + 'mos"]',
+                  'removed    = ["type"]', 'translated = [', '    ["bsim4", "level=54"],', translated, ']', '']
+    return lines
+
+
+# Main function of this file. Writes the netlists and the tech tables to the folder.
+def generate(folder, scale=1, seed=1):
+    random.seed(seed)
+    sizes = Sizes(scale)
+
+    write_file(os.path.join(folder, 'top.scs'), top_netlist(sizes))
+    write_file(os.path.join(folder, 'params.scs'), params_netlist(sizes))
+    write_file(os.path.join(folder, 'models.scs'), models_netlist(sizes))
+    write_file(os.path.join(folder, 'cells.scs'), cells_netlist(sizes))
+    write_file(os.path.join(folder, 'layout.scs'), layout_netlist(sizes))
+    write_tree(os.path.join(folder, 'tree'), 't', 0, sizes)
+    write_file(os.path.join(folder, 'tech', 'component_table.toml'), component_table(sizes))
+    write_file(os.path.join(folder, 'tech', 'model_table.toml'), model_table(sizes))
+    return sizes
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='Writes synthetic Spectre netlists')
+    arg_parser.add_argument('folder', type=str, help='Output folder')
+    arg_parser.add_argument('--scale', type=float, default=1, help='Multiplies the number of cards')
+    arg_parser.add_argument('--seed',  type=int, default=1, help='Seed of the generator')
+    args = arg_parser.parse_args()
+
+    generate(args.folder, args.scale, args.seed)
+
+
+if __name__ == '__main__':
+    main()
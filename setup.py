@@ -29,7 +29,7 @@ setup(name='spectre2spice',
               #'spectre2spice = bin.spectre2spice:main'
           ]
       },
-      scripts=['bin/spectre2spice'],
+      scripts=['bin/spectre2spice', 'bin/spectre2spice_server'],
       install_requires=[
           'lark-parser',
           'pyparsing',
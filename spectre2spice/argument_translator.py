@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+##
+## Copyright (c) 2019 Thomas Benz.
+##
+## This file is part of librecell-layout
+## (see https://codeberg.org/thommythomaso/spectre2spice/master/)
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the CERN Open Hardware License (CERN OHL-S) as it will be published
+## by the CERN, either version 2.0 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## CERN Open Hardware License for more details.
+##
+## You should have received a copy of the CERN Open Hardware License
+## along with this program. If not, see <http://ohwr.org/licenses/>.
+##
+##
+##
+
+#-------------------------------------------------------------------------------
+#-- Title      : Argument Translator
+#-- Project    : Spectre2Spice
+#-------------------------------------------------------------------------------
+#-- File       : argument_translator.py
+#-------------------------------------------------------------------------------
+#-- Description: Translates the arguments of a component or a model card with
+#                the help of the translated and removed lists of the tables
+#-------------------------------------------------------------------------------
+
+# Both, the component and the model table, specify a list of [from, to] pairs
+# (translated) and a list of arguments, that are dropped (removed). This file
+# turns those lists into an ArgumentMap once, when the table is read. An argument
+# is then resolved with a single dict lookup.
+#
+# The translated arguments are returned in the order of the table, as this
+# is the order the spice card is printed in. Arguments, that are neither
+# translated nor removed, are returned in the order they were given.
+
+
+class ArgumentMap:
+    def __init__(self, translated, removed):
+
+        # spectre name -> position of the pair in the table
+        self.slots   = {}
+        # spice name for every position
+        self.targets = []
+
+        for [from_ele, to_ele] in translated:
+            # if a name is listed twice, the first pair is used
+            if(from_ele not in self.slots):
+                self.slots[from_ele] = len(self.targets)
+                self.targets.append(to_ele)
+
+        self.removed = frozenset(removed)
+
+        # copies of the lists of the table, to see if they changed since
+        self.source  = [[list(pair) for pair in translated], list(removed)]
+
+    # returns True, if the map was built from these lists
+    def built_from(self, translated, removed):
+        return self.source == [translated, removed]
+
+
+# returns the argument as it is written to the spice card: name=value or just name
+def argument_text(arg):
+    [name, value] = arg
+    if(value is None):
+        return name
+    return name + '=' + value
+
+
+# Main function of this file. Every argument is a pair [name, value], the value is None
+# for an argument without =. The parser classes hand the equations over like this, the
+# names are never split off a rendered string. It returns the translated arguments and
+# the list of unknown arguments, both as strings.
+def translate_arguments(argument_map, args):
+
+    slots   = argument_map.slots
+    removed = argument_map.removed
+
+    # one list per pair in the table, this keeps the table order
+    translated = [None] * len(argument_map.targets)
+    unknown    = []
+
+    for arg in args:
+
+        [name, value] = arg
+
+        slot = slots.get(name)
+        if(slot is not None):
+            if(value is not None):
+                # an argument with an =
+                new_arg = argument_map.targets[slot] + '=' + value
+            else:
+                # an argument without an =
+                new_arg = argument_map.targets[slot]
+
+            if(translated[slot] is None):
+                translated[slot] = [new_arg]
+            else:
+                translated[slot].append(new_arg)
+
+        elif(name not in removed):
+            unknown.append(argument_text(arg))
+
+    new_args = []
+    for slot_args in translated:
+        if(slot_args is not None):
+            new_args.extend(slot_args)
+
+    return [new_args, unknown]
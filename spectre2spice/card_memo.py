@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+##
+## Copyright (c) 2019 Thomas Benz.
+##
+## This file is part of librecell-layout
+## (see https://codeberg.org/thommythomaso/spectre2spice/master/)
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the CERN Open Hardware License (CERN OHL-S) as it will be published
+## by the CERN, either version 2.0 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## CERN Open Hardware License for more details.
+##
+## You should have received a copy of the CERN Open Hardware License
+## along with this program. If not, see <http://ohwr.org/licenses/>.
+##
+##
+##
+
+# coding=utf8
+#-------------------------------------------------------------------------------
+#-- Title      : Card Memo
+#-- Project    : Spectre2Spice
+#-------------------------------------------------------------------------------
+#-- File       : card_memo.py
+#-------------------------------------------------------------------------------
+#-- Description: Keeps the parsed cards of the last cards, a card seen before is
+#                not parsed again
+#-------------------------------------------------------------------------------
+
+# The corner libraries (tt, ff, ss, ...) and the bins of a model library repeat the same
+# cards many times, after the preprocessor they are the very same text. parse_main asks
+# the memo first: if the card was parsed before, the parsed cards are returned again.
+#
+# The parsed cards do not depend on the tech tables, they are only used by spice_print
+# (see Instance and Model in parser_classes.py), so a kept card is printed with the
+# tables of the context, that prints it. The parsed cards are not changed by the backend,
+# the same objects can be printed any number of times. Printing them writes the v()
+# warnings again (see Function).
+#
+# The memo is not used while the debug trace is written, the trace of every card is
+# needed. A card, that is parsed into no card at all, is not kept: these are the empty
+# cards and the unsupported ones, that write to the console. An unknown card raises an
+# exception and is not kept either.
+#
+# The memo keeps the most recently used cards, up to max_chars characters of cards. The
+# parsed cards need about 40 bytes per character of the card, i.e. about 20 MB. It
+# starts over, if an other grammar or other tech tables are used.
+#
+# Normally every translation context has a memo of its own. The netlist manager creates
+# a context for every netlist, so only the cards repeated within one netlist are found.
+# The server sets shared_memo instead, that is used by all contexts of the process: the
+# jobs find the cards of the jobs before (see translation_server.py). It is not locked,
+# the contexts using it must run one after another.
+
+from collections import OrderedDict
+
+
+# the number of characters of the kept cards
+default_max_chars = 500000
+
+# the memo used by every new context instead of one of its own, None if not shared
+shared_memo = None
+
+
+class CardMemo:
+    def __init__(self, max_chars=default_max_chars):
+
+        self.max_chars = max_chars
+
+        # card -> parsed cards, the most recently used card is the last one
+        self.cards     = OrderedDict()
+        self.chars     = 0
+
+        # the grammar, that parsed the kept cards, and the signature of the tech tables
+        # they were translated with
+        self.grammar   = None
+        self.tables    = None
+
+        # statistics: cards looked up, found and dropped to stay below max_chars
+        self.lookups   = 0
+        self.hits      = 0
+        self.evictions = 0
+
+    # returns the parsed cards of the card, None if it is not kept
+    def lookup(self, card, grammar):
+        self.lookups += 1
+        if(grammar is not self.grammar):
+            self.clear()
+            self.grammar = grammar
+
+        parsed_cards = self.cards.get(card)
+        if(parsed_cards is not None):
+            self.hits += 1
+            self.cards.move_to_end(card)
+        return parsed_cards
+
+    # starts over, if the signature of the tech tables changed (see tech_signature)
+    def use_tables(self, signature):
+        if(signature != self.tables):
+            self.clear()
+            self.tables = signature
+
+    # keeps the parsed cards of the card, the least recently used cards are dropped
+    def store(self, card, parsed_cards):
+        if(not parsed_cards or len(card) > self.max_chars):
+            return
+
+        self.cards[card] = parsed_cards
+        self.chars += len(card)
+        while(self.chars > self.max_chars):
+            old_card = self.cards.popitem(last=False)[0]
+            self.chars     -= len(old_card)
+            self.evictions += 1
+
+    def clear(self):
+        self.cards = OrderedDict()
+        self.chars = 0
+
+    def stats(self):
+        return [self.lookups, self.hits, self.evictions]
+
+
+def format_stats(stats):
+    [lookups, hits, evictions] = stats
+    return ('parse memo: ' + str(hits) + ' of ' + str(lookups) + ' cards not parsed again'
+            + ' (%.1f %%)' % (100.0 * hits / max(lookups, 1)) + ', ' + str(evictions) + ' cards dropped')
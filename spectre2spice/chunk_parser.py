@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+##
+## Copyright (c) 2019 Thomas Benz.
+##
+## This file is part of librecell-layout
+## (see https://codeberg.org/thommythomaso/spectre2spice/master/)
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the CERN Open Hardware License (CERN OHL-S) as it will be published
+## by the CERN, either version 2.0 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## CERN Open Hardware License for more details.
+##
+## You should have received a copy of the CERN Open Hardware License
+## along with this program. If not, see <http://ohwr.org/licenses/>.
+##
+##
+##
+
+# coding=utf8
+#-------------------------------------------------------------------------------
+#-- Title      : Chunk Parser
+#-- Project    : Spectre2Spice
+#-------------------------------------------------------------------------------
+#-- File       : chunk_parser.py
+#-------------------------------------------------------------------------------
+#-- Description: Parses the cards of a single big netlist in worker processes
+#-------------------------------------------------------------------------------
+
+# Vendor model libraries often come as one huge file. After the preprocessor every
+# card is independent of the others, so the cards of one file can be split into
+# chunks, that are parsed and printed by a pool of worker processes.
+#
+# A chunk is cut between any two cards, also inside a subckt ... ends block: parse_main
+# keeps no state from one card to the next, a subckt or ends card is translated on its
+# own. A post layout netlist, that is a single huge subcircuit, is therefore parsed by
+# all workers. The results are handed back in the order of the chunks, the console output and the debug log
+# of a chunk are collected by the worker and written out by the manager in the same order.
+# Only a few chunks are in flight at the same time, the file is never loaded as a whole.
+# The workers get a copy of the translation context, that carries the settings only
+# (see translation_context.py).
+
+from spectre2spice.parser_logging   import *
+from spectre2spice.parser_core      import parse_main
+from spectre2spice.spectre_bnf      import get_grammar
+from spectre2spice.translation_context import current_context
+from contextlib                     import redirect_stdout
+from collections                    import deque
+from itertools                      import chain
+import io
+import os
+
+
+# number of cards in a chunk, if --chunk_size is not given
+default_chunk_size = 1000
+
+
+# passes the cards through and writes them to the given file, one card per line
+def log_cards(cards, pp_file):
+    separator = ''
+    for card in cards:
+        pp_file.write(separator + card)
+        separator = '\n'
+        yield card
+
+
+# splits the cards into lists of size cards
+def split_chunks(cards, size):
+    chunk = []
+    for card in cards:
+        chunk.append(card)
+        if(len(chunk) >= size):
+            yield chunk
+            chunk = []
+
+    if(chunk):
+        yield chunk
+
+
+# parses the cards and prints every parsed card, yields the list of spice cards
+# for each card. The context is active while a card is printed.
+def render_cards(parsed_cards, context=None):
+    if(context is None):
+        context = current_context()
+
+    for card in parsed_cards:
+        with context.activate():
+            rendered = [sub_card.spice_print() for sub_card in card]
+        yield rendered
+
+
+# Works like render_cards(parse_main(cards, grammar, context)). If the translation is
+# profiled, the time of both stages is measured.
+def translate_cards(cards, grammar, context):
+    profile = context.profile
+    if(profile is None):
+        return render_cards(parse_main(cards, grammar, context), context)
+
+    parsed = profile.timed(parse_main(cards, grammar, context), 'parse_main')
+    return profile.timed(render_cards(parsed, context), 'spice_print')
+
+
+# runs in a worker process: parses and prints one chunk. The console output is returned,
+# the debug output goes to a log file of its own. An unknown card stops the chunk, like
+# it stops the translation of the file. The profile of the chunk is returned as well.
+def parse_chunk(cards, context, chunk_log, optimized):
+
+    grammar = get_grammar(optimized, context.tracing())
+    if(chunk_log):
+        context.open_log(chunk_log)
+
+    console  = io.StringIO()
+    rendered = []
+    unknown  = None
+    with redirect_stdout(console):
+        try:
+            for card in translate_cards(cards, grammar, context):
+                rendered.append(card)
+        except UnknownCardException as e:
+            unknown = e.card
+
+    context.close_log()
+    if(context.profile is not None):
+        context.profile.count_caches(context)
+    return [rendered, console.getvalue(), unknown, context.profile]
+
+
+# the manager side of a finished chunk: prints its output, appends its logs and profile
+# and yields its cards
+def collect_chunk(future, chunk_log, chunk, index, logs):
+
+    [rendered, console, unknown, profile] = future.result()
+    [context, pp_file] = logs
+
+    print(console, end='')
+    if(profile is not None):
+        context.profile.merge(profile)
+
+    # the preprocessed cards are logged up to the unknown card, like log_cards does
+    if(pp_file is not None):
+        if(unknown is not None):
+            chunk = chunk[:chunk.index(unknown)+1]
+        if(index > 0):
+            pp_file.write('\n')
+        pp_file.write('\n'.join(chunk))
+
+    # the log of the file is open in this process, the chunk log is appended to it
+    if(chunk_log and os.path.exists(chunk_log)):
+        cf = open(chunk_log, 'r')
+        context.write_log(cf.read())
+        cf.close()
+        os.remove(chunk_log)
+
+    yield from rendered
+    if(unknown is not None):
+        raise UnknownCardException(unknown)
+
+
+# Main function of this file. Works like translate_cards(cards, grammar, context), but
+# the chunks are parsed by the given pool. A file with a single chunk is parsed right here.
+# The preprocessed cards are written to pp_file (if given), the debug output of the
+# workers is appended to the log of the context, which is written to log_file.
+def parse_chunked(cards, grammar, pool, context, settings, log_file, pp_file=None):
+
+    chunks = split_chunks(cards, settings['chunk_size'])
+    first  = next(chunks, None) or []
+    second = next(chunks, None)
+    if(second is None):
+        if(pp_file is not None):
+            first = log_cards(first, pp_file)
+        yield from translate_cards(first, grammar, context)
+        return
+
+    # chunks in flight: [future, chunk log, cards, index]
+    pending   = deque()
+    logs      = [context, pp_file]
+    for [index, chunk] in enumerate(chain([first, second], chunks)):
+        chunk_log = log_file + '.' + str(index) if log_file else ''
+        pending.append([pool.submit(parse_chunk, chunk, context, chunk_log, settings['optimized']), chunk_log, chunk, index])
+
+        # do not read ahead too far
+        if(len(pending) > 2 * settings['file_jobs']):
+            yield from collect_or_cancel(pending, logs)
+
+    while(pending):
+        yield from collect_or_cancel(pending, logs)
+
+
+# collects the oldest chunk in flight. The translation stops at an unknown card, the
+# following chunks are dropped.
+def collect_or_cancel(pending, logs):
+    [future, chunk_log, chunk, index] = pending.popleft()
+    try:
+        yield from collect_chunk(future, chunk_log, chunk, index, logs)
+    except BaseException:
+        for [later, later_log, later_chunk, later_index] in pending:
+            later.cancel()
+            try:
+                later.result()
+            except Exception:
+                # the chunk was cancelled or failed as well, its result is dropped
+                pass
+            if(later_log and os.path.exists(later_log)):
+                os.remove(later_log)
+        pending.clear()
+        raise
@@ -48,19 +48,18 @@
 # it gets the prefix X_ and keeps all arguments.
 
 import sys
-from toml                           import loads as tl
-from spectre2spice.parser_logging   import *
-import spectre2spice.shared_variables as shv
+from spectre2spice.argument_translator import translate_arguments, argument_text
+from spectre2spice.parser_logging      import *
 
 
-# Main function of this file. It gets the path to the component table, the name of the type 
-# and the arguments from the spectre component. It then translates them into the arguments of
-# the spice component and adds the prefix to the designator.
-def translate_component(component_table, designator, comp_type, args):
+# Main function of this file. It gets the translation context, the name of the type 
+# and the arguments from the spectre component ([name, value] pairs, see argument_translator.py).
+# It then translates them into the arguments of the spice component and adds the prefix to
+# the designator.
+def translate_component(context, designator, comp_type, args):
 
-    # read the component translation table and parse it
-    component_table   = open(component_table, 'r').read()
-    parsed_dict       = tl(component_table)
+    # fetch the component translation table of the context, it is only parsed once
+    parsed_dict       = context.component_table()
 
     # get the component
     try:
@@ -69,7 +68,7 @@ def translate_component(component_table, designator, comp_type, args):
     except:
         # if it is not found in the table, assume it to be a subcircuit.
         # print an info message to the terminal
-        console_text('Component not in table; assume it to be a subcircuit: ' + str(designator), 0, shv.thr)
+        console_text('Component not in table; assume it to be a subcircuit: ' + str(designator), 0, context.thr)
         in_table = False
 
 
@@ -86,38 +85,15 @@ def translate_component(component_table, designator, comp_type, args):
         # create the new designator
         new_designator = current_component['spice_prefix'][0] + '_' + designator
 
-        # do the translation of the parameters
-        to_translate = current_component['translated']
-    
-        for [from_ele, to_ele] in to_translate:
-            for arg_eq in args:
-    
-                arg = arg_eq.split('=')
-                if(arg[0] == from_ele and len(arg) == 1):
-                    # an argument without an =
-                    new_args.append(to_ele)
-                    args.pop(args.index(arg_eq))
-    
-                elif(arg[0] == from_ele):
-                    # an argument with an =
-                    new_args.append(to_ele + '=' + arg[1])
-                    args.pop(args.index(arg_eq))
-
-        # remove unneeded elements
-        to_remove = current_component['removed']
-    
-        for remove_ele in to_remove:
-            for arg_eq in args:
-    
-                arg = arg_eq.split('=')
-                if(arg[0] == remove_ele):
-                    # unconditionally remove 
-                    args.pop(args.index(arg_eq))
-    
+        # do the translation of the parameters, the translated arguments are appended
+        # and the arguments that are neither translated nor removed are returned
+        [translated_args, missing_args] = translate_arguments(current_component['argument_map'], args)
+        new_args.extend(translated_args)
+
         # sanity check: see if all arguments have either be translated or removed. If not return None
         # this stopps the programm. 
-        if(len(args) != 0):
-            console_text('Some model parameters are missing in the component table: ' + str(args), 3, shv.thr)
+        if(len(missing_args) != 0):
+            console_text('Some model parameters are missing in the component table: ' + str(missing_args), 3, context.thr)
             return None
 
 
@@ -129,7 +105,7 @@ def translate_component(component_table, designator, comp_type, args):
         new_args = []
         new_args.append(comp_type)
         for arg in args:
-            new_args.append(arg)
+            new_args.append(argument_text(arg))
 
 
     return [new_designator, new_args]
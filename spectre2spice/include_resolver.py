@@ -34,41 +34,106 @@
 #-------------------------------------------------------------------------------
 
 # importing modules neccesary to define parser
-from pyparsing                    import Word, nums, alphas, Optional, Combine, Forward, printables, Suppress
 from spectre2spice.parser_core    import *
 from spectre2spice.parser_logging import *
 from spectre2spice.parser_classes import *
 from spectre2spice.spectre_bnf    import *
+from spectre2spice.netlist_reader import NetlistReader
+import os
 
 # This functions are used by the netlsit manager to find the include statements in the netlists
 # and resolve them.
+#
+# The includes form a graph, a library is often included from many places. Every file is
+# identified by its normalized path and only visited the first time it is found, later
+# includes of the same file are listed in the hierarchy, but not followed again. An
+# include of a file, that is still being visited (one of its parents), is a circular
+# include and is not followed either.
+#
+# Every entry of the hierarchy is [path, filename, ext, level, note], the note is None
+# for the first visit of a file, 'included above' for a file listed before and
+# 'circular include' for an include back to a parent.
+#
+# The netlists are read with the reader of the run (netlist_reader.py), the translation
+# later on uses the same mapping of the file.
+
+
+# returns the key of a file in the include graph
+def normalized_path(path, filename, ext):
+    return os.path.normcase(os.path.realpath(path + filename + '.' + ext))
 
 
 # go through the filetree and resolve all includes
-def get_filenames_rec(parent_path, sub_path, filename, ext, level, hierarchy):
+def get_filenames_rec(parent_path, sub_path, filename, ext, level, hierarchy, visited, parents, reader):
 
-    # open the parent file
-    file = open(parent_path + sub_path + filename + '.' + ext, 'r')
+    key = normalized_path(parent_path + sub_path, filename, ext)
+
+    # the file is one of the parents -> do not follow the include again
+    if(key in parents):
+        hierarchy.append([str(parent_path+sub_path), str(filename), str(ext), level, 'circular include'])
+        return hierarchy
+
+    # the file was visited before -> it is listed, but not resolved again
+    if(key in visited):
+        hierarchy.append([str(parent_path+sub_path), str(filename), str(ext), level, 'included above'])
+        return hierarchy
+
+    visited.add(key)
+    parents.append(key)
 
     # append it to the hierarchy
-    hierarchy.append([str(parent_path+sub_path), str(filename), str(ext), level])
+    hierarchy.append([str(parent_path+sub_path), str(filename), str(ext), level, None])
 
-    # search every line of the netlist if there is an include statement
-    for line in file:
-        if line.startswith('include'):
-            parsed      = include_def.parseString(line)
-            include_ele = parsed[0].get_include()
-            # call the same function, but now 'a level deeper'
-            get_filenames_rec(parent_path + sub_path, include_ele[0], include_ele[1], include_ele[2], level+1, hierarchy)
+    # search the netlist for lines with an include statement
+    for line in reader.include_lines(parent_path + sub_path + filename + '.' + ext):
+        parsed      = get_grammar().include_def.parseString(line)
+        include_ele = parsed[0].get_include()
+        # call the same function, but now 'a level deeper'
+        get_filenames_rec(parent_path + sub_path, include_ele[0], include_ele[1], include_ele[2], level+1,
+                          hierarchy, visited, parents, reader)
 
     # return the subhierarchy to the parent function
-    file.close()
+    parents.pop()
     return hierarchy
 
 
-# nice wrapper for the hierarchical function
-def get_filenames(parent_path, filename, input_ext):
-    return get_filenames_rec(parent_path, '', filename, input_ext, 0, [])
+# nice wrapper for the hierarchical function, without a reader the netlists are
+# only mapped while the includes are resolved
+def get_filenames(parent_path, filename, input_ext, reader=None):
+    if(reader is not None):
+        return get_filenames_rec(parent_path, '', filename, input_ext, 0, [], set(), [], reader)
+
+    reader = NetlistReader()
+    try:
+        return get_filenames_rec(parent_path, '', filename, input_ext, 0, [], set(), [], reader)
+    finally:
+        reader.close()
+
+
+# the files to translate: every file of the hierarchy exactly once
+def unique_filenames(hierarchy):
+    return [name for name in hierarchy if name[4] is None]
+
+
+# returns a description like 'a.scs -> b.scs -> a.scs' for every circular include
+def include_cycles(hierarchy):
+    cycles = []
+    for [index, name] in enumerate(hierarchy):
+        if(name[4] != 'circular include'):
+            continue
+
+        # walk up the hierarchy until the included file is found
+        key   = normalized_path(name[0], name[1], name[2])
+        chain = [name[1] + '.' + name[2]]
+        level = name[3]
+        for parent in reversed(hierarchy[:index]):
+            if(parent[3] == level - 1):
+                chain.insert(0, parent[1] + '.' + parent[2])
+                level = parent[3]
+                if(normalized_path(parent[0], parent[1], parent[2]) == key):
+                    break
+        cycles.append(' -> '.join(chain))
+    return cycles
 
 
 # small prettyprint for all the filenames
@@ -87,6 +152,10 @@ def pprint_filenames(filename_list, prefix):
         else:
             name_line += name[1] + '.' + name[2]
 
+        # files that are not resolved again
+        if(name[4] is not None):
+            name_line += ' (' + name[4] + ')'
+
         res += name_line + '\n'
 
     return res
\ No newline at end of file
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+##
+## Copyright (c) 2019 Thomas Benz.
+##
+## This file is part of librecell-layout
+## (see https://codeberg.org/thommythomaso/spectre2spice/master/)
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the CERN Open Hardware License (CERN OHL-S) as it will be published
+## by the CERN, either version 2.0 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## CERN Open Hardware License for more details.
+##
+## You should have received a copy of the CERN Open Hardware License
+## along with this program. If not, see <http://ohwr.org/licenses/>.
+##
+##
+##
+
+# coding=utf8
+#-------------------------------------------------------------------------------
+#-- Title      : Log Writer
+#-- Project    : Spectre2Spice
+#-------------------------------------------------------------------------------
+#-- File       : log_writer.py
+#-------------------------------------------------------------------------------
+#-- Description: Writes the debug log of a netlist
+#-------------------------------------------------------------------------------
+
+# The log of a netlist is written by a log writer, that keeps the file open while the
+# netlist is translated and writes the lines in big blocks. The writer of a translation
+# is part of its TranslationContext (see translation_context.py).
+#
+# In the worker processes of --jobs the log is not written by the worker itself: the
+# blocks are sent through a queue to a LogListener thread of the main process, that
+# owns all log files. Every log file has exactly one worker, so the blocks of a file
+# arrive in order.
+
+import threading
+
+
+# size of the blocks written to a log file
+log_buffer_size = 1 << 16
+
+
+# writes the log to a file
+class LogWriter:
+    def __init__(self, log_file):
+        self.file = open(log_file, 'w', buffering=log_buffer_size)
+
+    def write(self, text):
+        self.file.write(text)
+
+    def close(self):
+        self.file.close()
+
+
+# sends the log to the main process, block by block
+class QueueLogWriter:
+    def __init__(self, log_file, queue):
+
+        self.log_file = log_file
+        self.queue    = queue
+        self.buffer   = []
+        self.size     = 0
+
+        self.queue.put(['open', log_file, ''])
+
+    def write(self, text):
+        self.buffer.append(text)
+        self.size += len(text)
+        if(self.size >= log_buffer_size):
+            self.flush()
+
+    def flush(self):
+        if(self.buffer):
+            self.queue.put(['write', self.log_file, ''.join(self.buffer)])
+            self.buffer = []
+            self.size   = 0
+
+    def close(self):
+        self.flush()
+        self.queue.put(['close', self.log_file, ''])
+
+
+# runs in the main process and writes the blocks sent by the workers
+class LogListener(threading.Thread):
+    def __init__(self, queue):
+        threading.Thread.__init__(self, daemon=True)
+        self.queue = queue
+
+    def run(self):
+        files = {}
+        while(True):
+            message = self.queue.get()
+            if(message is None):
+                break
+
+            [kind, log_file, text] = message
+            if(kind == 'open'):
+                files[log_file] = LogWriter(log_file)
+            elif(kind == 'write'):
+                files[log_file].write(text)
+            else:
+                files.pop(log_file).close()
+
+        # logs of workers, that died
+        for writer in files.values():
+            writer.close()
+
+    # writes all remaining blocks and ends the thread
+    def stop(self):
+        self.queue.put(None)
+        self.join()
@@ -46,19 +46,18 @@
 # Otherwise an error message will be generated
 
 import sys
-from toml                           import loads as tl
-from spectre2spice.parser_logging   import *
-import spectre2spice.shared_variables as shv
+from spectre2spice.argument_translator import translate_arguments
+from spectre2spice.parser_logging      import *
 
 
-# Main function of this file. It gets the path to the model table, the name of the model
-# and the arguments from the spectre model. It then translates them to the arguments of
+# Main function of this file. It gets the translation context, the name of the model
+# and the arguments from the spectre model ([name, value] pairs, see argument_translator.py,
+# the first one is the type of the model). It then translates them to the arguments of
 # the spice model. It returns a list with the arguments and a 0 if the model should not be ignored
-def translate_model(model_table, model_name, args):
+def translate_model(context, model_name, args):
 
-    # read the model translation table and parse it
-    model_table   = open(model_table, 'r').read()
-    parsed_dict   = tl(model_table)
+    # fetch the model translation table of the context, it is only parsed once
+    parsed_dict   = context.model_table()
 
     # get the corresponding table
     try:
@@ -68,7 +67,7 @@ def translate_model(model_table, model_name, args):
         # print an error message to the console and return Null to stop the
         # translation
         # Warning
-        console_text('Model not found in the model table\n' + str(model_name), 2, shv.thr)
+        console_text('Model not found in the model table\n' + str(model_name), 2, context.thr)
         return None
 
     if(current_model['ignored'] == "Yes"):
@@ -76,40 +75,17 @@ def translate_model(model_table, model_name, args):
 
     # create an empty argument list, first add the new arguments, then go through the given argumnet list and
     # check if the argument should be translated or removed
-    new_args = current_model['added']
+    # the table is cached, so copy the list instead of extending it
+    new_args = list(current_model['added'])
 
-    # do the translation
-    to_translate = current_model['translated']
-
-    for [from_ele, to_ele] in to_translate:
-        for arg_eq in args:
-
-            arg = arg_eq.split('=')
-            if(arg[0] == from_ele and len(arg) == 1):
-                # an argument without an =
-                new_args.append(to_ele)
-                args.pop(args.index(arg_eq))
-
-            elif(arg[0] == from_ele):
-                # an argument with an =
-                new_args.append(to_ele + '=' + arg[1])
-                args.pop(args.index(arg_eq))
-
-    # remove unneeded elements
-    to_remove = current_model['removed']
-
-    for remove_ele in to_remove:
-        for arg_eq in args:
-
-            arg = arg_eq.split('=')
-            if(arg[0] == remove_ele):
-                # unconditionally remove 
-                args.pop(args.index(arg_eq))
+    # do the translation, the translated arguments are appended to the added ones
+    [translated_args, missing_args] = translate_arguments(current_model['argument_map'], args)
+    new_args.extend(translated_args)
 
     # sanity check: see if all arguments have either be translated or removed. If not return None
     # this stopps the programm. 
-    if(len(args) != 0):
-        console_text('Some model parameters are missing in the model table: ' + str(args), 3, shv.thr)
+    if(len(missing_args) != 0):
+        console_text('Some model parameters are missing in the model table: ' + str(missing_args), 3, context.thr)
         return None
 
     return [new_args, 0]
@@ -36,14 +36,54 @@
 
 from spectre2spice.include_resolver import *
 from spectre2spice.parser_logging   import *
-from spectre2spice.preprocessor     import preprocessor
+from spectre2spice.preprocessor     import preprocess_lines
 from spectre2spice.parser_core      import *
-import spectre2spice.shared_variables as shv
+from spectre2spice.chunk_parser     import parse_chunked, translate_cards, log_cards, default_chunk_size
+from spectre2spice.translation_cache import *
+from spectre2spice.netlist_reader   import NetlistReader
+from spectre2spice.translation_context import TranslationContext
+from spectre2spice.log_writer       import LogListener
+from spectre2spice.profiler         import Profile, format_summary
+from contextlib                     import redirect_stdout, nullcontext
+import io
 import os
 
 # This is the netlist manager, it scans the whole input directory and resolves
 # includes, it then translates the netlists, while creating the output directories
 # and files.
+#
+# With --jobs N the netlists are translated by N worker processes. The biggest files
+# are sent to the pool first, as they take the longest. A worker does not print to the
+# console directly, it collects its output and the manager prints it in the order of
+# the hierarchy, so the console output is the same as with a single process.
+#
+# With --file_jobs N the cards of every netlist are split into chunks, that are parsed by N
+# worker processes (see chunk_parser.py). This helps for single huge model files. It is
+# only used if the files themselves are translated one after another.
+#
+# With --cache_path the translated netlists are stored in a cache (see translation_cache.py),
+# a file that did not change since the last run is copied from there. The cache is not
+# used together with --log_path, the logs are only written by a real translation.
+#
+# Every netlist is translated with a TranslationContext of its own (see translation_context.py),
+# it is built from the settings by the process, that translates the netlist.
+#
+# With --profile the time of every stage and card type is measured (see profiler.py) and
+# a summary is printed at the end, even with --silent. Together with --log_path a pstats
+# dump of every netlist is written next to its log, e.g. for snakeviz or pstats.
+#
+# The modules for the worker processes are only imported, if --jobs or --file_jobs is
+# given, they take a noticeable part of the start up time.
+
+
+# the queue to the log listener of the main process, only set in the worker processes of --jobs
+worker_log_queue = None
+
+# The reader of the run, set while the worker processes of --jobs run. The workers are
+# forked after the include resolver mapped every netlist, they inherit the mappings and
+# translate from them: a netlist is read once, not again by the worker. A worker, that
+# was not forked (other start method), finds None and reads the netlists itself.
+run_reader = None
 
 
 # the main function to call
@@ -60,8 +100,7 @@ def netlist_manager(args):
 
     # should logging be enabled? if so parse the logging folder
     logging = not (args['log_path'] == None)
-    if(logging):
-        log_path = args['log_path'][0]
+    log_path = args['log_path'][0] if logging else ''
 
     # parse the output directory
     output_path = args['output_path'][0]
@@ -69,109 +108,367 @@ def netlist_manager(args):
     # parse the tech directory
     tech_path = args['tech_path'][0]
 
+    # the number of worker processes
+    jobs = args.get('jobs')
+    jobs = jobs[0] if jobs else 1
+
+    # the number of worker processes for the cards of a single file
+    file_jobs = args.get('file_jobs')
+    file_jobs = file_jobs[0] if file_jobs else 1
+
+    # the number of cards in a chunk of --file_jobs
+    chunk_size = args.get('chunk_size')
+    chunk_size = chunk_size[0] if chunk_size else default_chunk_size
+
+    # should the translation cache be used? if so parse the cache folder
+    cache_path = args['cache_path'][0] if args.get('cache_path') else ''
+
+    # everything a worker needs to translate a netlist
+    settings = {'parent_path' : args['parent_path'][0],
+                'output_path' : output_path,
+                'log_path'    : log_path,
+                'logging'     : logging,
+                'optimized'   : bool(args.get('fast_grammar')),
+                'share_nodes' : bool(args.get('share_nodes')),
+                'tech_path'   : tech_path,
+                'debug'       : debug,
+                'file_jobs'   : file_jobs,
+                'chunk_size'  : chunk_size,
+                'cache_path'  : cache_path,
+                'cache_salt'  : cache_salt(tech_path, thr) if cache_path else '',
+                'profile'     : bool(args.get('profile')),
+                'thr'         : thr}
+
     # greeting message
     console_text('Welcome to Spectre2Spice', 0, thr)
 
-    # call the include resolver on the top netlist, to get all the netlists
-    # to be translated
-    [top_filename, top_ext] = args['top_file'][0].split('.')
-    filenames = get_filenames(args['parent_path'][0], top_filename, top_ext)
+    # the netlists are mapped once for this run, see netlist_reader.py
+    reader = NetlistReader()
+    try:
+        # call the include resolver on the top netlist, to get all the netlists
+        # to be translated
+        [top_filename, top_ext] = args['top_file'][0].split('.')
+        hierarchy = get_filenames(args['parent_path'][0], top_filename, top_ext, reader)
 
-    # Print the results of the hierarchy
-    console_text('Analyzing includes', 0, thr)
-    console_text('Hierarchy:\n\n' + pprint_filenames(filenames, '        '), 1, thr)
+        # Print the results of the hierarchy
+        console_text('Analyzing includes', 0, thr)
+        console_text('Hierarchy:\n\n' + pprint_filenames(hierarchy, '        '), 1, thr)
+        for cycle in include_cycles(hierarchy):
+            console_text('Circular include: ' + cycle, 3, -1)
 
-    # set the global variables according to the user input
-    shv.tech_path      = tech_path
-    shv.debug          = debug
-    shv.suppress_log   = not logging
-    shv.thr            = thr
+        # every file is translated once, even if it is included many times
+        filenames = unique_filenames(hierarchy)
 
+        # start with an empty cache if requested
+        if(args.get('clear_cache')):
+            if(cache_path):
+                clear_cache(cache_path)
+                console_text('Cleared the cache at: ' + cache_path, 0, thr)
+            else:
+                console_text('No cache to clear, --cache_path is not given', 2, thr)
 
-    # start with translating the netlists
-    # ----------------------------------------
 
-    # go through every netlist in the filename list and translate it
-    for current_netlist in filenames:
+        # start with translating the netlists
+        # ----------------------------------------
 
-        # extract the data needed to call the parser
-        path         = current_netlist[0]
-        sub_path     = path[len(args['parent_path'][0]):] # the rest of the path string
-        netlist_name = current_netlist[1]
-        netlist_ext  = current_netlist[2]
+        # the profiles of the translated netlists, with --profile
+        profiles = []
 
-        # get a relative path inside the top folder
+        if(jobs > 1 and len(filenames) > 1):
+            statuses = translate_parallel(filenames, settings, jobs, profiles, reader)
+        else:
+            # the pool for the chunks of a file, it is shared by all files
+            pool = None
+            if(file_jobs > 1):
+                from concurrent.futures import ProcessPoolExecutor
+                pool = ProcessPoolExecutor(max_workers=file_jobs)
+
+            # go through every netlist in the filename list and translate it
+            statuses = []
+            try:
+                for current_netlist in filenames:
+                    statuses.append(translate_netlist(current_netlist, settings, reader, pool, profiles))
+            finally:
+                if(pool is not None):
+                    pool.shutdown()
+    finally:
+        reader.close()
+
+    # summary
+    failed = statuses.count('failed')
+    if(failed):
+        console_text('Translated ' + str(len(filenames) - failed) + ' of ' + str(len(filenames))
+         + ' files, ' + str(failed) + ' failed', 3, thr)
+    else:
+        console_text('Translated ' + str(len(filenames)) + ' files', 1, thr)
+
+    if(cache_path and not logging):
+        console_text('Cache: ' + str(statuses.count('hit')) + ' hits, '
+         + str(statuses.count('miss')) + ' misses', 0, thr)
+
+    if(settings['profile']):
+        print(format_summary(profiles))
+
+
+# called once in every worker process of --jobs, the logs are sent to the main process
+def init_worker(queue):
+    global worker_log_queue
+    worker_log_queue = queue
+
+
+# returns a new context for the translation of a netlist according to the user input
+def create_context(settings):
+    return TranslationContext(tech_path    = settings['tech_path'],
+                              debug        = settings['debug'],
+                              thr          = settings['thr'],
+                              suppress_log = not settings['logging'],
+                              log_queue    = worker_log_queue,
+                              share_nodes  = settings['share_nodes'])
+
+
+# translates a single netlist, current_netlist is an entry of the filename list. If
+# a pool is given, the cards are parsed in chunks by its workers. Returns 'hit' or 'miss'
+# if the cache is used, 'translated' otherwise. The profile of the netlist is appended
+# to profiles. The netlist is read through the reader of the run (netlist_reader.py).
+def translate_netlist(current_netlist, settings, reader, pool=None, profiles=None):
+
+    thr         = settings['thr']
+    logging     = settings['logging']
+    log_path    = settings['log_path']
+    output_path = settings['output_path']
+
+    # the settings, tables and log of this translation
+    context = create_context(settings)
+
+    # select the grammar, the optimized one uses packrat caching
+    grammar = get_grammar(settings['optimized'], context.tracing())
+
+    # extract the data needed to call the parser
+    path         = current_netlist[0]
+    sub_path     = path[len(settings['parent_path']):] # the rest of the path string
+    netlist_name = current_netlist[1]
+    netlist_ext  = current_netlist[2]
+
+    # the profile of this netlist, with --profile
+    profile = None
+    if(settings['profile']):
+        profile = Profile(sub_path + netlist_name + '.' + netlist_ext)
+        context.profile = profile
+        if(profiles is not None):
+            profiles.append(profile)
+
+    # get a relative path inside the top folder
+
+    # print a simple header
+    console_text('Translating file: ' + colors.NAME_COL + 
+        string_len_format(netlist_name + '.' + netlist_ext, 15) + colors.NORM_COL +
+        ' located at: ' + path, 0, thr)
+
+    # create output directories if neccesary
+        # create subfolder if needed, an other worker might just have created it
+    os.makedirs(output_path + sub_path, exist_ok=True)
+
+    input_name  = path + netlist_name + '.' + netlist_ext
+    output_name = output_path + sub_path + netlist_name + '.sp'
+
+    # see if the file was translated before, the debug trace is not cached
+    cache_path = settings['cache_path']
+    key        = None
+    if(cache_path and not logging and not settings['debug']):
+        key  = cache_key(settings['cache_salt'], input_name, reader)
+        info = load_entry(cache_path, key, output_name)
+        if(info is not None):
+            reader.release(input_name)
+            print(info['console'], end='')
+            print_result(info['num_parsed'], info['num_cards'], thr)
+            return 'hit'
+
+    # if logging is requested: create logging folder structure
+    if(logging):
+        os.makedirs(log_path + sub_path, exist_ok=True)
+        # the path to the log file will be handed to the logging methode
+        log_file = log_path + sub_path + netlist_name + '.log'
 
-        # print a simple header
-        console_text('Translating file: ' + colors.NAME_COL + 
-            string_len_format(netlist_name + '.' + netlist_ext, 15) + colors.NORM_COL +
-            ' located at: ' + path, 0, thr)
+        # start the log, it stays open until the netlist is translated
+        context.open_log(log_file)
+
+    else:
+        log_file = ''
 
-        # create output directories if neccesary
-            # create subfolder if needed
-        if not os.path.exists(output_path + sub_path):
-            os.makedirs(output_path + sub_path)
-    
-        # if logging is requested: create logging folder structure
-        if(logging):
-            if not os.path.exists(log_path + sub_path):
-                os.makedirs(log_path + sub_path)
-            # the path to the log file will be handed to the logging methode
-            log_file = log_path + sub_path + netlist_name + '.log'
-
-            # clear log file
-            lf = open(log_file, 'w')
-            lf.close()
-
-            # set global varibale
-            shv.log_file       = log_file
-    
-        else:
-            log_file = ''
 
+    # now open the input netlist file and create an output file, the netlist
+    # was already read by the include resolver
+    input_file  = reader.open(input_name)
+    output_file = open(output_name, 'w')
+    pp_file     = None
 
-        # now read the input netlist file and create an output file
-        input_file  = open(path + netlist_name + '.' + netlist_ext)
-        output_file = open(output_path + sub_path + netlist_name + '.sp', 'w')
+    # the console output is stored in the cache as well. It is printed and all files are
+    # closed, even if the translation fails: the half written output is removed then.
+    console     = io.StringIO()
+    complete    = False
+    try:
 
         # start with the translation here
         # -------------------------------
-
+        # every step is a generator: a card is read, preprocessed, parsed and
+        # written out, before the next card is read from the file.
 
         # first call the preprocessor
-        preprocessed = preprocessor(input_file.read())
+        preprocessed = preprocess_lines(input_file)
+        if(profile is not None):
+            preprocessed = profile.timed(preprocessed, 'preprocessor')
 
         # if logging is activated -> write preprocessed circuit to files
         if(logging):
             pp_file = open(log_path + sub_path + netlist_name + '.txt', 'w')
-            pp_file.write(preprocessed)
-            pp_file.close()
-
-        # parse the netlist now
-        # function defined in parser_core.py
-        try:
-            parsed_cards = parse_main(preprocessed)
-
-        except UnknownCardException as e:
-            console_text('Unsupported Card: ' + str(e), 3, -1)
-
-
-        # cards are now parsed, write them out as a netlist
-        # this next part directly calls the backend
-        # -------------------------------------------------
-        num_cards = 0
-        for card in parsed_cards:
-            for sub_card in card:
-                num_cards += 1
-
-                # here the spice backend is called
-                output_file.write(sub_card.spice_print() + '\n')
-
-        # inform about the result
-        console_text('Translated ' + string_len_format(str(len(parsed_cards)), 5)
-         + 'to ' + str(num_cards) + ' model cards', 1, thr)
 
+        # parse the netlist now and write the cards out as a netlist
+        # parse_main is defined in parser_core.py, translate_cards (chunk_parser.py) hands
+        # the parsed cards to render_cards, which calls spice_print, which directly calls
+        # the backend
+        # -------------------------------------------------------------------------------
+        if(pool is not None):
+            cards = parse_chunked(preprocessed, grammar, pool, context, settings, log_file, pp_file)
+            if(profile is not None):
+                cards = profile.timed(cards, 'workers')
+        else:
+            if(logging):
+                preprocessed = log_cards(preprocessed, pp_file)
+            cards = translate_cards(preprocessed, grammar, context)
+
+        # the pstats dump of the netlist, with --profile and --log_path
+        stats = None
+        if(profile is not None and logging):
+            import cProfile
+            stats = cProfile.Profile()
+            stats.enable()
+
+        num_parsed = 0
+        num_cards  = 0
+        with (redirect_stdout(console) if key else nullcontext()), context.stage('output'):
+            try:
+                for card in cards:
+                    num_parsed += 1
+                    for sub_card in card:
+                        num_cards += 1
+                        output_file.write(sub_card + '\n')
+
+            except UnknownCardException as e:
+                console_text('Unsupported Card: ' + str(e), 3, -1)
+        complete = True
+
+    finally:
+        print(console.getvalue(), end='')
 
         # close all files
         input_file.close()
+        reader.release(input_name)
         output_file.close()
+        if(pp_file is not None):
+            pp_file.close()
+        context.close_log()
+        if(not complete):
+            os.remove(output_name)
+
+    if(stats is not None):
+        stats.disable()
+        stats.dump_stats(log_path + sub_path + netlist_name + '.prof')
+    if(profile is not None):
+        profile.count_caches(context)
+
+    # inform about the result
+    print_result(num_parsed, num_cards, thr)
+
+    if(key is None):
+        return 'translated'
+
+    info = {'num_parsed' : num_parsed,
+            'num_cards'  : num_cards,
+            'console'    : console.getvalue()}
+    store_entry(cache_path, key, output_name, info)
+    return 'miss'
+
+
+def print_result(num_parsed, num_cards, thr):
+    console_text('Translated ' + string_len_format(str(num_parsed), 5)
+     + 'to ' + str(num_cards) + ' model cards', 1, thr)
+
+
+# runs in a worker process: translates the netlist and returns everything it
+# printed and its profile, an exception is returned as well instead of killing the pool
+def translate_worker(current_netlist, settings):
+    console  = io.StringIO()
+    error    = None
+    status   = 'failed'
+    profiles = []
+    reader   = run_reader
+    if(reader is None):
+        reader = NetlistReader()
+    with redirect_stdout(console):
+        try:
+            status = translate_netlist(current_netlist, settings, reader, profiles=profiles)
+        except Exception as e:
+            error = type(e).__name__ + ': ' + str(e)
+        finally:
+            # the inherited mappings are kept for the next netlist of this worker
+            if(reader is not run_reader):
+                reader.close()
+    return [console.getvalue(), error, status, profiles]
+
+
+# translates all netlists with a pool of worker processes, returns the status of
+# every netlist, see translate_netlist. The profiles are appended in the same order.
+def translate_parallel(filenames, settings, jobs, profiles, reader):
+    from concurrent.futures import ProcessPoolExecutor
+    import multiprocessing
+    global run_reader
+
+    thr = settings['thr']
+
+    # the biggest files first, they take the longest
+    def file_size(index):
+        current_netlist = filenames[index]
+        return os.path.getsize(current_netlist[0] + current_netlist[1] + '.' + current_netlist[2])
+    schedule = sorted(range(len(filenames)), key=file_size, reverse=True)
+
+    # the logs of all workers are written by this process
+    listener = None
+    queue    = None
+    if(settings['logging']):
+        queue    = multiprocessing.Queue()
+        listener = LogListener(queue)
+        listener.start()
+
+    # the workers are forked while the futures are submitted, see run_reader
+    statuses   = []
+    run_reader = reader
+    try:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker,
+                                 initargs=(queue,)) as pool:
+            futures = {}
+            for index in schedule:
+                futures[index] = pool.submit(translate_worker, filenames[index], settings)
+
+            # print the results in the order of the hierarchy
+            for index in range(len(filenames)):
+                current_netlist = filenames[index]
+                try:
+                    [console, error, status, worker_profiles] = futures[index].result()
+                except Exception as e:
+                    # the worker itself died, e.g. it ran out of memory
+                    [console, error, status, worker_profiles] = ['', type(e).__name__ + ': ' + str(e), 'failed', []]
+
+                print(console, end='')
+                profiles.extend(worker_profiles)
+                statuses.append(status)
+                if(error is not None):
+                    console_text('Failed to translate ' + current_netlist[1] + '.' + current_netlist[2]
+                     + ': ' + error, 3, -1)
+    finally:
+        run_reader = None
+
+    if(listener is not None):
+        listener.stop()
+
+    return statuses
+
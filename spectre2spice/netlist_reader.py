@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+##
+## Copyright (c) 2019 Thomas Benz.
+##
+## This file is part of librecell-layout
+## (see https://codeberg.org/thommythomaso/spectre2spice/master/)
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the CERN Open Hardware License (CERN OHL-S) as it will be published
+## by the CERN, either version 2.0 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## CERN Open Hardware License for more details.
+##
+## You should have received a copy of the CERN Open Hardware License
+## along with this program. If not, see <http://ohwr.org/licenses/>.
+##
+##
+##
+
+# coding=utf8
+#-------------------------------------------------------------------------------
+#-- Title      : Netlist Reader
+#-- Project    : Spectre2Spice
+#-------------------------------------------------------------------------------
+#-- File       : netlist_reader.py
+#-------------------------------------------------------------------------------
+#-- Description: Maps every netlist into memory once, the include resolver, the
+#                cache and the translation all read from this mapping
+#-------------------------------------------------------------------------------
+
+# A netlist is needed three times: the include resolver searches it for includes,
+# the translation cache hashes it and the netlist manager translates it. On a
+# network file system reading it three times is slow. Therefore every netlist is
+# mapped (mmap) the first time it is needed and the mapping is kept until the
+# netlist is translated.
+#
+# The mappings belong to a NetlistReader, every run of the netlist manager has its own
+# and closes it at the end. Two translations in the same process (e.g. two jobs of the
+# server running at the same time) never close a mapping the other one still reads.
+# A worker process of --jobs translates a netlist with a reader of its own.
+#
+# The include resolver does not look at every line: it searches the mapping for the word
+# include, only the lines starting with it are parsed by the BNF.
+# The translation reads the mapping through a text stream, that decodes the lines and
+# translates the line endings just like open() does.
+
+import io
+import locale
+import mmap
+import os
+
+
+# returns the key of a file
+def normalized_path(path):
+    return os.path.normcase(os.path.realpath(path))
+
+
+class NetlistReader:
+    def __init__(self):
+
+        # the mapped netlists: normalized path -> mmap (or b'' for an empty file)
+        self.netlists = {}
+
+    # Main function of this file. Returns the content of the netlist as a bytes like
+    # object, the file is only read the first time.
+    def read(self, path):
+        key  = normalized_path(path)
+        data = self.netlists.get(key)
+        if(data is None):
+            file = open(path, 'rb')
+            try:
+                data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # an empty file can not be mapped
+                data = b''
+            file.close()
+            self.netlists[key] = data
+        return data
+
+    # returns the lines starting with include, as strings
+    def include_lines(self, path):
+        data     = self.read(path)
+        encoding = locale.getpreferredencoding(False)
+
+        pos = data.find(b'include')
+        while(pos >= 0):
+            end = data.find(b'\n', pos)
+            if(end < 0):
+                end = len(data)
+
+            # only an include at the start of a line counts
+            if(pos == 0 or data[pos-1:pos] == b'\n'):
+                yield data[pos:end].decode(encoding)
+
+            pos = data.find(b'include', end)
+
+    # returns a text stream of the netlist, it can be used like the file returned by open(path)
+    def open(self, path):
+        return io.TextIOWrapper(io.BufferedReader(MappedFile(self.read(path))))
+
+    # unmaps the netlist, it is read again the next time it is needed
+    def release(self, path):
+        data = self.netlists.pop(normalized_path(path), None)
+        if(isinstance(data, mmap.mmap)):
+            data.close()
+
+    # unmaps all netlists, e.g. at the end of a run or after an error
+    def close(self):
+        while(self.netlists):
+            data = self.netlists.popitem()[1]
+            if(isinstance(data, mmap.mmap)):
+                data.close()
+
+
+# a read only raw stream over a mapping
+class MappedFile(io.RawIOBase):
+    def __init__(self, data):
+        self.data = data
+        self.pos  = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        chunk = self.data[self.pos:self.pos+len(buffer)]
+        buffer[:len(chunk)] = chunk
+        self.pos += len(chunk)
+        return len(chunk)
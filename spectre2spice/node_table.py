@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+##
+## Copyright (c) 2019 Thomas Benz.
+##
+## This file is part of librecell-layout
+## (see https://codeberg.org/thommythomaso/spectre2spice/master/)
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the CERN Open Hardware License (CERN OHL-S) as it will be published
+## by the CERN, either version 2.0 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## CERN Open Hardware License for more details.
+##
+## You should have received a copy of the CERN Open Hardware License
+## along with this program. If not, see <http://ohwr.org/licenses/>.
+##
+##
+##
+
+# coding=utf8
+#-------------------------------------------------------------------------------
+#-- Title      : Node Table
+#-- Project    : Spectre2Spice
+#-------------------------------------------------------------------------------
+#-- File       : node_table.py
+#-------------------------------------------------------------------------------
+#-- Description: Shares equal parts of the parsed expressions (hash-consing)
+#-------------------------------------------------------------------------------
+
+# The parameter files of a foundry repeat the same sub expressions thousands of times,
+# for every bin and every corner, e.g. (1+dvth_mis*sqrt(...)). The wrappers of
+# parser_classes.py hand every new object of an expression to the node table of the
+# translation. If an equal object was parsed before, that one is returned and the new
+# one is dropped, so an expression, that appears many times, is stored once.
+#
+# The objects are built bottom up, the children of a new object are shared already.
+# Two objects are therefore equal, if they are of the same class and have the same
+# strings and the very same children. The parser classes do not define __eq__, an
+# object is hashed and compared by its identity: the key of an object is made of its
+# strings and its children, mostly it is the tuple of children the object holds anyway.
+# Every class has a dictionary of its own, so the key does not need the class.
+#
+# A shared object renders its text once and keeps it (see SharedNode in parser_classes.py).
+# The v() and V() functions print a warning every time they are rendered. They are never
+# shared, so every object containing them has a key of its own and renders every time.
+#
+# The table holds at most max_nodes objects, it starts over when it is full. The
+# translation context owns the table, it lives as long as the translation of a netlist.
+#
+# Sharing costs a dictionary lookup for every object, the parsing of cards without
+# repeated expressions gets slower. The table is therefore only used with --share_nodes,
+# e.g. for the parameter files of a foundry, that are rendered many times.
+
+import sys
+
+
+# the number of objects in a table, about 30 MB with the objects and their texts
+default_max_nodes = 200000
+
+
+class NodeTable:
+    def __init__(self, max_nodes=default_max_nodes):
+
+        self.max_nodes    = max_nodes
+
+        # class -> key -> shared object, and the number of objects in all of them
+        self.classes      = {}
+        self.size         = 0
+
+        # statistics: objects stored before the last clear, objects found per class,
+        # texts reused and their characters. The size of the first object of a class
+        # is kept, the bytes saved are estimated from it when the stats are asked for.
+        self.dropped      = 0
+        self.class_hits   = {}
+        self.class_sizes  = {}
+        self.render_hits  = 0
+        self.render_chars = 0
+
+    # Main function of this file. Returns the shared object equal to node, that is node
+    # itself if it is new.
+    def share(self, node, key):
+        node_class = type(node)
+        nodes      = self.classes.get(node_class)
+        if(nodes is None):
+            nodes = self.add_class(node)
+
+        shared = nodes.get(key)
+        if(shared is not None):
+            self.class_hits[node_class] += 1
+            shared.mark_shared()
+            return shared
+
+        if(self.size >= self.max_nodes):
+            self.clear()
+            nodes = self.add_class(node)
+        nodes[key] = node
+        self.size += 1
+        return node
+
+    def add_class(self, node):
+        node_class = type(node)
+        nodes      = {}
+        self.classes[node_class] = nodes
+        if(node_class not in self.class_hits):
+            self.class_hits[node_class]  = 0
+            self.class_sizes[node_class] = node_size(node)
+        return nodes
+
+    def clear(self):
+        self.dropped += self.size
+        self.classes  = {}
+        self.size     = 0
+
+    # counts a text, that was reused instead of rendered
+    def render_hit(self, text):
+        self.render_hits  += 1
+        self.render_chars += len(text)
+
+    def stats(self):
+        hits        = sum(self.class_hits.values())
+        saved_bytes = sum(hits * self.class_sizes[node_class] for [node_class, hits] in self.class_hits.items())
+        return [hits + self.dropped + self.size, hits, saved_bytes, self.render_hits, self.render_chars]
+
+
+# the size of an object and of its tuples of children
+def node_size(node):
+    size = sys.getsizeof(node)
+    for name in node.__slots__:
+        value = getattr(node, name, None)
+        if(type(value) is tuple):
+            size += sys.getsizeof(value)
+    return size
+
+
+def format_stats(stats):
+    [lookups, hits, saved_bytes, render_hits, render_chars] = stats
+    return ('shared objects: ' + str(hits) + ' of ' + str(lookups) + ' (%.1f %%)' % (100.0 * hits / max(lookups, 1))
+            + ', %.2f MB saved' % (saved_bytes / 1e6) + '; reused texts: ' + str(render_hits)
+            + ', ' + str(render_chars) + ' characters not rendered again')
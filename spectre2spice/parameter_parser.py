@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+##
+## Copyright (c) 2019 Thomas Benz.
+##
+## This file is part of librecell-layout
+## (see https://codeberg.org/thommythomaso/spectre2spice/master/)
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the CERN Open Hardware License (CERN OHL-S) as it will be published
+## by the CERN, either version 2.0 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## CERN Open Hardware License for more details.
+##
+## You should have received a copy of the CERN Open Hardware License
+## along with this program. If not, see <http://ohwr.org/licenses/>.
+##
+##
+##
+
+# coding=utf8
+#-------------------------------------------------------------------------------
+#-- Title      : Parameter Parser
+#-- Project    : Spectre2Spice
+#-------------------------------------------------------------------------------
+#-- File       : parameter_parser.py
+#-------------------------------------------------------------------------------
+#-- Description: A hand written parser for the parameters cards
+#-------------------------------------------------------------------------------
+
+# The parameters cards are the most common cards in the PDK files and are often very
+# long. Parsing them with equation.scanString of the BNF is slow: scanString retries
+# the equation at every position of the card, if one of the equations fails.
+#
+# This file contains a small lexer and a recursive descent parser, that follows the
+# equation rule of spectre_bnf.py step by step and creates the same objects by calling
+# the same wrappers (parser_classes.py). It takes the longest match wherever the
+# BNF uses an Or (^), e.g. between a literal and a variable (2n1 is a variable, 10k is
+# a literal), and it suppresses the space after a number with a unit postfix.
+#
+# Some corners of the BNF behave strange, e.g. a postfix literal swallows the
+# following operator (1m+2) or a number and its unit can be seperated by spaces (1 m ).
+# If the parser finds anything like that, or anything it does not know, it gives up
+# and parse_parameters returns None. The parser core then uses the BNF to parse the card.
+#
+# The debug trace of the BNF can not be reproduced: pyparsing calls the wrappers with its
+# own tokens and locations, e.g. 0.3u is traced as 0.3 and u. With tracing the parser
+# core therefore always uses the BNF, this parser is only used without it.
+
+import re
+from spectre2spice.parser_classes import *
+
+
+name_re    = re.compile('[A-Za-z0-9_!]+')
+digits_re  = re.compile('[0-9]+')
+integer_re = re.compile('\\+?-?[0-9]+')
+
+# the alternatives of the duoary_op of the BNF: Word(chars, min, max)
+operator_res = [re.compile('[!&|+\\-*/<>]{1,2}'),
+                re.compile('[!=]{2,}'),
+                re.compile('={2,}'),
+                re.compile('[>=]{2,}'),
+                re.compile('[<=]{2,}'),
+                re.compile('\\*{2,}')]
+
+name_chars     = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_!')
+digit_chars    = frozenset('0123456789')
+postfix_chars  = frozenset('tgxkmunpf')
+exponent_chars = frozenset('eE')
+operator_chars = frozenset('!&|+-*/<>=')
+
+
+# the wrappers of parser_classes.py, the parse actions of the grammar without tracing
+class ParseActions:
+    def __init__(self):
+
+        self.eq       = eq_wrapper
+        self.num      = num_wrapper
+        self.var      = var_wrapper
+        self.op       = op_wrapper
+        self.unop     = unop_wrapper
+        self.expr     = expr_wrapper
+        self.func     = func_wrapper
+        self.case     = case_wrapper
+        self.sub_expr = sub_expr_wrapper
+        self.sub_case = sub_case_wrapper
+
+parse_actions = ParseActions()
+
+
+# thrown if the card can not be handled by this parser
+class UnsupportedParameter(Exception):
+    pass
+
+
+class ParameterParser:
+    def __init__(self, card):
+
+        self.card    = card
+        self.pos     = 0
+        self.end     = len(card)
+        self.actions = parse_actions
+
+    # returns the position of the next character, that is not a space
+    def skip(self, pos):
+        card = self.card
+        while(pos < self.end and card[pos] == ' '):
+            pos += 1
+        return pos
+
+    def peek(self):
+        self.pos = self.skip(self.pos)
+        return self.card[self.pos:self.pos+1]
+
+    def expect(self, char):
+        if(self.peek() != char):
+            raise UnsupportedParameter()
+        self.pos += 1
+
+    # the duoary_op at the given position, the longest alternative wins
+    def operator(self, pos):
+        if(self.card[pos:pos+1] not in operator_chars):
+            return ''
+        op = ''
+        for operator_re in operator_res:
+            match = operator_re.match(self.card, pos)
+            if(match is not None and len(match.group()) > len(op)):
+                op = match.group()
+        return op
+
+    # the card is a list of equations
+    def parameters(self):
+        card = self.card
+        if(not card.startswith('parameters')):
+            raise UnsupportedParameter()
+        self.pos = len('parameters')
+
+        equations = []
+        while(self.peek() != ''):
+            if(self.pos == len('parameters')):
+                # the name must not be glued to the keyword
+                raise UnsupportedParameter()
+            equations.append(self.equation())
+        return equations
+
+    def equation(self):
+        start = self.pos
+
+        # the left side is a plain variable
+        if(self.card.startswith('parameters', start)):
+            raise UnsupportedParameter()
+        left = self.part()
+        if(not isinstance(left, Variable) or self.operator(self.skip(self.pos)) != ''):
+            raise UnsupportedParameter()
+        left = self.actions.expr(self.card, start, [left])
+
+        self.expect('=')
+
+        # the right side is an expression or a case
+        right = self.case_or_expression()
+        return self.actions.eq(self.card, start, [left, right])
+
+    def case_or_expression(self):
+        start = self.skip(self.pos)
+        cond  = self.expression()
+        if(self.peek() != '?'):
+            return cond
+
+        self.pos += 1
+        if_ele = self.expression()
+        self.expect(':')
+        else_ele = self.expression()
+        return self.actions.case(self.card, start, [cond, if_ele, else_ele])
+
+    # expr_ele + (duoary_op + expr_part)*
+    def expression(self):
+        start    = self.skip(self.pos)
+        elements = [self.element()]
+        while(True):
+            op_start = self.skip(self.pos)
+            op       = self.operator(op_start)
+            if(op == ''):
+                break
+            self.pos = op_start + len(op)
+            elements.append(self.actions.op(self.card, op_start, [op]))
+            elements.append(self.part())
+        return self.actions.expr(self.card, start, elements)
+
+    # unary_op or expr_part
+    def element(self):
+        start = self.skip(self.pos)
+        if(self.card[start:start+1] != '-'):
+            return self.part()
+
+        # a single minus, a literal with a sign is never longer
+        self.pos = start + 1
+        if(self.card[self.pos:self.pos+1] == '-'):
+            raise UnsupportedParameter()
+        frag = self.part()
+        return self.actions.unop(self.card, start, ['-', frag])
+
+    # sub_case, sub_expr, function, literal or variable
+    def part(self):
+        card  = self.card
+        start = self.skip(self.pos)
+        char  = card[start:start+1]
+
+        if(char == '('):
+            self.pos = start + 1
+            inner    = self.expression()
+            if(self.peek() == '?'):
+                self.pos += 1
+                if_ele = self.expression()
+                self.expect(':')
+                else_ele = self.expression()
+                self.expect(')')
+                case = self.actions.case(card, start + 1, [inner, if_ele, else_ele])
+                return self.actions.sub_case(card, start, [case])
+            self.expect(')')
+            return self.actions.sub_expr(card, start, [inner])
+
+        if(char == '' or char not in name_chars):
+            raise UnsupportedParameter()
+
+        name_end = name_re.match(card, start).end()
+        if(char in digit_chars):
+            [literal_end, literal] = self.literal(start)
+            if(literal_end >= name_end):
+                # a function with a name like 10k would be longer
+                if(card[self.skip(name_end):self.skip(name_end)+1] == '('):
+                    raise UnsupportedParameter()
+                self.pos = literal_end
+                return self.actions.num(card, start, [literal])
+
+        name = self.actions.var(card, start, [card[start:name_end]])
+        self.pos = name_end
+        if(self.peek() != '('):
+            self.pos = name_end
+            return name
+
+        # a function call
+        self.pos += 1
+        arguments = [self.expression()]
+        while(self.peek() == ','):
+            self.pos += 1
+            arguments.append(self.expression())
+        self.expect(')')
+        return self.actions.func(card, start, [name] + arguments)
+
+    # returns the end and the text of the literal starting at the given position
+    def literal(self, start):
+        card = self.card
+
+        # integer, real or flot_num
+        number_end = digits_re.match(card, start).end()
+        base_end   = number_end
+        if(card[number_end:number_end+1] == '.'):
+            fraction = card[number_end+1:number_end+2]
+            if(fraction in ('+', '-')):
+                raise UnsupportedParameter()
+            if(fraction != '' and fraction in digit_chars):
+                number_end = digits_re.match(card, number_end+1).end()
+                base_end   = number_end
+            else:
+                number_end += 1
+
+        # scintific and postfix follow a real or an integer, the BNF allows spaces in between
+        unit_pos = self.skip(base_end)
+        unit     = card[unit_pos:unit_pos+1]
+
+        if(unit != '' and unit in exponent_chars):
+            exponent = integer_re.match(card, unit_pos + 1)
+            if(exponent is not None):
+                if(unit_pos != base_end):
+                    raise UnsupportedParameter()
+                return [exponent.end(), card[start:unit_pos+1] + exponent.group()]
+
+        elif(unit != '' and unit in postfix_chars):
+            separator = card[unit_pos+1:unit_pos+2]
+            if(separator != '' and separator in ' \'+*-/'):
+                # only spaces are suppressed after the unit, the other separators are consumed
+                # by the BNF, even if they are an operator
+                if(unit_pos != base_end or separator != ' '):
+                    raise UnsupportedParameter()
+                return [self.skip(unit_pos + 1), card[start:unit_pos+1]]
+
+        return [number_end, card[start:number_end]]
+
+
+# Main function of this file. Parses a parameters card and returns the list of equations,
+# or None if the card has to be parsed by the BNF.
+def parse_parameters(card):
+    if('\t' in card or '\r' in card or '\n' in card):
+        return None
+
+    try:
+        return ParameterParser(card).parameters()
+    except UnsupportedParameter:
+        return None
@@ -36,6 +36,9 @@
 from spectre2spice.parser_logging     import *
 from spectre2spice.model_reader       import *
 from spectre2spice.component_reader   import *
+from spectre2spice.argument_translator import argument_text
+from spectre2spice.translation_context import current_context, active_nodes
+import sys
 
 
 # In this document, for every object, that can be parsed by Specter2Spice,
@@ -43,7 +46,7 @@ from spectre2spice.component_reader   import *
 # object is found by pyparsing. Pyparsing hands the parsed information 
 # to this wrapper, which in turn creates a new object with the parsed information.
 # This creates a tree like data structure for every card.
-# Every class needs to have a prettyprint methode, e.g spice_print. This methode
+# Every class needs to have a prettyprint methode, e.g emit_spice. This methode
 # is recursively called as soon as the backend want to write out the netlist
 # in the target format.
 
@@ -57,8 +60,85 @@ from spectre2spice.component_reader   import *
 # For debugging purposes, other methodes exist in some classes, but they are commented
 # out and not needed. But the can be an example what other target languages can be used.
 
+# The spice code is written by emit_spice(write): an object hands the parts of its card
+# one after another to write (e.g. the append of a list or the write of a file) and
+# passes write on to its children. Concatenating the strings of the children in every
+# parent copies the text of a deep expression again on every level, this way the card
+# is only joined once at the end (see SpiceNode.spice_print).
+
+# A big model library has millions of these objects. Therefore every class has __slots__
+# (no __dict__ per object) and keeps plain strings and tuples, not the ParseResults of
+# pyparsing. The names and numbers are interned, the same name is stored once. The
+# operators are shared: there is a single Duoary_OP object for every operator.
+
+# The objects of the expressions are shared as well: an expression, that appears many
+# times, is stored once (see node_table.py). A shared expression renders its text once
+# and keeps it (see SharedNode), unless it contains a v() function, that warns every time.
+
+
+# the base of all classes, spice_print returns the card as a string
+class SpiceNode:
+    __slots__ = ()
+
+    def spice_print(self):
+        parts = []
+        self.emit_spice(parts.append)
+        return ''.join(parts)
+
+    # an object, that is shared by the node table, is marked
+    def mark_shared(self):
+        pass
+
+
+# the base of the classes, that keep their text once they are shared. The text is None
+# as long as the object is not shared, False if it is shared but not rendered yet.
+class SharedNode(SpiceNode):
+    __slots__ = ('text',)
+
+    def mark_shared(self):
+        if(self.text is None):
+            self.text = False
+
+    def emit_spice(self, write):
+        text = self.text
+        if(text is None):
+            self.emit_parts(write)
+            return
+
+        if(text is False):
+            parts = []
+            self.emit_parts(parts.append)
+            text = ''.join(parts)
+            self.text = text
+        else:
+            nodes = active_nodes.get()
+            if(nodes is not None):
+                nodes.render_hit(text)
+        write(text)
+
+
+# returns the shared object equal to node, see node_table.py. The table is taken from
+# active_nodes, not from the context, this is done for every object of an expression.
+def share(node):
+    nodes = active_nodes.get()
+    if(nodes is None):
+        return node
+    return nodes.share(node, node.share_key())
+
+
+# emits the objects with the separator in between
+def emit_joined(objects, separator, write):
+    first = True
+    for obj in objects:
+        if(not first):
+            write(separator)
+        obj.emit_spice(write)
+        first = False
+
+
+class Equation(SpiceNode):
+    __slots__ = ('left_side', 'right_side')
 
-class Equation:
     def __init__ (self, ls, rs):
 
         self.left_side = ls
@@ -70,24 +150,50 @@ class Equation:
     # def py_print(self):
     #     return str(self.left_side.py_print()) + ' = ' + str(self.right_side.py_print())
 
-    def spice_print(self):
-        return '.param ' + str(self.left_side.spice_print()) + '=\'' + str(self.right_side.spice_print()) + '\''
+    def emit_spice(self, write):
+        write('.param ')
+        self.emit_argument(write)
+
+    # the equation as an argument of an instance, a model or an assertion: name='value'
+    def emit_argument(self, write):
+        self.left_side.emit_spice(write)
+        write('=\'')
+        self.right_side.emit_spice(write)
+        write('\'')
+
+    # the equation as a [name, value] pair for the tech tables, see argument_translator.py
+    def argument(self):
+        return [self.left_side.spice_print(), '\'' + self.right_side.spice_print() + '\'']
+
+    def share_key(self):
+        return (self.left_side, self.right_side)
 
     # def spectre_print(self):
     #     return 'parameters ' + str(self.left_side.spectre_print()) + '=' + str(self.right_side.spectre_print())
 
 
+@trace_as('equation  ')
 def eq_wrapper(string, start, tocs):
-    debug_find_ele(string, start, tocs, 'equation  ')
-    return Equation(tocs[0], tocs[1])
+    return share(Equation(tocs[0], tocs[1]))
+
+# the argument of an instance as a [name, value] pair. A variable after the equations is
+# mostly the unit of a number at the end of the card (c=0.4f), that the grammar splits off.
+# It was always handed over with the first 7 characters cut off like an equation (i.e. as
+# an empty argument), the tech tables remove or translate the empty argument.
+def argument_pair(arg):
+    if(isinstance(arg, Equation)):
+        return arg.argument()
+    return [arg.spice_print()[7:], None]
 
 # ----------------------------------------------------------
 
-class Number:
+class Number(SpiceNode):
+    __slots__ = ('value',)
+
     def __init__(self, parsed):
 
         value = ''.join(parsed)
-        self.value = str(value)
+        self.value = sys.intern(str(value))
 
     # def pprint(self):
     #     return self.value
@@ -98,20 +204,28 @@ class Number:
     def spice_print(self):
         return self.value
 
+    def emit_spice(self, write):
+        write(self.value)
+
+    def share_key(self):
+        return self.value
+
     # def spectre_print(self):
     #     return self.value
 
 
+@trace_as('number    ')
 def num_wrapper(string, start, tocs):
-    debug_find_ele(string, start, tocs, 'number    ')
-    return Number(tocs)
+    return share(Number(tocs))
 
 # ----------------------------------------------------------
 
-class Variable:
+class Variable(SpiceNode):
+    __slots__ = ('name',)
+
     def __init__(self, name):
 
-        self.name = name
+        self.name = sys.intern(str(name[0]))
 
         # if(name[0] == 'as'):  # remove python keywords
         #     self.py_name = ['py_as']
@@ -125,21 +239,29 @@ class Variable:
     #     return str(self.py_name[0])
 
     def spice_print(self):
-        return str(self.name[0])
+        return self.name
+
+    def emit_spice(self, write):
+        write(self.name)
+
+    def share_key(self):
+        return self.name
 
     # def spectre_print(self):
     #     return str(self.name[0])
 
+@trace_as('variable  ')
 def var_wrapper(string, start, tocs):
-    debug_find_ele(string, start, tocs, 'variable  ')
-    return Variable(tocs)
+    return share(Variable(tocs))
 
 # ----------------------------------------------------------
 
-class Duoary_OP:
+class Duoary_OP(SpiceNode):
+    __slots__ = ('op',)
+
     def __init__(self, operator):
 
-        self.op    = operator
+        self.op    = sys.intern(str(operator[0]))
         
         # if(operator[0] == '||'):   # translate to python operators
         #     self.py_op = [' or ']
@@ -154,22 +276,35 @@ class Duoary_OP:
     #     return str(self.py_op[0])
 
     def spice_print(self):
-        return str(self.op[0])
+        return self.op
+
+    def emit_spice(self, write):
+        write(self.op)
 
     # def spectre_print(self):
     #     return str(self.op[0])
 
+# the shared operator objects: operator -> Duoary_OP
+operators = {}
+
+@trace_as('operator  ')
 def op_wrapper(string, start, tocs):
-    debug_find_ele(string, start, tocs, 'operator  ')
-    return Duoary_OP(tocs)
+    operator = operators.get(tocs[0])
+    if(operator is None):
+        operator = Duoary_OP(tocs)
+        operators[operator.op] = operator
+    return operator
 
 # ----------------------------------------------------------
 
-class Unary_OP:
+class Unary_OP(SharedNode):
+    __slots__ = ('op', 'frag')
+
     def __init__(self, operator, expression_fragment):
 
-        self.op    = operator 
-        self.frag  = expression_fragment
+        self.op    = sys.intern(str(operator[0]))
+        self.frag  = expression_fragment[0]
+        self.text  = None
 
     # def pprint(self):
     #     return str(self.op[0]) + str(self.frag[0].pprint())
@@ -177,22 +312,29 @@ class Unary_OP:
     # def py_print(self):
     #     return str(self.op[0]) + str(self.frag[0].py_print())
 
-    def spice_print(self):
-        return str(self.op[0]) + str(self.frag[0].spice_print())
+    def emit_parts(self, write):
+        write(self.op)
+        self.frag.emit_spice(write)
+
+    def share_key(self):
+        return (self.op, self.frag)
 
     # def spectre_print(self):
     #     return str(self.op[0]) + str(self.frag[0].spectre_print())
 
+@trace_as('un_op     ')
 def unop_wrapper(string, start, tocs):
-    debug_find_ele(string, start, tocs, 'un_op     ')
-    return Unary_OP(tocs[0], tocs[1:])
+    return share(Unary_OP(tocs[0], tocs[1:]))
 
 # ----------------------------------------------------------
 
-class Expression:
+class Expression(SharedNode):
+    __slots__ = ('expression_list',)
+
     def __init__(self, param_list):
 
-        self.expression_list = param_list
+        self.expression_list = tuple(param_list)
+        self.text            = None
 
     # # def pprint(self):
     # #     res =  ''
@@ -206,11 +348,12 @@ class Expression:
     # #         res += str(ele.py_print())
     # #     return res 
 
-    def spice_print(self):
-        res = ''
+    def emit_parts(self, write):
         for ele in self.expression_list:
-            res += str(ele.spice_print())
-        return res 
+            ele.emit_spice(write)
+
+    def share_key(self):
+        return self.expression_list
 
     # # def spectre_print(self):
     # #     res = ''
@@ -219,17 +362,20 @@ class Expression:
     # #     return res 
 
 
+@trace_as('expression')
 def expr_wrapper(string, start, tocs):
-    debug_find_ele(string, start, tocs, 'expression')
-    return Expression(tocs)
+    return share(Expression(tocs))
 
 # ----------------------------------------------------------
 
-class Function:
+class Function(SharedNode):
+    __slots__ = ('name', 'args')
+
     def __init__(self, name, arguments):
 
         self.name = name
-        self.args = arguments
+        self.args = tuple(arguments)
+        self.text = None
 
     # def pprint(self):
     #     res = str(self.name.pprint()) + '('
@@ -244,19 +390,33 @@ class Function:
     #     res = res[:-2]
     #     return res + ')'
 
-    def spice_print(self):
+    def emit_parts(self, write):
 
-        res = str(self.name.spice_print()) + '('
-        for ele in self.args:
-            res += str(ele.spice_print()) + ','
-        res = res[:-1]  + ')'
+        name = self.name.spice_print()
 
         # hacky: spice does not support to change parameter (.param) during runtime.
         # therefore I set all the v(.,.) functions to 0. 
-        if(self.name.spice_print() == 'v' or self.name.spice_print() == 'V'):
-            console_text('Set voltage in .param to 0: - ' + res, 2, -1) # log to the terminal
-            res = '0'
-        return res
+        if(name == 'v' or name == 'V'):
+            parts = []
+            self.emit_call(name, parts.append)
+            console_text('Set voltage in .param to 0: - ' + ''.join(parts), 2, -1) # log to the terminal
+            write('0')
+        else:
+            self.emit_call(name, write)
+
+    def emit_call(self, name, write):
+        write(name)
+        write('(')
+        emit_joined(self.args, ',', write)
+        write(')')
+
+    def share_key(self):
+        return (self.name, self.args)
+
+    # the v() functions warn on every render, they are not shared
+    def impure(self):
+        name = self.name.spice_print()
+        return name == 'v' or name == 'V'
 
     # def spectre_print(self):
     #     res = str(self.name.spectre_print()) + '('
@@ -266,18 +426,24 @@ class Function:
     #     return res + ')'
 
 
+@trace_as('function  ')
 def func_wrapper(string, start, tocs):
-    debug_find_ele(string, start, tocs, 'function  ')
-    return Function(tocs[0], tocs[1:])
+    function = Function(tocs[0], tocs[1:])
+    if(function.impure()):
+        return function
+    return share(function)
 
 # ----------------------------------------------------------
 
-class Case:
+class Case(SharedNode):
+    __slots__ = ('cond', 'if_ele', 'else_ele')
+
     def __init__(self, cond, if_ele, else_ele):
 
         self.cond      = cond
         self.if_ele    = if_ele
         self.else_ele  = else_ele
+        self.text      = None
 
     # def pprint(self):
     #     return 'if(' + self.cond.pprint() + ') then(' + self.if_ele.pprint() + ') else(' + self.else_ele.pprint() + ')'
@@ -289,23 +455,32 @@ class Case:
     #     res += ') else (' + self.else_ele.py_print() + ")"
     #     return res
 
-    def spice_print(self):
-        return self.cond.spice_print() + '?' + self.if_ele.spice_print() + ':' + self.else_ele.spice_print()
+    def emit_parts(self, write):
+        self.cond.emit_spice(write)
+        write('?')
+        self.if_ele.emit_spice(write)
+        write(':')
+        self.else_ele.emit_spice(write)
+
+    def share_key(self):
+        return (self.cond, self.if_ele, self.else_ele)
 
     # def spectre_print(self):
     #     return self.cond.spectre_print() + '?' + self.if_ele.spectre_print() + ':' + self.else_ele.spectre_print()
 
+@trace_as('case      ')
 def case_wrapper(string, start, tocs):
-    debug_find_ele(string, start, tocs, 'case      ')
-    return Case(tocs[0], tocs[1], tocs[2])
+    return share(Case(tocs[0], tocs[1], tocs[2]))
 
 # ---------------------------------------------------------
 
-class FunctionDef:
+class FunctionDef(SpiceNode):
+    __slots__ = ('name', 'arguments', 'body')
+
     def __init__(self, name, arguments, body):
 
         self.name = name
-        self.arguments = arguments
+        self.arguments = tuple(arguments)
         self.body = body
 
     # def pprint(self):
@@ -325,15 +500,14 @@ class FunctionDef:
     #     res += '):\n    return ' + str(self.body.py_print()) + '\n'
     #     return res
 
-    def spice_print(self):
-        res = '.func '
-        res += self.name.spice_print() + '('
-        for arg in self.arguments:
-            res += arg.spice_print() + ','
-        res = res[:-1]
-        res += ') {' + str(self.body.spice_print()) + '}'
-
-        return res
+    def emit_spice(self, write):
+        write('.func ')
+        self.name.emit_spice(write)
+        write('(')
+        emit_joined(self.arguments, ',', write)
+        write(') {')
+        self.body.emit_spice(write)
+        write('}')
 
     # def spectre_print(self):
     #     res = 'real '
@@ -345,16 +519,18 @@ class FunctionDef:
     #     return res
 
 
+@trace_as('func_def  ')
 def func_def_wrapper(string, start, tocs):
-    debug_find_ele(string, start, tocs, 'func_def  ')
     return FunctionDef(tocs[0], tocs[1:-1], tocs[-1])
 
 # ---------------------------------------------------------
 
-class LangDef:
+class LangDef(SpiceNode):
+    __slots__ = ('lang',)
+
     def __init__(self, lang):
 
-        self.lang = lang[0]
+        self.lang = str(lang[0])
 
     # def pprint(self):
     #     return 'simulator lang = ' + str(self.lang)
@@ -362,26 +538,29 @@ class LangDef:
     # def py_print(self):
     #     return '# simulator lang = ' + str(self.lang)
 
-    def spice_print(self):
-        return '*simulator lang=' + str(self.lang)
+    def emit_spice(self, write):
+        write('*simulator lang=')
+        write(str(self.lang))
 
     # def spectre_print(self):
     #     return 'simulator lang=' + str(self.lang)
 
 
+@trace_as('lang_def  ')
 def lang_wrapper(string, start, tocs):
-    debug_find_ele(string, start, tocs, 'lang_def  ')
     return LangDef(tocs)
 
 # ----------------------------------------------------------
 
-class IncludeDef:
+class IncludeDef(SpiceNode):
+    __slots__ = ('type', 'path', 'file', 'ext')
+
     def __init__(self, include_type, path, file, extension):
 
-        self.type = include_type
-        self.path = path
-        self.file = file
-        self.ext  = extension
+        self.type = str(include_type)
+        self.path = str(path)
+        self.file = str(file)
+        self.ext  = str(extension)
 
     # def pprint(self):
     #     return string_len_format(str(self.type),12) + ' "' + str(self.path) + str(self.file) + '.' + str(self.ext) + '"'
@@ -389,12 +568,12 @@ class IncludeDef:
     # def py_print(self):
     #     return '# ' + string_len_format(str(self.type),12) + ' ' + str(self.path) + str(self.file) + '.' + str(self.ext)
 
-    def spice_print(self):
+    def emit_spice(self, write):
         if(self.type == 'include ' or self.type == 'include'):
-            return '.include ' + str(self.path) + str(self.file) + '.sp'
+            write('.include ' + str(self.path) + str(self.file) + '.sp')
         else:
             # these are analog includes (AHDL or A-Verilog) Spice cannot use them
-            return '*.' + str(self.type) + ' ' + str(self.path) + str(self.file) + '.' + str(self.ext)
+            write('*.' + str(self.type) + ' ' + str(self.path) + str(self.file) + '.' + str(self.ext))
 
     # def spectre_print(self):
     #     if(self.type == 'include ' or self.type == 'include'):
@@ -406,13 +585,15 @@ class IncludeDef:
     def get_include(self):
         return [str(self.path), str(self.file), str(self.ext)]
 
+@trace_as('include   ')
 def include_wrapper(string, start, tocs):
-    debug_find_ele(string, start, tocs, 'include   ')
     return IncludeDef(tocs[0], tocs[1], tocs[2], tocs[3])
 
 # ----------------------------------------------------------
 
-class Subcircuit:
+class Subcircuit(SpiceNode):
+    __slots__ = ('inline', 'name', 'conns')
+
     def __init__(self, args):
 
         # differenciate between inline subcks and normal ones
@@ -421,13 +602,13 @@ class Subcircuit:
             # inline
             self.inline = True
             self.name   = args[1]
-            self.conns  = args[2:]
+            self.conns  = tuple(args[2:])
 
         else:
             # normal case
             self.inline = False
             self.name   = args[0]
-            self.conns  = args[1:]
+            self.conns  = tuple(args[1:])
 
     # def pprint(self):
     #     res = ''
@@ -448,12 +629,12 @@ class Subcircuit:
     #     res = res[:-2]
     #     return res + ')'
 
-    def spice_print(self):
-        res = '.subckt '
-        res += str(self.name.spice_print()) + ' ('
-        for ele in self.conns:
-            res += str(ele.spice_print()) + ' '
-        return res[:-1] + ')'
+    def emit_spice(self, write):
+        write('.subckt ')
+        self.name.emit_spice(write)
+        write(' (')
+        emit_joined(self.conns, ' ', write)
+        write(')')
 
     # def spectre_print(self):
     #     res = ''
@@ -465,68 +646,69 @@ class Subcircuit:
     #         res += str(ele.spice_print()) + ' '
     #     return res[:-1] + ')'
 
+@trace_as('subcirquit')
 def subcirquit_wrapper(string, start, tocs):
-    debug_find_ele(string, start, tocs, 'subcirquit')
     return Subcircuit(tocs)
 
 # ----------------------------------------------------------
 
-class Instance:
-    def __init__(self, name, arguments):
+class Instance(SpiceNode):
+    __slots__ = ('name', 'ports', 'type', 'args')
 
-        self.name = name
+    def __init__(self, name, ports, comp_type, arguments):
 
-        # Doing a bit of postprocessing. Due to the fact, that spice does not need the () to group the port
-        # list in the instance card, parsing with the bnf will be hard.
-        it = 0
-
-        # check all the parsed arguments, some will be variables (ports) and some will be
-        # parameter equations. The parameter eqations start with .param, therefore
-        # its easy to count the number of ports.
-        # e.g res gnd vdd resistor r=5
-        # the name can easily be extracted by the BNF. The rest is hard; It will count 4 variables
-        # gnd, vdd and resistor. The loop counts the number of variables, the first n-1 are ports and the
-        # last is the type.
-        while not (arguments[it].spice_print().startswith('.param')):
-            #listing the ports and the type of the instance
-            it+=1
-        it = it - 1 # We dont need to count the type for the number of arguments
-
-        self.ports = arguments[0:it]
-        self.type  = arguments[it]
-        self.args  = arguments[it+1:]
+        self.name  = name
+        self.ports = tuple(ports)
+        self.type  = comp_type
+        self.args  = tuple(arguments)
 
-    def spice_print(self):
+    def emit_spice(self, write):
 
-        # translate the arguments so far
+        # the arguments as [name, value] pairs
         plain_args = []
         for arg in self.args:
-            plain_args.append(arg.spice_print()[7:])
+            plain_args.append(argument_pair(arg))
 
         # call the component translation function
-        [new_designator, new_args] = translate_component(shv.tech_path + 'component_table.toml', self.name.spice_print(),
-         self.type.spice_print(), plain_args)
+        context = current_context()
+        with context.stage('tech tables'):
+            [new_designator, new_args] = translate_component(context, self.name.spice_print(),
+             self.type.spice_print(), plain_args)
 
         # build the new component card
-        res = new_designator + ' '
+        write(new_designator + ' ')
         for port in self.ports:
-            res += str(port.spice_print()) + ' '
+            port.emit_spice(write)
+            write(' ')
 
         for arg in new_args:
-            res += arg + ' '
-
-        return res
-
+            write(arg + ' ')
+
+# Due to the fact, that spice does not need the () to group the port list in the instance
+# card, parsing with the bnf will be hard. The name can easily be extracted by the BNF, the
+# rest are variables (ports and the type) and parameter equations.
+# e.g res gnd vdd resistor r=5
+# The loop counts the variables up to the first equation: gnd, vdd and resistor. The first
+# n-1 are ports and the last is the type. An instance without equations is not supported.
+@trace_as('instance  ')
 def instance_wrapper(string, start, tocs):
-    debug_find_ele(string, start, tocs, 'instance  ')
-    return Instance(tocs[0], tocs[1:])
+    arguments = tocs[1:]
+    it = 0
+    while not isinstance(arguments[it], Equation):
+        #listing the ports and the type of the instance
+        it+=1
+    it = it - 1 # We dont need to count the type for the number of arguments
+
+    return Instance(tocs[0], arguments[0:it], arguments[it], arguments[it+1:])
 
 # ----------------------------------------------------------
 
-class Ends:  # this is the end subcircuit card
+class Ends(SpiceNode):  # this is the end subcircuit card
+    __slots__ = ('name',)
+
     def __init__(self, name):
 
-        self.name = name
+        self.name = name[0]
 
     # def pprint(self):
     #     return 'ends ' + str(self.name[0].pprint())
@@ -534,22 +716,26 @@ class Ends:  # this is the end subcircuit card
     # def py_print(self):
     #     return '# ends ' + str(self.name[0].py_print())
 
-    def spice_print(self):
-        return '.ends ' + str(self.name[0].spice_print())
+    def emit_spice(self, write):
+        write('.ends ')
+        self.name.emit_spice(write)
 
     # def spectre_print(self):
     #     return 'ends ' + str(self.name[0].specer_print())        
 
+@trace_as('ends      ')
 def ends_wrapper(string, start, tocs):
-    debug_find_ele(string, start, tocs, 'ends      ')
     return Ends(tocs)
 
 # ----------------------------------------------------------
 
-class SubExpr:
+class SubExpr(SharedNode):
+    __slots__ = ('expr',)
+
     def __init__(self, expression):
 
-        self.expr = expression
+        self.expr = expression[0]
+        self.text = None
 
     # def pprint(self):
     #     return '(' + str(self.expr[0].pprint()) + ')'
@@ -557,22 +743,30 @@ class SubExpr:
     # def py_print(self):
     #     return '(' + str(self.expr[0].py_print()) + ')'
 
-    def spice_print(self):
-        return '(' + str(self.expr[0].spice_print()) + ')'
+    def emit_parts(self, write):
+        write('(')
+        self.expr.emit_spice(write)
+        write(')')
+
+    def share_key(self):
+        return self.expr
 
     # def spectre_print(self):
     #     return '(' + str(self.expr[0].spectre_print()) + ')'
 
+@trace_as('sub_expr  ')
 def sub_expr_wrapper(string, start, tocs):
-    debug_find_ele(string, start, tocs, 'sub_expr  ')
-    return SubExpr(tocs)
+    return share(SubExpr(tocs))
 
 # ----------------------------------------------------------
 
-class SubCase:
+class SubCase(SharedNode):
+    __slots__ = ('case',)
+
     def __init__(self, case):
 
-        self.case = case
+        self.case = case[0]
+        self.text = None
 
     # def pprint(self):
     #     return '(' + str(self.case[0].pprint()) + ')'
@@ -580,22 +774,29 @@ class SubCase:
     # def py_print(self):
     #     return '(' + str(self.case[0].py_print()) + ')'
 
-    def spice_print(self):
-        return '(' + str(self.case[0].spice_print()) + ')'
+    def emit_parts(self, write):
+        write('(')
+        self.case.emit_spice(write)
+        write(')')
+
+    def share_key(self):
+        return self.case
 
     # def spectre_print(self):
     #     return '(' + str(self.case[0].spectre_print()) + ')'
 
+@trace_as('sub_case  ')
 def sub_case_wrapper(string, start, tocs):
-    debug_find_ele(string, start, tocs, 'sub_case  ')
-    return SubCase(tocs)
+    return share(SubCase(tocs))
 
 # ----------------------------------------------------------
 
-class SubFunc:
+class SubFunc(SpiceNode):
+    __slots__ = ('function',)
+
     def __init__(self, function):
 
-        self.function = function
+        self.function = function[0]
 
     # def pprint(self):
     #     return '(' + str(self.function[0].pprint()) + ')'
@@ -603,19 +804,23 @@ class SubFunc:
     # def py_print(self):
     #     return '(' + str(self.function[0].py_print()) + ')'
 
-    def spice_print(self):
-        return '(' + str(self.function[0].spice_print()) + ')'
+    def emit_spice(self, write):
+        write('(')
+        self.function.emit_spice(write)
+        write(')')
 
     # def spectre_print(self):
     #     return '(' + str(self.function[0].spectre_print()) + ')'
 
+@trace_as('sub_func  ')
 def sub_func_wrapper(string, start, tocs):
-    debug_find_ele(string, start, tocs, 'sub_func  ')
     return Subfunc(tocs)
 
 # ----------------------------------------------------------
 
-class StringType:
+class StringType(SpiceNode):
+    __slots__ = ('string',)
+
     def __init__(self, string):
 
         self.string = ''.join(string)
@@ -629,20 +834,25 @@ class StringType:
     def spice_print(self):
         return self.string
 
+    def emit_spice(self, write):
+        write(self.string)
+
     # def spectre_print(self):
     #     return self.string
 
+@trace_as('string    ')
 def string_type_wrapper(string, start, tocs):
-    debug_find_ele(string, start, tocs, 'string    ')
     return StringType(tocs)
 
 # ----------------------------------------------------------
 
-class Assertion:
+class Assertion(SpiceNode):
+    __slots__ = ('name', 'args')
+
     def __init__(self, name, arguments):
 
         self.name = name
-        self.args = arguments
+        self.args = tuple(arguments)
 
     # def pprint(self):
     #     res = self.name.pprint() + ' assert '
@@ -656,11 +866,13 @@ class Assertion:
     #         res += arg.py_print()[7:] + ' '
     #     return res
     
-    def spice_print(self):
-        res = '*' + self.name.spice_print() + ' assert '
+    def emit_spice(self, write):
+        write('*')
+        self.name.emit_spice(write)
+        write(' assert ')
         for arg in self.args:
-            res += arg.spice_print()[7:] + ' '
-        return res
+            arg.emit_argument(write)
+            write(' ')
     
     # def spectre_print(self):
     #     res = self.name.spectre_print() + ' assert '
@@ -668,81 +880,92 @@ class Assertion:
     #         res += arg.spectre_print()[7:] + ' '
     #     return res
 
+@trace_as('assertion ')
 def assertion_wrapper(string, start, tocs):
-    debug_find_ele(string, start, tocs, 'assertion ')
     return Assertion(tocs[0], tocs[1:])
 
 # ----------------------------------------------------------
 
-class Model:
+class Model(SpiceNode):
+    __slots__ = ('name', 'type', 'args')
+
     def __init__(self, parameter):
 
         self.name = parameter[0]
         self.type = parameter[1]
-        self.args = parameter[2:]
+        self.args = tuple(parameter[2:])
 
-    # spice_print reads the model informations in by using the TOML language
-    def spice_print(self):
+    # emit_spice reads the model informations in by using the TOML language
+    def emit_spice(self, write):
 
-        # translate the arguments so far
-        plain_args = [self.type.spice_print()]
+        # the type and the arguments as [name, value] pairs
+        plain_args = [[self.type.spice_print(), None]]
         for arg in self.args:
-            plain_args.append(arg.spice_print()[7:])
+            plain_args.append(argument_pair(arg))
 
         # do the translation, ignored is a binary flag if the model should be ignored
         # new_args is the response.
-        [new_args, ignored] = translate_model(shv.tech_path + 'model_table.toml', self.name.spice_print(), plain_args)
+        context = current_context()
+        with context.stage('tech tables'):
+            [new_args, ignored] = translate_model(context, self.name.spice_print(), plain_args)
 
         # print the model card if not ignored.
         if(not ignored):
-            res = '.model ' + str(self.name.spice_print()) + ' '
+            write('.model ')
+            self.name.emit_spice(write)
+            write(' ')
             for arg in new_args:
-                res += str(arg) + ' '
-            return res
+                write(str(arg) + ' ')
 
         # if ignored place a comment.
         else:
-            return '*.model ' + self.name.spice_print() + ' ' + ' '.join(plain_args)
+            write('*.model ')
+            self.name.emit_spice(write)
+            write(' ' + ' '.join(argument_text(arg) for arg in plain_args))
 
+@trace_as('model     ')
 def model_wrapper(string, start, tocs):
-    debug_find_ele(string, start, tocs, 'model     ')
     return Model(tocs)
 
  # ----------------------------------------------------------
  
-class Conditional: # for now only the if case is used.
+class Conditional(SpiceNode): # for now only the if case is used.
+    __slots__ = ('cond', 'ifcase')
+
     def __init__(self, parameter):
 
         self.cond   = parameter[0]
         self.ifcase = parameter[1]
 
-    def spice_print(self):
-        res =  '.if (' + str(self.cond.spice_print()) + ') {'
-        res += str(self.ifcase.spice_print()) + '}'
-        return res
+    def emit_spice(self, write):
+        write('.if (')
+        self.cond.emit_spice(write)
+        write(') {')
+        self.ifcase.emit_spice(write)
+        write('}')
 
     #def spectre_print(self):
     #    res =  '.if (' + str(self.cond.spectre_print()) + ') {'
     #    res += str(self.ifcase.spectre_print()) + '}'
     #    return res
 
+@trace_as('cond      ')
 def cond_wrapper(string, start, tocs):
-    debug_find_ele(string, start, tocs, 'cond      ')
     return Conditional(tocs)
 
  # ----------------------------------------------------------
  
-class Tupel:
+class Tupel(SpiceNode):
+    __slots__ = ('params',)
+
     def __init__(self, parameters):
 
-        self.params = parameters
+        self.params = tuple(parameters)
 
-    def spice_print(self):
-        res = '['
-        for para in self.params:
-            res += str(para.spice_print()) + ' '
-        res = res[:-1] + ']'
-        return res
+    def emit_spice(self, write):
+        write('[')
+        emit_joined(self.params, ' ', write)
+        write(']')
 
     # def spectre_print(self):
     #     res = '['
@@ -751,8 +974,8 @@ class Tupel:
     #     res = res[:-1] + ']'
     #     return res
 
+@trace_as('tupel     ')
 def tupel_wrapper(string, start, tocs):
-    debug_find_ele(string, start, tocs, 'tupel     ')
     return Tupel(tocs)
 
 
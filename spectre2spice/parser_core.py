@@ -34,108 +34,195 @@
 #-------------------------------------------------------------------------------
 
 # importing modules neccesary to define parser
-from pyparsing                      import Word, nums, alphas, Optional, Combine, Forward, printables, Suppress
 from spectre2spice.model_reader     import *
 from spectre2spice.component_reader import *
 from spectre2spice.parser_logging   import *
 from spectre2spice.spectre_bnf      import *
 from spectre2spice.parser_classes   import *
-import spectre2spice.shared_variables as shv
+from spectre2spice.parameter_parser import parse_parameters
+from spectre2spice.translation_context import current_context
+import re
 
 # This is the main parsing function, it is called from the netlist manager for a given
 # netlist. It goes through this netlist card by card and preselects the card depending 
 # on the type. It chooses then the correct entry point of the BNF, e.g parameter searches for
 # eqations, while functions will be parsed with the function_definition BNF part.
 
-# Its argument is the netlist as a string (file_string)
-def parse_main(file_string):
+# Its argument are the preprocessed model cards, either as an iterable of cards (e.g. the
+# generator returned by preprocess_lines) or as a string with one card per line.
+# It is a generator itself: every parsed card is handed to the caller as soon as it is
+# parsed, so the caller can write it out and forget it before the next card is read.
+# The grammar is the one returned by get_grammar() (spectre_bnf.py), if none is given
+# the default grammar is used. The context (translation_context.py) is active while a
+# card is parsed, but not while the caller works with the result, so two translations
+# can be interleaved. If no context is given, the active one is used.
+# A card seen before is taken from the memo of the context, it is not parsed again
+# (see card_memo.py). The memo is not used while the debug trace is written.
+def parse_main(model_cards, grammar=None, context=None):
+
+    if(context is None):
+        context = current_context()
+
+    if(grammar is None):
+        grammar = get_grammar(tracing=context.tracing())
+
+    # in a string the cards are seperated by a newline -> split them
+    if(isinstance(model_cards, str)):
+        model_cards = model_cards.split('\n')
+
+    memo = context.memo
+    if(grammar.tracing):
+        memo = None
+
+    counts = context.card_counts
+    for model_card in model_cards:
+        [card_type, handler] = card_handler(model_card)
+        counts[card_type] = counts.get(card_type, 0) + 1
+        if(context.profile is not None):
+            context.profile.card(card_type)
 
+        parsed_cards = None
+        if(memo is not None):
+            parsed_cards = memo.lookup(model_card, grammar)
 
-    # cards are seperated by a nwline -> write them in a list
-    model_cards = file_string.split('\n')
+        if(parsed_cards is None):
+            with context.activate():
+                parsed_cards = handler(model_card, grammar, context)
+            if(memo is not None):
+                memo.store(model_card, parsed_cards)
+
+        yield from parsed_cards
+
+
+# The parser of a card is chosen by the first word of the card, e.g. parameters or model.
+# card_handlers maps this keyword to the type of the card and to its handler, a card
+# starting with any other word is an instance. A handler gets the card, the grammar and
+# the context and returns the list of parsed cards (can be empty).
+# A new card type is added with register_card, e.g. to skip the save cards:
+#   register_card(['save'], 'unsupported', parse_unsupported)
+
+# keyword -> [card type, handler]
+card_handlers = {}
+
+# the first word of a card
+keyword_pattern = re.compile(r'\w*')
+
+
+def register_card(keywords, card_type, handler):
+    for keyword in keywords:
+        card_handlers[keyword] = [card_type, handler]
+
+
+# returns [card type, handler] of the card
+def card_handler(model_card):
+    handler = card_handlers.get(keyword_pattern.match(model_card).group())
+    if(handler is not None):
+        return handler
+
+    # even thoght the preprocessor is pretty good at cleaning up the netlists, it can happen
+    # that empty cards slip through, they will be ignored
+    if(model_card == '' or model_card == ' *  * '):
+        return empty_handler
+    return instance_handler
+
+
+# returns the type of the card like parse_main sees it
+def card_type(model_card):
+    return card_handler(model_card)[0]
+
+
+# parses a single card, returns the list of parsed cards (can be empty)
+def parse_card(model_card, grammar, context):
+    return card_handler(model_card)[1](model_card, grammar, context)
+
+
+# parse parametrs -> top will be an equation
+# the hand written parser is much faster, if it can not handle the card the BNF is used
+def parse_parameters_card(model_card, grammar, context):
+    # the trace is written by the BNF only, see parameter_parser.py
+    parsed_list = None
+    if(not grammar.tracing):
+        parsed_list = parse_parameters(model_card)
+    if(parsed_list is None):
+        parsed_list = []
+        for result, start, stop in grammar.equation.scanString(model_card):
+            parsed_list.append(result[0])
+    return [parsed_list]
+
+
+# parse functions -> top will be a func_def
+def parse_function_card(model_card, grammar, context):
+    parsed_funcs = []
+    for result, start, stop in grammar.func_definition.scanString(model_card):
+        parsed_funcs.append([result[0]])
+    return parsed_funcs
+
+
+# parse lang specification -> not really used
+def parse_lang_card(model_card, grammar, context):
+    return [grammar.lang_def.parseString(model_card)]
 
-    # output list
-    parsed_cards = []
-    
-    # see how the model card starts and parse it
-    for model_card in model_cards:
-        
-        if(  model_card.startswith('parameters')):
-            # parse parametrs -> top will be an equation
-            parsed_list = []
-            for result, start, stop in equation.scanString(model_card):
-                parsed_list.append(result[0])
-            parsed_cards.append(parsed_list)
 
+def parse_include_card(model_card, grammar, context):
+    return [grammar.include_def.parseString(model_card)]
 
-        elif(model_card.startswith('real')):
-            # parse functions -> top will be a func_def
-            for result, start, stop in func_definition.scanString(model_card):
-                parsed_cards.append([result[0]])
 
+# parse subcircuit definition
+def parse_subckt_card(model_card, grammar, context):
+    return [grammar.subcircuit.parseString(model_card)]
 
-        elif(model_card.startswith('simulator')):
-            # parse lang specification -> not really used
-            parsed_lang = lang_def.parseString(model_card)
-            parsed_cards.append(parsed_lang)
 
+# parse subcircuit end
+def parse_ends_card(model_card, grammar, context):
+    return [grammar.ends.parseString(model_card)]
 
-        elif(model_card.startswith('include') or model_card.startswith('ahdl_include')):
-            # parse lang specification -> not really used
-            parsed_include = include_def.parseString(model_card)
-            parsed_cards.append(parsed_include)
 
+# parse a model definition card
+def parse_model_card(model_card, grammar, context):
+    return [grammar.model.parseString(model_card)]
 
-        elif(model_card.startswith('inline') or model_card.startswith('subckt')):
-            # parse subcircuit definition
-            parsed_subckt = subcircuit.parseString(model_card)
-            parsed_cards.append(parsed_subckt)
 
+# parse a conditional card
+def parse_conditional_card(model_card, grammar, context):
+    return [grammar.conditional.parseString(model_card)]
 
-        elif(model_card.startswith('ends')):
-            # parse subcircuit end
-            parsed_ends = ends.parseString(model_card)
-            parsed_cards.append(parsed_ends)
 
+# some cards are nor supported and the are only needed for e.g monte carlo simulations
+# so they can be safely ignored for now.
+def parse_unsupported(model_card, grammar, context):
+    console_text('Unsupported card: ' + str(model_card), 2, context.thr)
+    return []
 
-        elif(model_card.startswith('model')):
-            # parse a model definition card
-            parsed_model = model.parseString(model_card)
-            parsed_cards.append(parsed_model)
 
+# skip empty cards
+def parse_empty(model_card, grammar, context):
+    return []
 
-        elif(model_card.startswith('if')):
-            # parse a conditional card
-            parsed_cond= conditional.parseString(model_card)
-            parsed_cards.append(parsed_cond)
 
+# if we cannot extract a hint from the card, if starts with a user defined name
+# this is probably an instance of a circuit, subcrcuit or a circuit element
+# like a capacitor, resistor, .... Try to parse it, if this fails it is
+# an unsupported card -> stop the translation
+def parse_instance(model_card, grammar, context):
+    try:
+        parsed = grammar.instance.parseString(model_card)
 
-        # some cards are nor supported and the are only needed for e.g monte carlo simulations
-        # so they can be safely ignored for now.
-        elif(model_card.startswith('statistics') or model_card.startswith('process') or model_card.startswith('vary') or model_card.startswith('mismatch')):
-            console_text('Unsupported card: ' + str(model_card), 2, shv.thr)
+    # Unknown card
+    except:
+        raise UnknownCardException(model_card)
 
+    return [parsed]
 
-        # even thoght the preprocessor is pretty good at cleaning up the netlists, it can happen
-        # that empty cards slip through, they will be ignored at this place
-        elif(model_card == '' or model_card == ' *  * '):
-            # skip empty cards
-            continue
-        
-        # if we cannot extract a hint from the card, if starts with a user defined name
-        # this is probably an instance of a circuit, subcrcuit or a circuit element
-        # like a capacitor, resistor, .... Try to parse it, if this fails it is
-        # an unsupported card -> stop the translation      
-        else:
-            # could be an instance of a cirquit -> try to parse it
-            try:
-                parsed = instance.parseString(model_card)
-                parsed_cards.append(parsed)
 
-            # Unknown card
-            except:
-                raise UnknownCardException(model_card)
-            
-    # return a list of parsed cards.
-    return parsed_cards
+register_card(['parameters'],              'parameters',  parse_parameters_card)
+register_card(['real'],                    'real',        parse_function_card)
+register_card(['simulator'],               'simulator',   parse_lang_card)
+register_card(['include', 'ahdl_include'], 'include',     parse_include_card)
+register_card(['inline', 'subckt'],        'subckt',      parse_subckt_card)
+register_card(['ends'],                    'ends',        parse_ends_card)
+register_card(['model'],                   'model',       parse_model_card)
+register_card(['if'],                      'if',          parse_conditional_card)
+register_card(['statistics', 'process', 'vary', 'mismatch'], 'unsupported', parse_unsupported)
 
+empty_handler    = ['empty',    parse_empty]
+instance_handler = ['instance', parse_instance]
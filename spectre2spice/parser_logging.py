@@ -33,8 +33,7 @@
 #-- Description: A few functions used to generate pretty console output
 #-------------------------------------------------------------------------------
 
-from spectre2spice.parser_core        import *
-import spectre2spice.shared_variables as shv
+from spectre2spice.translation_context import current_context
 
 # Terminal color bytes
 class colors:
@@ -47,17 +46,13 @@ class colors:
 # standard functions to generate log
 def debug_output(printable):
 
-    # fetch the current global variables
-    log_file       = shv.log_file
-    suppress_debug = shv.suppress_log
-    debug          = shv.debug
+    # fetch the context of the running translation
+    context = current_context()
 
-    if(not suppress_debug):
-        lf = open(log_file, 'a')
-        lf.write(str(printable) + '\n')
-        lf.close()
+    if(not context.suppress_log):
+        context.write_log(str(printable) + '\n')
 
-    if(debug):
+    if(context.debug):
         print(str(printable))
 
     return 0
@@ -72,6 +67,31 @@ def debug_find_ele(string, start, tocs, ele_type):
     debug_output(output)
     return 0
 
+# The wrappers of parser_classes.py are marked with the name, that is written to the
+# debug output. The tracing itself is not part of the wrapper: the grammar is built
+# with parse_action(wrapper, tracing), which returns the plain wrapper if tracing is
+# disabled. A disabled trace therefore costs nothing, not even a function call.
+def trace_as(ele_type):
+    def mark(wrapper):
+        wrapper.ele_type = ele_type
+        return wrapper
+    return mark
+
+# returns the wrapper, or a function that writes the trace and calls the wrapper
+def parse_action(wrapper, tracing):
+    if(not tracing):
+        return wrapper
+
+    ele_type = wrapper.ele_type
+    def traced_wrapper(string, start, tocs):
+        debug_find_ele(string, start, tocs, ele_type)
+        return wrapper(string, start, tocs)
+    return traced_wrapper
+
+# tracing is needed, if the debug output goes to the terminal or to a log file
+def tracing_enabled():
+    return current_context().tracing()
+
 def string_len_format(string, length):
     if(len(string) < length):
         pat = ''
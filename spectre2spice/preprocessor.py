@@ -29,8 +29,8 @@
 #-- Author     : Thomas E. Benz  
 #-- Created    : 2018-11
 #-------------------------------------------------------------------------------
-#-- Description: Takes a specter netlist (as a string) and preprocesses this
-#                string to be easier parsed.
+#-- Description: Takes a specter netlist (as lines or as a string) and turns it
+#                into model cards, that are easier to parse.
 #-------------------------------------------------------------------------------
 
 # The preprocessor was tailered to work with a given set of netlist files.
@@ -39,63 +39,223 @@
 
 # The following parser works only, if exatly one model card is placed on one line
 # Comments should be removed.
-# This file is a bit messy, as it was created in an iterative fashion
 # It has to account for various formatting techniques (or the lack of) in the source files.
 
+# The netlist is processed line by line: every stage below is a generator, that
+# reads lines from the previous stage and hands them to the next one. So only a
+# few lines are kept in memory at any time and the first cards are available
+# before the whole file is read. Every stage replaces a group of the whole-string
+# regex passes this file used to run, the result is exactly the same.
+#
+# Many of those rules only apply to a line, that follows a newline (not the first
+# line) or to a line, that is followed by a newline (not the last line). Therefore
+# the stages keep track of the first line and look one line ahead to find the last.
+
 import re
 
-def preprocessor(circuit):
-    
+spaces_re   = re.compile(' +')
+star_end_re = re.compile(' *\\* *\\Z')
+
+
+# split the lines of a file into the plain text between the newlines. If the file
+# ends with a newline, the last line is empty.
+def split_lines(lines):
+    last_line = ''
+    for line in lines:
+        if(line.endswith('\n')):
+            yield line[:-1]
+            last_line = ''
+        else:
+            # only the last line of a file has no newline
+            last_line = line
+    yield last_line
+
+
+# stage 1: join lines ending with a \ and the following line with a space
+def join_backslash(lines):
+    pending = None
+    for line in lines:
+        if(pending is not None):
+            line    = pending[:-1] + ' ' + line
+            pending = None
+
+        if(line.endswith('\\')):
+            pending = line
+        else:
+            yield line
+
+    # the last line keeps its \
+    if(pending is not None):
+        yield pending
+
+
+# clean up one line of the stage 2
+def clean_line(line, first, last):
+
+    # remove leading space after a new line
+    if(not first and line.startswith(' ')):
+        line = line[1:]
+
+    # remove empty lines
+    if(line == '' and not first and not last):
+        return None
+
+    # remove multiple spaces
+    if('  ' in line):
+        line = spaces_re.sub(' ', line)
+
+    if(not last):
+        # remove single * at the end of a line
+        if(line.endswith('*') or line.endswith('* ')):
+            line = star_end_re.sub('', line, 1)
+
+        # remove // comments
+        comment = line.find('//')
+        if(comment >= 0):
+            line = line[:comment]
+
+    return line
+
+
+# stage 2: whitespaces, empty lines, trailing * and // comments
+def clean_lines(lines):
+    lines = iter(lines)
+    prev  = next(lines)
+    first = True
+
+    for line in lines:
+        cleaned = clean_line(prev, first, False)
+        if(cleaned is not None):
+            yield cleaned
+        first = False
+        prev  = line
+
+    yield clean_line(prev, first, True)
+
 
-    # start with the line breaks
-    circuit = re.sub('\\\\\n', ' ', circuit)        # remove \ newlines 
-    circuit = re.sub('\n ', '\n',   circuit)        # remove leading space after a new line
-    circuit = re.sub('\n+', '\n',   circuit)        # remove multiple newline
-    circuit = re.sub(' +', ' ',     circuit)        # remove multiple spaces
+# stage 3: remove *** comments, the rest of the line is joined with the next line
+def remove_star_comments(lines):
+    lines = iter(lines)
+    prev  = next(lines)
+    head  = ''
 
-    # removing all comments - pass 1
-    circuit = re.sub(' *\* *\n','\n',   circuit)    # remove single *
-    circuit = re.sub('\/\/.*\n','\n',   circuit)    # remove // comments
-    circuit = re.sub('\*\*\*+.*\n', '', circuit)    # remove *** comments
+    for line in lines:
+        comment = prev.find('***')
+        if(comment >= 0):
+            head += prev[:comment]
+        else:
+            yield head + prev
+            head = ''
+        prev = line
 
-    # cleaning up whitespaces and removing empty lines
-    circuit = re.sub(' +', ' ',   circuit)          # remove multiple spaces
-    circuit = re.sub('\n+', '\n', circuit)          # remove multiple newline
-    circuit = re.sub('\n ', '\n', circuit)          # remove empty_lines
+    yield head + prev
 
-    # removing all comments - pass 2
-    circuit = re.sub('\n\*(.*)?','\n\n', circuit)   # remove single *
 
-    # cleaning up whitspaces - pass 2
-    circuit = re.sub('\n +\+', '\n+', circuit)      # remove leading space after a new line
-    circuit = re.sub(' +', ' ',       circuit)      # remove multiple spaces
-    circuit = re.sub('\n ', '\n',     circuit)      # remove empty_lines
-    circuit = re.sub('\n+', '\n',     circuit)      # remove multiple newline
+# stage 4: whitespaces, empty lines and comment lines starting with *
+def remove_comment_lines(lines):
+    lines = iter(lines)
+    prev  = next(lines)
+    first = True
 
-    # removing the + line cont. and bringing one card to a single line
-    circuit = re.sub('\n *\+ ', ' ', circuit)       # remove line contination (+)
+    for line in lines:
+        cleaned = clean_comment_line(prev, first)
+        if(cleaned != '' or first):
+            yield cleaned
+        first = False
+        prev  = line
 
-    # clean up function declarations and format them
-    circuit = re.sub('\{\n', '{', circuit)
-    circuit = re.sub('\n\}', '}', circuit)
+    yield clean_comment_line(prev, first)
 
-    # remove the now emty lines once more
-    circuit = re.sub('\n\n', '\n', circuit)
-    circuit = re.sub('\n ', '\n',  circuit) 
 
-    # this is a small hack, seems like the previous steps missed a whitespace in front of a { 
-    circuit = re.sub('\n{', '{', circuit)
+# clean up one line of the stage 4, an empty line is dropped by the caller
+def clean_comment_line(line, first):
+
+    # remove multiple spaces
+    if('  ' in line):
+        line = spaces_re.sub(' ', line)
+
+    if(not first):
+        # remove leading space after a new line
+        if(line.startswith(' ')):
+            line = line[1:]
+
+        # remove lines starting with *
+        if(line.startswith('*')):
+            line = ''
+
+    return line
+
+
+# stage 5: bring one card to a single line. Lines starting with '+ ' are continued
+# lines, function bodies in {} are joined as well.
+def join_cards(lines):
+    lines = iter(lines)
+    card  = next(lines)
+
+    for line in lines:
+        if(line.startswith('+ ')):
+            # remove line contination (+)
+            card += ' ' + line[2:]
+
+        elif(card.endswith('{') or line.startswith('}') or line.startswith('{')):
+            # clean up function declarations and format them
+            card += line
+
+        else:
+            yield card
+            card = line
+
+    yield card
+
+
+# stage 6: replacements inside the cards
+def format_cards(cards):
+    cards = iter(cards)
+    prev  = format_card(next(cards))
+    head  = ''
+
+    for card in cards:
+        # remove ' *  * ' card - some code comment formatting schemes, result in a emty card - remove this
+        if(prev.endswith(' *  * ')):
+            head += prev[:-6]
+        else:
+            yield head + prev
+            head = ''
+        prev = format_card(card)
+
+    yield head + prev
+
+
+def format_card(card):
 
     # replace e0 with eps0 - as spice has a problem with e0 being a variable name
-    circuit = re.sub('e0', 'eps0', circuit)
+    if('e0' in card):
+        card = card.replace('e0', 'eps0')
 
     # this two replacements helps the parser to detect literals with an unit postfix
     # eg, there could be a disambiguity in the bnf: var = 17f nex_var = 18
     # the parser needs to check for a space between the statements (in the all the other cases, spaces can be ignored)
-    circuit = re.sub('\*', ' * ', circuit)
-    circuit = re.sub('\)', ' ) ', circuit)
+    if('*' in card):
+        card = card.replace('*', ' * ')
+    if(')' in card):
+        card = card.replace(')', ' ) ')
 
-    # remove ' *  * ' card - some code comment formatting schemes, result in a emty card - remove this
-    circuit = re.sub(' \*  \* \n', '', circuit)
- 
-    return circuit
\ No newline at end of file
+    return card
+
+
+# Takes the lines of a netlist (e.g an open file) and yields one model card after
+# the other.
+def preprocess_lines(lines):
+    lines = split_lines(lines)
+    lines = join_backslash(lines)
+    lines = clean_lines(lines)
+    lines = remove_star_comments(lines)
+    lines = remove_comment_lines(lines)
+    cards = join_cards(lines)
+    return format_cards(cards)
+
+
+# Takes the whole netlist as a string and returns the model cards, one per line.
+def preprocessor(circuit):
+    return '\n'.join(format_cards(join_cards(remove_comment_lines(remove_star_comments(
+        clean_lines(join_backslash(circuit.split('\n'))))))))
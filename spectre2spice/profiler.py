@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+##
+## Copyright (c) 2019 Thomas Benz.
+##
+## This file is part of librecell-layout
+## (see https://codeberg.org/thommythomaso/spectre2spice/master/)
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the CERN Open Hardware License (CERN OHL-S) as it will be published
+## by the CERN, either version 2.0 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## CERN Open Hardware License for more details.
+##
+## You should have received a copy of the CERN Open Hardware License
+## along with this program. If not, see <http://ohwr.org/licenses/>.
+##
+##
+##
+
+# coding=utf8
+#-------------------------------------------------------------------------------
+#-- Title      : Profiler
+#-- Project    : Spectre2Spice
+#-------------------------------------------------------------------------------
+#-- File       : profiler.py
+#-------------------------------------------------------------------------------
+#-- Description: Measures the time of the translation stages and of every card
+#                type for --profile
+#-------------------------------------------------------------------------------
+
+# The stages of a translation are generators, that are chained together: the output
+# loop asks spice_print for the next card, spice_print asks parse_main, parse_main
+# asks the preprocessor and the preprocessor reads the next line. The time of a stage
+# can therefore not be taken around a function call. Instead the profile keeps a stack
+# of the running stages: whenever a stage is entered or left, the time since the last
+# switch is charged to the stage on top of the stack. Each stage gets the time spent
+# in itself, without the stages it called (e.g. the tech table lookups of spice_print).
+#
+# The card type is set by parse_main for every card. The time of parse_main, of the
+# tech tables and of spice_print is charged to the type of the card in work as well.
+#
+# Every profile keeps the wall time and the cpu time, it belongs to a single netlist.
+# The profiles of the worker processes are sent back and merged.
+#
+# At the end of a netlist the statistics of the node table (see node_table.py) and of the
+# card memo (see card_memo.py) are added: how many objects of the expressions were shared,
+# how many texts were reused and how many cards were not parsed again.
+
+from spectre2spice.node_table import format_stats
+from spectre2spice             import card_memo
+from contextlib                import contextmanager
+import time
+
+
+# the stages in the order of the summary table
+stage_names = ['preprocessor', 'parse_main', 'tech tables', 'spice_print', 'workers', 'output']
+
+# the stages, that work on a single card
+card_stages = frozenset(['parse_main', 'tech tables', 'spice_print'])
+
+
+class Profile:
+    def __init__(self, name=''):
+
+        self.name       = name
+
+        # stage -> [wall, cpu]
+        self.stages     = {}
+
+        # card type -> [count, wall, cpu]
+        self.card_types = {}
+
+        # the statistics of the node table: [lookups, hits, saved bytes, reused texts, characters]
+        self.nodes      = [0, 0, 0, 0, 0]
+
+        # the statistics of the card memo: [lookups, hits, evictions]
+        self.memo       = [0, 0, 0]
+
+        # the card in work and the running stages
+        self.card_type  = None
+        self.stack      = []
+        self.wall       = 0.0
+        self.cpu        = 0.0
+
+    # charges the time since the last switch to the running stage
+    def switch(self):
+        wall = time.perf_counter()
+        cpu  = time.process_time()
+        if(self.stack):
+            stage  = self.stack[-1]
+            times  = self.stages.setdefault(stage, [0.0, 0.0])
+            times[0] += wall - self.wall
+            times[1] += cpu - self.cpu
+            if(self.card_type is not None and stage in card_stages):
+                card_times = self.card_types[self.card_type]
+                card_times[1] += wall - self.wall
+                card_times[2] += cpu - self.cpu
+        self.wall = wall
+        self.cpu  = cpu
+
+    def enter(self, stage):
+        self.switch()
+        self.stack.append(stage)
+
+    def leave(self):
+        self.switch()
+        self.stack.pop()
+
+    # times the block as the given stage
+    @contextmanager
+    def stage(self, stage):
+        self.enter(stage)
+        try:
+            yield
+        finally:
+            self.leave()
+
+    # passes the items through, the time to get an item is charged to the stage
+    def timed(self, items, stage):
+        items = iter(items)
+        while(True):
+            self.enter(stage)
+            try:
+                item = next(items)
+            except StopIteration:
+                return
+            finally:
+                self.leave()
+            yield item
+
+    # counts a card of the given type, it is the card in work until the next one
+    def card(self, card_type):
+        self.card_type = card_type
+        card_times     = self.card_types.get(card_type)
+        if(card_times is None):
+            card_times = [0, 0.0, 0.0]
+            self.card_types[card_type] = card_times
+        card_times[0] += 1
+
+    # adds the statistics of the node table and of the card memo of a context
+    def count_caches(self, context):
+        if(context.nodes is not None):
+            self.nodes = [own + new for [own, new] in zip(self.nodes, context.nodes.stats())]
+        if(context.memo is not None):
+            self.memo  = [own + new for [own, new] in zip(self.memo, context.memo_stats())]
+
+    # adds the times of an other profile, e.g. of a worker process
+    def merge(self, other):
+        for [stage, times] in other.stages.items():
+            own = self.stages.setdefault(stage, [0.0, 0.0])
+            own[0] += times[0]
+            own[1] += times[1]
+        for [card_type, card_times] in other.card_types.items():
+            own = self.card_types.setdefault(card_type, [0, 0.0, 0.0])
+            own[0] += card_times[0]
+            own[1] += card_times[1]
+            own[2] += card_times[2]
+        self.nodes = [own + new for [own, new] in zip(self.nodes, other.nodes)]
+        self.memo  = [own + new for [own, new] in zip(self.memo, other.memo)]
+
+    # only the collected times are sent between the processes
+    def __getstate__(self):
+        return {'name'       : self.name,
+                'stages'     : self.stages,
+                'card_types' : self.card_types,
+                'nodes'      : self.nodes,
+                'memo'       : self.memo}
+
+    def __setstate__(self, state):
+        self.__init__(state['name'])
+        self.stages     = state['stages']
+        self.card_types = state['card_types']
+        self.nodes      = state['nodes']
+        self.memo       = state['memo']
+
+
+def format_time(times):
+    return '%8.3f %8.3f' % (times[0], times[1])
+
+
+# Main function of this file. Returns the summary table of the given profiles: the wall
+# and cpu time of every stage per file and the time per card type of all files.
+def format_summary(profiles):
+    total = Profile('total')
+    for profile in profiles:
+        total.merge(profile)
+
+    stages = [stage for stage in stage_names if stage in total.stages]
+    stages += sorted(stage for stage in total.stages if stage not in stage_names)
+    width  = max([len(profile.name) for profile in profiles] + [10])
+
+    lines = ['Profile (wall s, cpu s):', '']
+    lines.append(' ' * width + ''.join(' %17s' % stage for stage in stages) + ' %17s' % 'total')
+    for profile in profiles + [total]:
+        line = profile.name.ljust(width)
+        sums = [0.0, 0.0]
+        for stage in stages:
+            times = profile.stages.get(stage, [0.0, 0.0])
+            sums[0] += times[0]
+            sums[1] += times[1]
+            line += ' ' + format_time(times)
+        lines.append(line + ' ' + format_time(sums))
+
+    lines += ['', 'card type            count   wall s    cpu s  wall us/card']
+    for [card_type, card_times] in sorted(total.card_types.items(), key=lambda item: -item[1][1]):
+        [count, wall, cpu] = card_times
+        lines.append('%-16s %9d %8.3f %8.3f %13.1f' % (card_type, count, wall, cpu, wall / count * 1e6))
+
+    if(total.nodes[0] or total.memo[0]):
+        lines.append('')
+    if(total.nodes[0]):
+        lines.append(format_stats(total.nodes))
+    if(total.memo[0]):
+        lines.append(card_memo.format_stats(total.memo))
+    return '\n'.join(lines)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+##
+## Copyright (c) 2019 Thomas Benz.
+##
+## This file is part of librecell-layout
+## (see https://codeberg.org/thommythomaso/spectre2spice/master/)
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the CERN Open Hardware License (CERN OHL-S) as it will be published
+## by the CERN, either version 2.0 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## CERN Open Hardware License for more details.
+##
+## You should have received a copy of the CERN Open Hardware License
+## along with this program. If not, see <http://ohwr.org/licenses/>.
+##
+##
+##
+
+# coding=utf8
+#-------------------------------------------------------------------------------
+#-- Title      : Server Client
+#-- Project    : Spectre2Spice
+#-------------------------------------------------------------------------------
+#-- File       : server_client.py
+#-------------------------------------------------------------------------------
+#-- Description: Sends translation jobs to a running translation server
+#-------------------------------------------------------------------------------
+
+# The client side of translation_server.py. It only needs the standard library, so
+# spectre2spice --server starts fast: the grammar and the tables are kept by the server.
+#
+# Every job is one connection. The client sends one request and the server answers with
+# console messages, while it translates, and a final reply. All messages are json
+# objects, one per line:
+#
+#   request:  {'kind' : 'netlists', 'args' : <arguments of spectre2spice>, 'cwd' : ...}
+#             {'kind' : 'text', 'text' : <netlist>, 'tech' : <tech folder>, ...}
+#   console:  {'console' : <text printed by the translation>}
+#   reply:    {'status' : 'done', 'output' : <spice netlist of a text job>}
+#             {'status' : 'error', 'error' : <traceback>}
+#
+# The server works in the folder of the client, so relative paths mean the same as
+# in a local run.
+
+import json
+import os
+import socket
+import sys
+
+
+def send_message(file, message):
+    file.write((json.dumps(message) + '\n').encode())
+    file.flush()
+
+
+# returns the next message, None if the connection is closed
+def read_message(file):
+    line = file.readline()
+    if(not line):
+        return None
+    return json.loads(line)
+
+
+# sends the request to the server, prints the console output of the job and returns the reply
+def send_request(socket_path, request):
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    connection.connect(socket_path)
+    file = connection.makefile('rwb')
+
+    request['cwd'] = os.getcwd()
+    send_message(file, request)
+
+    while(True):
+        reply = read_message(file)
+        if(reply is None):
+            reply = {'status' : 'error', 'error' : 'The server closed the connection\n'}
+        if('console' not in reply):
+            break
+        print(reply['console'], end='')
+
+    file.close()
+    connection.close()
+    return reply
+
+
+# Main function of this file. Runs a translation like netlist_manager(args), but on the
+# server. Returns the exit code for the command line.
+def translate_remote(socket_path, args):
+    reply = send_request(socket_path, {'kind' : 'netlists', 'args' : args})
+    if(reply['status'] == 'error'):
+        print(reply['error'], end='', file=sys.stderr)
+        return 1
+    return 0
+
+
+# translates the netlist given as a string on the server, see translate_text in
+# text_translator.py. The includes are read from include_path, if given.
+def translate_text_remote(socket_path, netlist_text, tech='', include_path='', name='', optimized=False, thr=2):
+    reply = send_request(socket_path, {'kind'         : 'text',
+                                       'text'         : netlist_text,
+                                       'tech'         : tech,
+                                       'include_path' : include_path,
+                                       'name'         : name,
+                                       'optimized'    : optimized,
+                                       'thr'          : thr})
+    if(reply['status'] == 'error'):
+        raise RuntimeError(reply['error'])
+    return reply['output']
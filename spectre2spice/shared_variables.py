@@ -1,41 +0,0 @@
-#!/usr/bin/env python3
-##
-## Copyright (c) 2019 Thomas Benz.
-## 
-## This file is part of librecell-layout 
-## (see https://codeberg.org/thommythomaso/spectre2spice/master/)
-## 
-## This program is free software: you can redistribute it and/or modify
-## it under the terms of the CERN Open Hardware License (CERN OHL-S) as it will be published
-## by the CERN, either version 2.0 of the License, or
-## (at your option) any later version.
-## 
-## This program is distributed in the hope that it will be useful,
-## but WITHOUT ANY WARRANTY; without even the implied warranty of
-## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
-## CERN Open Hardware License for more details.
-## 
-## You should have received a copy of the CERN Open Hardware License
-## along with this program. If not, see <http://ohwr.org/licenses/>.
-## 
-## 
-##
-
-# coding=utf8
-#-------------------------------------------------------------------------------
-#-- Title      : Shared variables 
-#-- Project    : Spectre2Spice 
-#-------------------------------------------------------------------------------
-#-- File       : shared_variables.py
-#-- Author     : Thomas E. Benz  
-#-- Created    : 2018-11
-#-------------------------------------------------------------------------------
-#-- Description: Contains all shared variables       
-#-------------------------------------------------------------------------------
-
-# ugly: but use some global files and variables :'(
-log_file        = ''
-tech_path       = ''
-debug           = 0
-thr             = -1
-suppress_log    = 1
\ No newline at end of file
@@ -33,9 +33,10 @@
 #-- Description: A description of the Spectre netlist BNF        
 #-------------------------------------------------------------------------------
 
-# importing modules neccesary to define parser
-from pyparsing                    import Word, nums, alphas, Optional, Combine, Forward, printables, Suppress
+# importing modules neccesary to define parser, pyparsing itself is imported by
+# build_grammar()
 from spectre2spice.parser_classes import *
+from spectre2spice.parser_logging import parse_action, tracing_enabled
 
 # This file contains the BNF, it can be seen as the frontend of the parser, while
 # the parser_classes.py is more of a backend. In the following definitions, every 
@@ -50,174 +51,263 @@ from spectre2spice.parser_classes import *
 # Every main object, has a setParseAction() defined. This directly calls the wrapper
 # function, that creates the abstract objects. 
 
+# The grammar is built by build_grammar(), use get_grammar() to get a grammar, it is
+# only built once. There are two versions of the grammar:
+#  * the default one, it uses the Or (^) operator for almost every alternative. Pyparsing
+#    tries every alternative and takes the longest match.
+#  * the optimized one, it replaces the Or by a MatchFirst (|) wherever the order of the
+#    alternatives already decides the longest match. Pyparsing then stops at the first
+#    match. Additionally the packrat cache of pyparsing is enabled, so a sub expression,
+#    that is parsed again after a failed alternative, is taken from the cache.
+# Both versions parse exactly the same cards into the same objects.
+#
+# The parse actions only write the debug trace, if the grammar is built with tracing
+# (see parse_action in parser_logging.py). By default get_grammar() builds it with
+# tracing, if the debug output is enabled.
+#
+# Importing pyparsing takes longer than building the grammar. It is only imported, when
+# the first grammar is built, so a run that does not parse anything (e.g. spectre2spice -h)
+# does not pay for it.
+
+# size of the packrat cache, used by the optimized grammar
+packrat_cache_size = 1024
+
+# all grammars built so far: (optimized, tracing) -> Grammar
+grammars = {}
+
+
+# The entry points of the grammar. These are used by the parser core to parse the cards.
+class Grammar:
+    def __init__(self, equation, func_definition, lang_def, include_def, subcircuit, ends, model, conditional, instance,
+                 tracing=False):
+
+        self.equation        = equation
+        self.func_definition = func_definition
+        self.lang_def        = lang_def
+        self.include_def     = include_def
+        self.subcircuit      = subcircuit
+        self.ends            = ends
+        self.model           = model
+        self.conditional     = conditional
+        self.instance        = instance
+        self.tracing         = tracing
+
+
+# returns the (optimized) grammar, it is built on the first call. If tracing is not
+# given, it depends on the debug settings of the running translation.
+def get_grammar(optimized=False, tracing=None):
+    if(tracing is None):
+        tracing = tracing_enabled()
+
+    key = (optimized, tracing)
+    if(key not in grammars):
+        if(optimized):
+            from pyparsing import ParserElement
+            ParserElement.enablePackrat(cache_size_limit=packrat_cache_size)
+        grammars[key] = build_grammar(optimized, tracing)
+    return grammars[key]
+
+
+# builds the whole BNF and returns its entry points
+def build_grammar(optimized=False, tracing=False):
+    from pyparsing import Word, nums, alphas, Optional, Combine, Forward, printables, Suppress
+
+    #--------------------------- forward defs ---------------------------------
+    function   =   Forward()
+    sub_func   =   Forward()
+    case       =   Forward()
+    expression =   Forward()
+    unary_op   =   Forward()
+    tupel      =   Forward()
+    #--------------------------- forward defs ---------------------------------
+
+
+    #--------------------------- literals -------------------------------------
+    integer   = Combine(Optional("+") + Optional("-") + Word(nums))
+    real      = Combine(integer + "." + integer)
+    flot_num  = Combine(integer + ".")
+    # a real starts with an integer, if it matches it is the longer one. postfix and scintific
+    # can not match both, but are always longer than the plain number.
+    if(optimized):
+        number    = real | integer
+        scintific = number + Word('eE', max=1) + integer
+        postfix   = number + Word('tgxkmunpf', max=1) + Suppress(Word(' ').leaveWhitespace() | Word('\'') | Word('+*-/', max=1))
+        literal   = postfix | scintific | real | flot_num | integer
+    else:
+        scintific = (real ^ integer) + Word('eE', max=1) + integer
+        postfix   = (real ^ integer) + Word('tgxkmunpf', max=1) + Suppress(Word(' ').leaveWhitespace() | Word('\'') | Word('+*-/', max=1))
+        literal   = postfix ^ scintific ^ flot_num ^ real ^ integer
+
+    literal.setParseAction(parse_action(num_wrapper, tracing))
+    #----------------------------literals--------------------------------------
 
-#--------------------------- forward defs ---------------------------------
-function   =   Forward()
-sub_func   =   Forward()
-case       =   Forward()
-expression =   Forward()
-unary_op   =   Forward()
-tupel      =   Forward()
-#--------------------------- forward defs ---------------------------------
 
+    #----------------------------variables-------------------------------------
+    variable  = Word(alphas + "_" + nums + '!', min=1)
+
+    variable.setParseAction(parse_action(var_wrapper, tracing))
+    #----------------------------variables-------------------------------------
 
-#--------------------------- literals -------------------------------------
-integer   = Combine(Optional("+") + Optional("-") + Word(nums))
-real      = Combine(integer + "." + integer)
-flot_num  = Combine(integer + ".")
-scintific = (real ^ integer) + Word('eE', max=1) + integer
-postfix   = (real ^ integer) + Word('tgxkmunpf', max=1) + Suppress(Word(' ').leaveWhitespace() | Word('\'') | Word('+*-/', max=1))
-literal   = postfix ^ scintific ^ flot_num ^ real ^ integer
 
-literal.setParseAction(num_wrapper)
-#----------------------------literals--------------------------------------
+    #----------------------------types-----------------------------------------
+    var_type  = 'real'
+    #----------------------------types-----------------------------------------
 
 
-#----------------------------variables-------------------------------------
-variable  = Word(alphas + "_" + nums + '!', min=1)
+    #----------------------------string----------------------------------------
+    string_type = '"' + Word(alphas + ' ' + '.,-_!?()').leaveWhitespace() + '"'
 
-variable.setParseAction(var_wrapper)
-#----------------------------variables-------------------------------------
+    string_type.setParseAction(parse_action(string_type_wrapper, tracing))
+    #----------------------------string----------------------------------------
 
 
-#----------------------------types-----------------------------------------
-var_type  = 'real'
-#----------------------------types-----------------------------------------
+    #----------------------------duoary_op-------------------------------------
+    duoary_op = Word("!&|+-*/<>", max=2) ^ Word("!=", min=2)  ^ Word("==", min=2) ^ Word(">=", min=2)  ^ Word("<=", min=2) ^ Word("**", min=2)
 
+    duoary_op.setParseAction(parse_action(op_wrapper, tracing))
+    #----------------------------duoary_op-------------------------------------
 
-#----------------------------string----------------------------------------
-string_type = '"' + Word(alphas + ' ' + '.,-_!?()').leaveWhitespace() + '"'
 
-string_type.setParseAction(string_type_wrapper)
-#----------------------------string----------------------------------------
+    #----------------------------expression------------------------------------
+    sub_expr   =   Suppress("(") + expression + Suppress(")")
+    sub_case   =   Suppress("(") + case + Suppress(")")
+    sub_func   =   Suppress("(") + function + Suppress(")")
+    # only the parts in () and the function are unambiguous, a variable can be longer
+    # than a literal (2n1) and vice versa (0.5u), so those two keep the Or.
+    # A unary_op is at least as long as a literal with a sign and wins a tie.
+    if(optimized):
+        expr_part  =   sub_case | sub_expr | sub_func | function | (literal ^ variable)
+        expr_ele   =   (unary_op | expr_part)
+    else:
+        expr_part  =   sub_case ^ sub_expr ^ sub_func ^ function ^ literal ^ variable
+        expr_ele   =   (unary_op ^ expr_part)
+    expression <<  expr_ele + (duoary_op + expr_part)*(0,None) # this operator is needed to overwrite a forward
 
+    sub_expr.setParseAction(parse_action(sub_expr_wrapper, tracing))
+    sub_case.setParseAction(parse_action(sub_case_wrapper, tracing))
+    sub_func.setParseAction(parse_action(sub_func_wrapper, tracing))
 
-#----------------------------duoary_op-------------------------------------
-duoary_op = Word("!&|+-*/<>", max=2) ^ Word("!=", min=2)  ^ Word("==", min=2) ^ Word(">=", min=2)  ^ Word("<=", min=2) ^ Word("**", min=2)
+    expression.setParseAction(parse_action(expr_wrapper, tracing))
+    #----------------------------expression------------------------------------
 
-duoary_op.setParseAction(op_wrapper)
-#----------------------------duoary_op-------------------------------------
 
+    #----------------------------unary_op--------------------------------------
+    unary_op   << Word('-') + expr_part
 
-#----------------------------expression------------------------------------
-sub_expr   =   Suppress("(") + expression + Suppress(")")
-sub_case   =   Suppress("(") + case + Suppress(")")
-sub_func   =   Suppress("(") + function + Suppress(")")
-expr_part  =   sub_case ^ sub_expr ^ sub_func ^ function ^ literal ^ variable
-expr_ele   =   (unary_op ^ expr_part)
-expression <<  expr_ele + (duoary_op + expr_part)*(0,None) # this operator is needed to overwrite a forward
+    unary_op.setParseAction(parse_action(unop_wrapper, tracing))
+    #----------------------------unary_op--------------------------------------
 
-sub_expr.setParseAction(sub_expr_wrapper)
-sub_case.setParseAction(sub_case_wrapper)
-sub_func.setParseAction(sub_func_wrapper)
 
-expression.setParseAction(expr_wrapper)
-#----------------------------expression------------------------------------
+    #----------------------------function--------------------------------------
+    function  <<   variable + Suppress("(") + expression + (Suppress(",") + expression)*(0,None) + Suppress(")")
 
+    function.setParseAction(parse_action(func_wrapper, tracing))
+    #----------------------------function--------------------------------------
 
-#----------------------------unary_op--------------------------------------
-unary_op   << Word('-') + expr_part
 
-unary_op.setParseAction(unop_wrapper)
-#----------------------------unary_op--------------------------------------
+    #----------------------------- case ---------------------------------------
+    # an expression is never shorter than a sub_expr and wins a tie
+    if(optimized):
+        case_part =    expression | sub_expr
+    else:
+        case_part =    expression ^ sub_expr
+    case      <<   case_part + Suppress("?") + case_part + Suppress(":") + case_part
 
+    case.setParseAction(parse_action(case_wrapper, tracing))
+    #----------------------------- case ---------------------------------------
 
-#----------------------------function--------------------------------------
-function  <<   variable + Suppress("(") + expression + (Suppress(",") + expression)*(0,None) + Suppress(")")
 
-function.setParseAction(func_wrapper)
-#----------------------------function--------------------------------------
+    #----------------------------equation--------------------------------------
+    # a case starts with an expression and is longer, tupel and string start with [ and "
+    if(optimized):
+        equation  = Suppress(Optional('parameters')) + (expression) + Suppress('=') + (case | expression | tupel | string_type)
+    else:
+        equation  = Suppress(Optional('parameters')) + (expression) + Suppress('=') + (case ^ expression ^ tupel ^ string_type)
 
+    equation.setParseAction(parse_action(eq_wrapper, tracing))
+    #----------------------------equation--------------------------------------
 
-#----------------------------- case ---------------------------------------
-case_part =    expression ^ sub_expr
-case      <<   case_part + Suppress("?") + case_part + Suppress(":") + case_part
 
-case.setParseAction(case_wrapper)
-#----------------------------- case ---------------------------------------
+    #----------------------------equation-def----------------------------------
+    func_name       = Suppress(var_type) + variable + Suppress('(')
+    func_para       = (Suppress(var_type) + expression + Suppress(Optional(',')))*(1,None) + Suppress(')') 
+    if(optimized):
+        func_body       = Suppress('{' + 'return') + (case | expression) + Suppress(Optional(';') + '}')
+    else:
+        func_body       = Suppress('{' + 'return') + (case ^ expression) + Suppress(Optional(';') + '}')
+    func_definition = func_name + func_para + func_body
 
+    func_definition.setParseAction(parse_action(func_def_wrapper, tracing))
+    #----------------------------equation-def----------------------------------
 
-#----------------------------equation--------------------------------------
-equation  = Suppress(Optional('parameters')) + (expression) + Suppress('=') + (case ^ expression ^ tupel ^ string_type)
 
-equation.setParseAction(eq_wrapper)
-#----------------------------equation--------------------------------------
+    #-------------------------------lang-def-----------------------------------
+    lang_def       = Suppress('simulator' + Word(alphas) + '=') + Word(alphas)
 
+    lang_def.setParseAction(parse_action(lang_wrapper, tracing))
+    #-------------------------------lang-def-----------------------------------
 
-#----------------------------equation-def----------------------------------
-func_name       = Suppress(var_type) + variable + Suppress('(')
-func_para       = (Suppress(var_type) + expression + Suppress(Optional(',')))*(1,None) + Suppress(')') 
-func_body       = Suppress('{' + 'return') + (case ^ expression) + Suppress(Optional(';') + '}')
-func_definition = func_name + func_para + func_body
 
-func_definition.setParseAction(func_def_wrapper)
-#----------------------------equation-def----------------------------------
+    #-------------------------------include_def--------------------------------
+    path_def       = Optional(Word('..') ^ Word('.')) + Optional('/') + (Word(alphas + "_" + nums, min=1) + Word('/')) * (0, None)
+    path_def       = Combine(path_def)
+    include_def    = (Word('include ') ^ Word('ahdl_include')) + Suppress('\"') + path_def + Word(alphas + "_" + nums, min=1) + Suppress('.') + Word(alphas) + Suppress('\"')
 
+    include_def.setParseAction(parse_action(include_wrapper, tracing))
+    #-------------------------------include_def-------------------------------
 
-#-------------------------------lang-def-----------------------------------
-lang_def       = Suppress('simulator' + Word(alphas) + '=') + Word(alphas)
 
-lang_def.setParseAction(lang_wrapper)
-#-------------------------------lang-def-----------------------------------
+    #-------------------------------subcircuit--------------------------------
+    subcircuit    = Optional('inline') + Suppress('subckt') + variable + Optional(Suppress('(')) + (variable)*(1,None) + Optional(Suppress(')'))
 
+    subcircuit.setParseAction(parse_action(subcirquit_wrapper, tracing))
+    #-------------------------------subcircuit--------------------------------
 
-#-------------------------------include_def--------------------------------
-path_def       = Optional(Word('..') ^ Word('.')) + Optional('/') + (Word(alphas + "_" + nums, min=1) + Word('/')) * (0, None)
-path_def       = Combine(path_def)
-include_def    = (Word('include ') ^ Word('ahdl_include')) + Suppress('\"') + path_def + Word(alphas + "_" + nums, min=1) + Suppress('.') + Word(alphas) + Suppress('\"')
 
-include_def.setParseAction(include_wrapper)
-#-------------------------------include_def-------------------------------
+    #-------------------------------instance--------------------------------
+    instance     = variable + Suppress(Optional('(')) + (equation | variable)*(1,None) + Suppress(Optional(')')) + (equation | variable)*(0,None)
 
+    instance.setParseAction(parse_action(instance_wrapper, tracing))
+    #-------------------------------instance--------------------------------
 
-#-------------------------------subcircuit--------------------------------
-subcircuit    = Optional('inline') + Suppress('subckt') + variable + Optional(Suppress('(')) + (variable)*(1,None) + Optional(Suppress(')'))
 
-subcircuit.setParseAction(subcirquit_wrapper)
-#-------------------------------subcircuit--------------------------------
+    #-------------------------------end subcirquit---------------------------
+    ends         = Suppress('ends') + variable
 
+    ends.setParseAction(parse_action(ends_wrapper, tracing))
+    #-------------------------------end subcirquit---------------------------
 
-#-------------------------------instance--------------------------------
-instance     = variable + Suppress(Optional('(')) + (equation | variable)*(1,None) + Suppress(Optional(')')) + (equation | variable)*(0,None)
 
-instance.setParseAction(instance_wrapper)
-#-------------------------------instance--------------------------------
+    #-------------------------------model------------------------------------
+    model        = Suppress('model') + variable + variable + equation*(1,None)
 
+    model.setParseAction(parse_action(model_wrapper, tracing))
+    #-------------------------------model------------------------------------
 
-#-------------------------------end subcirquit---------------------------
-ends         = Suppress('ends') + variable
 
-ends.setParseAction(ends_wrapper)
-#-------------------------------end subcirquit---------------------------
+    #-------------------------------assertion------------------------------------
+    assertion   = variable + Suppress("assert") + equation*(1,None)
 
+    assertion.setParseAction(parse_action(assertion_wrapper, tracing))
+    #-------------------------------assertion------------------------------------
 
-#-------------------------------model------------------------------------
-model        = Suppress('model') + variable + variable + equation*(1,None)
 
-model.setParseAction(model_wrapper)
-#-------------------------------model------------------------------------
+    #-------------------------------cond-------------------------------------
+    conditional = Suppress('if') + Suppress('(') + expression + Suppress(')') + Suppress('{') + (assertion ^ instance)*(1,None) + Suppress('}')
 
+    conditional.setParseAction(parse_action(cond_wrapper, tracing))
+    #-------------------------------cond-------------------------------------
 
-#-------------------------------assertion------------------------------------
-assertion   = variable + Suppress("assert") + equation*(1,None)
 
-assertion.setParseAction(assertion_wrapper)
-#-------------------------------assertion------------------------------------
+    #-------------------------------tupel------------------------------------
+    tupel       << Suppress('[') + variable*(2, None) + Suppress(']')
 
+    tupel.setParseAction(parse_action(tupel_wrapper, tracing))
+    #-------------------------------tupel------------------------------------
 
-#-------------------------------cond-------------------------------------
-conditional = Suppress('if') + Suppress('(') + expression + Suppress(')') + Suppress('{') + (assertion ^ instance)*(1,None) + Suppress('}')
-
-conditional.setParseAction(cond_wrapper)
-#-------------------------------cond-------------------------------------
-
-
-#-------------------------------tupel------------------------------------
-tupel       << Suppress('[') + variable*(2, None) + Suppress(']')
-
-tupel.setParseAction(tupel_wrapper)
-#-------------------------------tupel------------------------------------
 
+    return Grammar(equation, func_definition, lang_def, include_def, subcircuit, ends, model, conditional, instance,
+                   tracing)
 
 
 # this is the end of this file, if you wish to add support for other cards, they can be placed
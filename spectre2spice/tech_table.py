@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+##
+## Copyright (c) 2019 Thomas Benz.
+##
+## This file is part of librecell-layout
+## (see https://codeberg.org/thommythomaso/spectre2spice/master/)
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the CERN Open Hardware License (CERN OHL-S) as it will be published
+## by the CERN, either version 2.0 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## CERN Open Hardware License for more details.
+##
+## You should have received a copy of the CERN Open Hardware License
+## along with this program. If not, see <http://ohwr.org/licenses/>.
+##
+##
+##
+
+#-------------------------------------------------------------------------------
+#-- Title      : Tech Table Cache
+#-- Project    : Spectre2Spice
+#-------------------------------------------------------------------------------
+#-- File       : tech_table.py
+#-------------------------------------------------------------------------------
+#-- Description: Loads the component and model tables once and keeps them in
+#                memory for all following lookups
+#-------------------------------------------------------------------------------
+
+# The component and model tables are needed for every instance and model card.
+# Reading and parsing the toml file for every card is way too slow for big
+# netlists, therefore every table is parsed once per path and then kept in
+# the cache below. The result of the parsing is a dict with the component type
+# (or the model name) as key, so a lookup is a simple dict access. Every entry
+# additionally gets an 'argument_map', the prebuilt lookup of its translated and
+# removed lists (see argument_translator.py).
+#
+# The modification time and the size of the file are stored next to the parsed
+# table. If one of them changes, the table is read again.
+
+import os
+from spectre2spice.argument_translator import ArgumentMap
+
+
+# all tables read so far: path -> [stat signature, parsed table]
+table_cache = {}
+
+
+# returns a value, that changes as soon as the file is modified
+def table_signature(table_path):
+    stat = os.stat(table_path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+# returns the signatures of all tables of a tech folder, a missing table is None
+def tech_signature(tech_path, names=['component_table', 'model_table']):
+    signature = []
+    for name in names:
+        table_path = tech_path + name + '.toml'
+        signature.append(table_signature(table_path) if os.path.isfile(table_path) else None)
+    return tuple(signature)
+
+
+# Main function of this file. It returns the parsed table for the given path,
+# the file is only read if it is not in the cache or if it changed on disk.
+def read_table(table_path):
+
+    signature = table_signature(table_path)
+
+    # see if the table is already known and still up to date
+    cached = table_cache.get(table_path)
+    if(cached is not None and cached[0] == signature):
+        return cached[1]
+
+    # read the table and parse it, toml is only imported if a table is needed
+    from toml import loads as tl
+    table_file = open(table_path, 'r')
+    table      = tl(table_file.read())
+    table_file.close()
+
+    table = prepare_table(table)
+
+    table_cache[table_path] = [signature, table]
+    return table
+
+
+# returns a copy of a parsed table, in which every component or model has the prebuilt
+# argument lookup. The given table is not changed: every entry is copied, an argument map
+# is only kept, if it was built from the translated and removed lists of the entry.
+def prepare_table(table):
+    prepared = {}
+    for [name, entry] in table.items():
+        if(isinstance(entry, dict)):
+            entry        = dict(entry)
+            translated   = entry.get('translated', [])
+            removed      = entry.get('removed', [])
+            argument_map = entry.get('argument_map')
+            if(argument_map is None or not argument_map.built_from(translated, removed)):
+                entry['argument_map'] = ArgumentMap(translated, removed)
+        prepared[name] = entry
+    return prepared
+
+
+# drops all cached tables, the next lookup reads them from disk again
+def clear_table_cache():
+    table_cache.clear()
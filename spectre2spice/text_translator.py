@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+##
+## Copyright (c) 2019 Thomas Benz.
+##
+## This file is part of librecell-layout
+## (see https://codeberg.org/thommythomaso/spectre2spice/master/)
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the CERN Open Hardware License (CERN OHL-S) as it will be published
+## by the CERN, either version 2.0 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## CERN Open Hardware License for more details.
+##
+## You should have received a copy of the CERN Open Hardware License
+## along with this program. If not, see <http://ohwr.org/licenses/>.
+##
+##
+##
+
+# coding=utf8
+#-------------------------------------------------------------------------------
+#-- Title      : Text Translator
+#-- Project    : Spectre2Spice
+#-------------------------------------------------------------------------------
+#-- File       : text_translator.py
+#-------------------------------------------------------------------------------
+#-- Description: Translates netlists given as strings or streams, without any
+#                files or folders
+#-------------------------------------------------------------------------------
+
+# The netlist manager works on folders: it resolves the includes on disk and writes
+# a .sp file for every netlist. A program, that uses the converter as a library,
+# usually has the netlist in memory already. The functions below translate a string
+# or a stream and return the spice netlist the same way:
+#
+#   from spectre2spice.text_translator import translate_text, load_tech
+#   tech = load_tech('tech_example/')
+#   spice_text = translate_text(spectre_text, tech)
+#
+# The tech tables are either given as the path of the tech folder or as a dict
+# table name -> parsed table (see load_tech), which is loaded once and shared by
+# all translations. The grammar is built once per process as well.
+#
+# Without an include resolver an include card is translated to a .include card, just
+# like the netlist manager does. An include resolver is a function, that gets the
+# included path and returns the text of the netlist or
+# a stream, or None to keep the .include card. The included netlist is then translated
+# and inserted instead of the .include card. Every netlist is inserted once, later
+# includes of it are dropped. A circular include is dropped with an error message.
+# The paths are relative to the folder of the top netlist, the name of the top netlist
+# (if given) is the path the resolver would know it by.
+
+from spectre2spice.preprocessor        import preprocess_lines
+from spectre2spice.parser_core         import parse_main
+from spectre2spice.parser_classes      import IncludeDef
+from spectre2spice.parser_logging      import console_text
+from spectre2spice.spectre_bnf         import get_grammar
+from spectre2spice.tech_table          import read_table, prepare_table
+from spectre2spice.translation_context import TranslationContext
+import io
+import posixpath
+
+
+# the tables of the tech folder
+tech_tables = ['component_table', 'model_table']
+
+
+# reads the tables of the tech folder, the result can be given as tech to all translations
+def load_tech(tech_path):
+    return {name : read_table(tech_path + name + '.toml') for name in tech_tables}
+
+
+# returns the context of a translation, tech is the path of the tech folder or a dict
+# with the parsed tables
+def create_context(tech, debug, thr):
+    if(isinstance(tech, dict)):
+        tables = {name : prepare_table(table) for [name, table] in tech.items()}
+        return TranslationContext(debug=debug, thr=thr, tables=tables)
+    return TranslationContext(tech_path=tech, debug=debug, thr=thr)
+
+
+# Main function of this file. Translates the netlist read from input_stream and writes the
+# spice cards to output_stream. Returns the number of spice cards written. An unknown card
+# raises an UnknownCardException. thr is the level of the console output, the default only
+# prints errors.
+def translate_stream(input_stream, output_stream, tech='', include_resolver=None, name='',
+                     optimized=False, debug=0, thr=2):
+
+    context = create_context(tech, debug, thr)
+    grammar = get_grammar(optimized, context.tracing())
+    name    = posixpath.normpath(name) if name else ''
+    seen    = {name : False}
+    return write_cards(input_stream, output_stream, grammar, context, include_resolver, name, seen)
+
+
+# translates the netlist given as a string, returns the spice netlist as a string
+def translate_text(netlist_text, tech='', include_resolver=None, name='', optimized=False, debug=0, thr=2):
+    output = io.StringIO()
+    translate_stream(io.StringIO(netlist_text), output, tech, include_resolver, name, optimized, debug, thr)
+    return output.getvalue()
+
+
+# writes the cards of one netlist, the includes are inserted if the resolver knows them.
+# name is the path of the netlist, seen contains the paths of all netlists inserted so far,
+# the ones still being inserted are marked with False.
+def write_cards(input_stream, output_stream, grammar, context, include_resolver, name, seen):
+
+    num_cards = 0
+    for card in parse_main(preprocess_lines(input_stream), grammar, context):
+        for sub_card in card:
+            if(include_resolver is not None and isinstance(sub_card, IncludeDef)):
+                included = include_path(name, sub_card)
+                if(included is not None):
+                    num_cards += write_include(output_stream, grammar, context, include_resolver,
+                                               included, sub_card, seen)
+                    continue
+
+            with context.activate():
+                output_stream.write(sub_card.spice_print() + '\n')
+            num_cards += 1
+
+    return num_cards
+
+
+# returns the path of an included netlist relative to the top netlist, None for an
+# analog include
+def include_path(name, include):
+    if(include.type.strip() != 'include'):
+        return None
+    [path, filename, ext] = include.get_include()
+    return posixpath.normpath(posixpath.join(posixpath.dirname(name), path + filename + '.' + ext))
+
+
+# writes the translated include, or the .include card if the resolver does not know it
+def write_include(output_stream, grammar, context, include_resolver, included, include, seen):
+
+    # every netlist is inserted once
+    if(included in seen):
+        if(not seen[included]):
+            console_text('Circular include: ' + included, 3, context.thr)
+        return 0
+
+    netlist = include_resolver(included)
+    if(netlist is None):
+        with context.activate():
+            output_stream.write(include.spice_print() + '\n')
+        return 1
+
+    seen[included] = False
+    if(isinstance(netlist, str)):
+        netlist = io.StringIO(netlist)
+    num_cards = write_cards(netlist, output_stream, grammar, context, include_resolver, included, seen)
+    seen[included] = True
+    return num_cards
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+##
+## Copyright (c) 2019 Thomas Benz.
+##
+## This file is part of librecell-layout
+## (see https://codeberg.org/thommythomaso/spectre2spice/master/)
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the CERN Open Hardware License (CERN OHL-S) as it will be published
+## by the CERN, either version 2.0 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## CERN Open Hardware License for more details.
+##
+## You should have received a copy of the CERN Open Hardware License
+## along with this program. If not, see <http://ohwr.org/licenses/>.
+##
+##
+##
+
+# coding=utf8
+#-------------------------------------------------------------------------------
+#-- Title      : Translation Cache
+#-- Project    : Spectre2Spice
+#-------------------------------------------------------------------------------
+#-- File       : translation_cache.py
+#-------------------------------------------------------------------------------
+#-- Description: Keeps the translated netlists on disk, so unchanged files are
+#                not translated again in the next run
+#-------------------------------------------------------------------------------
+
+# The translation of a netlist only depends on the content of the file, the component
+# and model tables and the converter itself. A hash over all of them is the key of a
+# cache entry. An entry is the translated .sp file together with a small json file,
+# that stores the number of cards and the console output of the translation, so a
+# cached file prints the same as a translated one.
+#
+# The converter is identified by its version and a hash of its own source files, so
+# any change of the code invalidates the whole cache.
+#
+# The stored console output depends on the console threshold (--silent), it is part of
+# the key as well. With --debug the cache is not used, the debug trace is not stored.
+#
+# The entries are written to a temporary file first and then renamed, so two processes
+# can share a cache folder.
+
+import hashlib
+import json
+import os
+import shutil
+
+
+# the version of the converter, part of every key
+converter_version = '0.0.1'
+
+# the tables of the tech folder, that change the translation
+tech_tables = ['component_table.toml', 'model_table.toml']
+
+# hash of the source files, computed once
+source_digest = None
+
+
+# returns a hash over the version and all source files of the converter
+def converter_digest():
+    global source_digest
+
+    if(source_digest is None):
+        digest      = hashlib.sha256(converter_version.encode())
+        package_dir = os.path.dirname(os.path.abspath(__file__))
+        for filename in sorted(os.listdir(package_dir)):
+            if(filename.endswith('.py')):
+                digest.update(filename.encode())
+                digest.update(read_bytes(os.path.join(package_dir, filename)))
+        source_digest = digest.hexdigest()
+
+    return source_digest
+
+
+# returns the part of the key, that is the same for all files of a run
+def cache_salt(tech_path, thr):
+    digest = hashlib.sha256(converter_digest().encode())
+    digest.update(('thr=' + str(thr)).encode())
+    for table in tech_tables:
+        table_path = tech_path + table
+        digest.update(table.encode())
+        if(os.path.exists(table_path)):
+            digest.update(read_bytes(table_path))
+    return digest.hexdigest()
+
+
+# returns the key of the given netlist, it is read through the reader (netlist_reader.py)
+def cache_key(salt, netlist_path, reader):
+    digest = hashlib.sha256(salt.encode())
+    digest.update(reader.read(netlist_path))
+    return digest.hexdigest()
+
+
+def read_bytes(path):
+    file = open(path, 'rb')
+    data = file.read()
+    file.close()
+    return data
+
+
+# the path of an entry without the extension
+def entry_path(cache_path, key):
+    return os.path.join(cache_path, key[:2], key)
+
+
+# Returns the info stored with the entry or None if the key is not in the cache.
+# The cached netlist is copied to output_path.
+def load_entry(cache_path, key, output_path):
+    path = entry_path(cache_path, key)
+    try:
+        info_file = open(path + '.json', 'r')
+        info      = json.load(info_file)
+        info_file.close()
+        shutil.copyfile(path + '.sp', output_path)
+    except (OSError, ValueError):
+        return None
+    return info
+
+
+# stores the translated netlist at output_path and the info under the given key
+def store_entry(cache_path, key, output_path, info):
+    path = entry_path(cache_path, key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    # the netlist first, an entry is only valid once the info exists
+    tmp_path = path + '.' + str(os.getpid()) + '.tmp'
+    shutil.copyfile(output_path, tmp_path)
+    os.replace(tmp_path, path + '.sp')
+
+    info_file = open(tmp_path, 'w')
+    json.dump(info, info_file)
+    info_file.close()
+    os.replace(tmp_path, path + '.json')
+
+
+# removes all entries of the cache
+def clear_cache(cache_path):
+    if(os.path.exists(cache_path)):
+        shutil.rmtree(cache_path)
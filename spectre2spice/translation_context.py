@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+##
+## Copyright (c) 2019 Thomas Benz.
+##
+## This file is part of librecell-layout
+## (see https://codeberg.org/thommythomaso/spectre2spice/master/)
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the CERN Open Hardware License (CERN OHL-S) as it will be published
+## by the CERN, either version 2.0 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## CERN Open Hardware License for more details.
+##
+## You should have received a copy of the CERN Open Hardware License
+## along with this program. If not, see <http://ohwr.org/licenses/>.
+##
+##
+##
+
+# coding=utf8
+#-------------------------------------------------------------------------------
+#-- Title      : Translation Context
+#-- Project    : Spectre2Spice
+#-------------------------------------------------------------------------------
+#-- File       : translation_context.py
+#-------------------------------------------------------------------------------
+#-- Description: Holds everything a single translation needs: the settings, the
+#                tech tables and the debug log
+#-------------------------------------------------------------------------------
+
+# A translation used to be configured by a few global variables. Two translations in
+# the same process (e.g. two threads of a program, that uses the converter as a
+# library) therefore saw the settings of each other. Now every translation has its own
+# TranslationContext, that is handed to the parser core.
+#
+# The parse actions of the grammar and the spice_print methods of the parser classes
+# are called by pyparsing or by the backend, they can not get the context as an
+# argument. They fetch it with current_context(). The parser core activates the
+# context while it parses or prints a card and resets it afterwards (see activate()).
+# The active context is stored in a context variable, so every thread sees its own.
+#
+# A context can be sent to a worker process: only the settings are pickled, the worker
+# reads the tables itself and opens its own log.
+#
+# With --profile the context carries the profile of the translation (see profiler.py),
+# a worker process gets an empty one and sends it back with its results.
+#
+# The node table shares the equal objects of the parsed expressions (see node_table.py),
+# it belongs to the context and lives as long as the translation of a netlist. So does
+# the memo of the parsed cards, a card seen before is not parsed again (see card_memo.py).
+
+from spectre2spice.tech_table import read_table
+from spectre2spice.log_writer import LogWriter, QueueLogWriter
+from spectre2spice.profiler   import Profile
+from spectre2spice.node_table import NodeTable
+from spectre2spice            import card_memo
+from contextlib               import contextmanager, nullcontext
+import contextvars
+
+
+# the context of the translation running right now in this thread
+active_context = contextvars.ContextVar('active_context', default=None)
+
+# the node table of the active context, read for every object of an expression
+active_nodes   = contextvars.ContextVar('active_nodes', default=None)
+
+
+class TranslationContext:
+    def __init__(self, tech_path='', debug=0, thr=-1, suppress_log=1, log_queue=None, tables=None,
+                 profile=None, share_nodes=False, memo_cards=True):
+
+        self.tech_path    = tech_path
+        self.debug        = debug
+        self.thr          = thr
+        self.suppress_log = suppress_log
+
+        # the queue to the main process, only set in the worker processes of --jobs
+        self.log_queue    = log_queue
+
+        # the log of the netlist, that is translated right now
+        self.log_writer   = None
+
+        # the tech tables used by this translation: name -> parsed table, tables that
+        # are not given are read from the tech folder on the first use
+        self.tables       = dict(tables) if tables else {}
+
+        # the profile of the translation, None if it is not profiled
+        self.profile      = profile
+
+        # the shared objects of the expressions, None if they are not shared
+        self.nodes        = NodeTable() if share_nodes else None
+
+        # the parsed cards of the last cards, None if the cards are always parsed. The
+        # statistics of a shared memo are counted from here on.
+        self.memo         = None
+        if(memo_cards):
+            self.memo       = card_memo.shared_memo
+            if(self.memo is None):
+                self.memo   = card_memo.CardMemo()
+            self.memo_start = self.memo.stats()
+
+        # the number of cards of every type parsed with this context: card type -> count
+        self.card_counts  = {}
+
+    # tracing is needed, if the debug output goes to the terminal or to a log file
+    def tracing(self):
+        return bool(self.debug) or not self.suppress_log
+
+    # returns the parsed table of the tech folder, it is read on the first use
+    def table(self, name):
+        table = self.tables.get(name)
+        if(table is None):
+            table = read_table(self.tech_path + name + '.toml')
+            self.tables[name] = table
+        return table
+
+    def component_table(self):
+        return self.table('component_table')
+
+    def model_table(self):
+        return self.table('model_table')
+
+    # starts the log of a netlist, the file is overwritten
+    def open_log(self, log_file):
+        self.close_log()
+        if(self.log_queue is not None):
+            self.log_writer = QueueLogWriter(log_file, self.log_queue)
+        else:
+            self.log_writer = LogWriter(log_file)
+
+    # ends the log of the current netlist
+    def close_log(self):
+        if(self.log_writer is not None):
+            self.log_writer.close()
+            self.log_writer = None
+
+    # appends text to the log of the current netlist
+    def write_log(self, text):
+        if(self.log_writer is not None):
+            self.log_writer.write(text)
+
+    # times the block as a stage of the profile, if the translation is profiled
+    def stage(self, stage):
+        if(self.profile is None):
+            return nullcontext()
+        return self.profile.stage(stage)
+
+    # the statistics of the card memo, since this context was created
+    def memo_stats(self):
+        return [now - start for [now, start] in zip(self.memo.stats(), self.memo_start)]
+
+    # makes this the context returned by current_context() until the block ends
+    @contextmanager
+    def activate(self):
+        token       = active_context.set(self)
+        nodes_token = active_nodes.set(self.nodes)
+        try:
+            yield self
+        finally:
+            active_nodes.reset(nodes_token)
+            active_context.reset(token)
+
+    # only the settings are sent to a worker process
+    def __getstate__(self):
+        return {'tech_path'    : self.tech_path,
+                'debug'        : self.debug,
+                'thr'          : self.thr,
+                'suppress_log' : self.suppress_log,
+                'profile'      : None if self.profile is None else Profile(self.profile.name),
+                'share_nodes'  : self.nodes is not None,
+                'memo_cards'   : self.memo is not None}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+
+# the context used outside of a translation, e.g. by a grammar used on its own
+default_context = TranslationContext()
+
+
+# Main function of this file. Returns the context of the running translation.
+def current_context():
+    context = active_context.get()
+    if(context is None):
+        return default_context
+    return context
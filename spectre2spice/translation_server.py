@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+##
+## Copyright (c) 2019 Thomas Benz.
+##
+## This file is part of librecell-layout
+## (see https://codeberg.org/thommythomaso/spectre2spice/master/)
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the CERN Open Hardware License (CERN OHL-S) as it will be published
+## by the CERN, either version 2.0 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## CERN Open Hardware License for more details.
+##
+## You should have received a copy of the CERN Open Hardware License
+## along with this program. If not, see <http://ohwr.org/licenses/>.
+##
+##
+##
+
+# coding=utf8
+#-------------------------------------------------------------------------------
+#-- Title      : Translation Server
+#-- Project    : Spectre2Spice
+#-------------------------------------------------------------------------------
+#-- File       : translation_server.py
+#-------------------------------------------------------------------------------
+#-- Description: A long running process, that translates the jobs sent through a
+#                local unix socket
+#-------------------------------------------------------------------------------
+
+# A run of spectre2spice imports pyparsing, builds the grammar and reads the tech tables,
+# for a small netlist this takes longer than the translation itself. The server does all
+# of this once and then waits for jobs on a unix socket (see server_client.py for the
+# messages):
+#
+#   spectre2spice_server /tmp/spectre2spice.sock --tech_path tech_example/
+#   spectre2spice example/ my_top.scs output/ tech_example/ --server /tmp/spectre2spice.sock
+#
+# The grammars are built on start up. The tech tables are kept by tech_table.py, every
+# job checks if a table changed on disk and reads it again if needed. A job either
+# translates the netlists like spectre2spice does (the arguments of the command line) or
+# a netlist sent as text (like translate_text).
+#
+# The server runs either the default or the optimized grammar, chosen on start up. The
+# optimized grammar enables the packrat cache of pyparsing for the whole process, which
+# changes the debug trace of the default grammar. A job asking for the other grammar is
+# therefore rejected.
+#
+# The parsed cards are kept between the jobs: the server sets the shared card memo (see
+# card_memo.py), that is used by the contexts of all jobs. It starts over, if a job uses
+# other tech tables or one of them changed on disk. The node table (--share_nodes)
+# still belongs to the context of a netlist.
+#
+# The jobs are translated one after another: the console output of a job is sent to its
+# client by redirecting stdout and the server changes to the folder of the client, both
+# are the same for the whole process. The worker processes of --jobs and --file_jobs are
+# forked from the server and start with the warm grammar as well.
+
+from spectre2spice.netlist_manager  import netlist_manager
+from spectre2spice.text_translator  import translate_text, load_tech
+from spectre2spice.spectre_bnf      import get_grammar
+from spectre2spice.tech_table       import tech_signature
+from spectre2spice                  import card_memo
+from spectre2spice.parser_logging   import console_text
+from spectre2spice.server_client    import send_message, read_message
+from contextlib                     import redirect_stdout
+import socketserver
+import socket
+import traceback
+import signal
+import sys
+import os
+
+
+# raised for a job, that the server can not run
+class RejectedJob(Exception):
+    pass
+
+
+# sends everything printed by a job to the client
+class SocketConsole:
+    def __init__(self, file):
+        self.file = file
+
+    def write(self, text):
+        if(text):
+            send_message(self.file, {'console' : text})
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+# handles a single job
+class TranslationHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        request = read_message(self.rfile)
+        if(request is None):
+            return
+
+        server_cwd = os.getcwd()
+        try:
+            os.chdir(request.get('cwd', server_cwd))
+            with redirect_stdout(SocketConsole(self.wfile)):
+                reply = run_job(request, self.server.optimized)
+            reply['status'] = 'done'
+        except RejectedJob as e:
+            reply = {'status' : 'error', 'error' : 'Error:  ' + str(e) + '\n'}
+        except Exception:
+            reply = {'status' : 'error', 'error' : traceback.format_exc()}
+        finally:
+            os.chdir(server_cwd)
+
+        try:
+            send_message(self.wfile, reply)
+        except OSError:
+            # the client is gone
+            pass
+
+
+# runs the job and returns the reply, optimized is the grammar of the server
+def run_job(request, optimized=False):
+    if(request['kind'] == 'netlists'):
+        check_grammar(bool(request['args'].get('fast_grammar')), optimized)
+        card_memo.shared_memo.use_tables(tech_signature(request['args']['tech_path'][0]))
+        netlist_manager(request['args'])
+        return {}
+
+    if(request['kind'] == 'text'):
+        check_grammar(bool(request.get('optimized')), optimized)
+        tech = request.get('tech', '')
+        card_memo.shared_memo.use_tables(tech_signature(tech) if tech else ())
+        include_resolver = None
+        if(request.get('include_path')):
+            include_resolver = folder_resolver(request['include_path'])
+        output = translate_text(request['text'], request.get('tech', ''), include_resolver,
+                                request.get('name', ''), bool(request.get('optimized')),
+                                thr=request.get('thr', 2))
+        return {'output' : output}
+
+    raise ValueError('Unknown job: ' + str(request['kind']))
+
+
+def check_grammar(job_optimized, optimized):
+    if(job_optimized != optimized):
+        if(optimized):
+            raise RejectedJob('The server runs the optimized grammar, add --fast_grammar to the job')
+        raise RejectedJob('The server runs the default grammar, start it with --fast_grammar or drop it from the job')
+
+
+# returns an include resolver, that reads the netlists from the given folder
+def folder_resolver(include_path):
+    def resolve(included):
+        path = os.path.join(include_path, included)
+        if(not os.path.isfile(path)):
+            return None
+        netlist = open(path, 'r')
+        text    = netlist.read()
+        netlist.close()
+        return text
+    return resolve
+
+
+# builds the grammars of the server and reads the tables, before the first job arrives
+def warm_up(tech_paths, optimized):
+    for tracing in [False, True]:
+        get_grammar(optimized, tracing)
+    for tech_path in tech_paths:
+        load_tech(tech_path)
+    card_memo.shared_memo = card_memo.CardMemo()
+
+
+# returns True, if a server is listening on the socket already
+def socket_in_use(socket_path):
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(socket_path)
+    except OSError:
+        return False
+    finally:
+        connection.close()
+    return True
+
+
+# Main function of this file. Serves the jobs sent to the socket until the process is stopped.
+def serve(socket_path, tech_paths=[], optimized=False):
+
+    if(os.path.exists(socket_path)):
+        if(socket_in_use(socket_path)):
+            console_text('A server is running at: ' + socket_path, 3, -1)
+            return 1
+        # left over by a server, that was killed
+        os.remove(socket_path)
+
+    warm_up(tech_paths, optimized)
+
+    # stop cleanly on SIGTERM, like on Ctrl-C
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    server = socketserver.UnixStreamServer(socket_path, TranslationHandler)
+    server.optimized = optimized
+    console_text('Spectre2Spice server listening at: ' + socket_path, 0, -1)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.remove(socket_path)
+    return 0
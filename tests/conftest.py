@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+##
+## Copyright (c) 2019 Thomas Benz.
+##
+## This file is part of librecell-layout
+## (see https://codeberg.org/thommythomaso/spectre2spice/master/)
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the CERN Open Hardware License (CERN OHL-S) as it will be published
+## by the CERN, either version 2.0 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## CERN Open Hardware License for more details.
+##
+## You should have received a copy of the CERN Open Hardware License
+## along with this program. If not, see <http://ohwr.org/licenses/>.
+##
+##
+##
+
+
+# coding=utf8
+#-------------------------------------------------------------------------------
+#-- Title      : Test Fixtures
+#-- Project    : Spectre2Spice
+#-------------------------------------------------------------------------------
+#-- File       : conftest.py
+#-------------------------------------------------------------------------------
+#-- Description: Runs the translator on the netlists of the tests and reads
+#                the expected output
+#-------------------------------------------------------------------------------
+
+# The expected output in expected/ was written by the converter before the optimizations
+# (baseline), for the example in example/ex1 and for the small netlists in netlists/.
+# Every folder holds the translated .sp files and the preprocessed cards (.txt) written
+# with --log_path.
+
+import os
+import sys
+import pytest
+
+tests_path    = os.path.dirname(os.path.abspath(__file__))
+root_path     = os.path.dirname(tests_path)
+
+# the repository, the package does not need to be installed
+sys.path.insert(0, root_path)
+from spectre2spice.netlist_manager import netlist_manager
+
+
+netlist_path  = os.path.join(tests_path, 'netlists') + '/'
+expected_path = os.path.join(tests_path, 'expected') + '/'
+example_path  = os.path.join(root_path, 'example', 'ex1') + '/'
+tech_path     = example_path + 'tech_example/'
+
+# the netlists of the tests: name -> [folder, top netlist]
+netlist_cases = {'ex1'      : [example_path, 'my_top.scs'],
+                 'params'   : [netlist_path + 'params/', 'params.scs'],
+                 'includes' : [netlist_path + 'includes/', 'top.scs'],
+                 'cycle'    : [netlist_path + 'cycle/', 'top.scs']}
+
+
+# the arguments of spectre2spice, like argparse returns them without any option
+def default_args(parent_path, top_file, output_path):
+    return {'parent_path' : [parent_path],
+            'top_file'    : [top_file],
+            'output_path' : [output_path],
+            'tech_path'   : [tech_path],
+            'log_path'    : None,
+            'debug'       : None,
+            'silent'      : 1,
+            'fast_grammar': None,
+            'share_nodes' : None,
+            'jobs'        : None,
+            'file_jobs'   : None,
+            'chunk_size'  : None,
+            'cache_path'  : None,
+            'clear_cache' : None,
+            'profile'     : None,
+            'server'      : None}
+
+
+# returns the files of a folder with the given extension: relative path -> content
+def read_files(folder, ext):
+    files = {}
+    for [path, dirs, names] in os.walk(folder):
+        for name in names:
+            if(name.endswith(ext)):
+                full_path = os.path.join(path, name)
+                content   = open(full_path, 'r')
+                files[os.path.relpath(full_path, folder)] = content.read()
+                content.close()
+    return files
+
+
+# returns the expected files of a case
+def expected_files(case, ext='.sp'):
+    return read_files(expected_path + case, ext)
+
+
+# Translates a case with the netlist manager and returns the output folder. The options
+# are given like argparse does, e.g. jobs=[2].
+@pytest.fixture
+def translate(tmp_path):
+    def run(case, **options):
+        [parent_path, top_file] = netlist_cases[case]
+        output_path = str(tmp_path / case) + '/'
+        args = default_args(parent_path, top_file, output_path)
+        args.update(options)
+        netlist_manager(args)
+        return output_path
+    return run
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+##
+## Copyright (c) 2019 Thomas Benz.
+##
+## This file is part of librecell-layout
+## (see https://codeberg.org/thommythomaso/spectre2spice/master/)
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the CERN Open Hardware License (CERN OHL-S) as it will be published
+## by the CERN, either version 2.0 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## CERN Open Hardware License for more details.
+##
+## You should have received a copy of the CERN Open Hardware License
+## along with this program. If not, see <http://ohwr.org/licenses/>.
+##
+##
+##
+
+
+
+# coding=utf8
+#-------------------------------------------------------------------------------
+#-- Title      : Card Dispatch Tests
+#-- Project    : Spectre2Spice
+#-------------------------------------------------------------------------------
+#-- File       : test_card_dispatch.py
+#-------------------------------------------------------------------------------
+#-- Description: Checks the table of card handlers of the parser core and the
+#                statistics of the card types
+#-------------------------------------------------------------------------------
+
+from conftest import expected_files, read_files
+from spectre2spice.parser_core         import card_type, card_handlers, register_card, parse_main, parse_unsupported
+from spectre2spice.translation_context import TranslationContext
+
+
+netlist_text = '\n'.join(['simulator lang=spectre',
+                          'parameters r_val=1k',
+                          'subckt res_div (a b)',
+                          'R0 a b resistor r=r_val',
+                          'ends res_div',
+                          '',
+                          'R1 a b resistor r=2k'])
+
+
+def test_card_types():
+    assert [card_type(card) for card in netlist_text.split('\n')] == \
+           ['simulator', 'parameters', 'subckt', 'instance', 'ends', 'empty', 'instance']
+    assert card_type('inline subckt n_fet (d g s x)') == 'subckt'
+    assert card_type('model nch mos1 type=n') == 'model'
+    assert card_type('include "math.scs"') == 'include'
+    assert card_type('ahdl_include "va/res.va"') == 'include'
+    assert card_type('real para(real a, real b) {return (a*b)/(a+b)}') == 'real'
+    assert card_type('if (a>1) { R0 a b resistor r=1k }') == 'if'
+    assert card_type('statistics {') == 'unsupported'
+    # only the whole first word is a keyword
+    assert card_type('parameters_r a b resistor r=1k') == 'instance'
+
+
+# a keyword added with register_card is dispatched to its handler
+def test_register_card():
+    register_card(['save'], 'unsupported', parse_unsupported)
+    try:
+        assert card_type('save a b') == 'unsupported'
+        parsed = list(parse_main('save a b\nR1 a b resistor r=2k', context=TranslationContext()))
+        assert len(parsed) == 1
+    finally:
+        card_handlers.pop('save')
+    assert card_type('save a b') == 'instance'
+
+
+# every context counts the cards of its own translation
+def test_card_counts():
+    first  = TranslationContext()
+    second = TranslationContext()
+    list(parse_main(netlist_text, context=first))
+    list(parse_main(netlist_text, context=first))
+    list(parse_main('R1 a b resistor r=2k', context=second))
+    assert first.card_counts == {'simulator' : 2, 'parameters' : 2, 'subckt' : 2, 'instance' : 4,
+                                 'ends'      : 2, 'empty'      : 2}
+    assert second.card_counts == {'instance' : 1}
+
+
+# the example uses most of the card types
+def test_translation(translate):
+    output_path = translate('ex1')
+    assert read_files(output_path, '.sp') == expected_files('ex1')
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+##
+## Copyright (c) 2019 Thomas Benz.
+##
+## This file is part of librecell-layout
+## (see https://codeberg.org/thommythomaso/spectre2spice/master/)
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the CERN Open Hardware License (CERN OHL-S) as it will be published
+## by the CERN, either version 2.0 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## CERN Open Hardware License for more details.
+##
+## You should have received a copy of the CERN Open Hardware License
+## along with this program. If not, see <http://ohwr.org/licenses/>.
+##
+##
+##
+
+
+
+# coding=utf8
+#-------------------------------------------------------------------------------
+#-- Title      : Include Resolver Tests
+#-- Project    : Spectre2Spice
+#-------------------------------------------------------------------------------
+#-- File       : test_include_resolver.py
+#-------------------------------------------------------------------------------
+#-- Description: Checks the include hierarchy of shared and circular includes
+#                and their translation against the baseline output
+#-------------------------------------------------------------------------------
+
+from conftest import netlist_cases, expected_files, read_files
+from spectre2spice.include_resolver import get_filenames, unique_filenames, include_cycles
+
+
+# the common file included by both libraries is resolved once
+def test_shared_include():
+    [parent_path, top_file] = netlist_cases['includes']
+    hierarchy = get_filenames(parent_path, 'top', 'scs')
+    assert [[name[1] + '.' + name[2], name[3], name[4]] for name in hierarchy] == \
+           [['top.scs',    0, None],
+            ['lib_a.scs',  1, None],
+            ['common.scs', 2, None],
+            ['lib_b.scs',  1, None],
+            ['common.scs', 2, 'included above']]
+    assert [name[1] for name in unique_filenames(hierarchy)] == ['top', 'lib_a', 'common', 'lib_b']
+    assert include_cycles(hierarchy) == []
+
+
+def test_shared_include_translation(translate, tmp_path):
+    log_path    = str(tmp_path / 'log') + '/'
+    output_path = translate('includes', log_path=[log_path])
+    assert read_files(output_path, '.sp') == expected_files('includes')
+    assert read_files(log_path, '.txt') == expected_files('includes', '.txt')
+
+
+# a.scs and b.scs include each other
+def test_circular_include():
+    [parent_path, top_file] = netlist_cases['cycle']
+    hierarchy = get_filenames(parent_path, 'top', 'scs')
+    assert [[name[1] + '.' + name[2], name[3], name[4]] for name in hierarchy] == \
+           [['top.scs', 0, None],
+            ['a.scs',   1, None],
+            ['b.scs',   2, None],
+            ['a.scs',   3, 'circular include']]
+    assert include_cycles(hierarchy) == ['a.scs -> b.scs -> a.scs']
+
+
+# the translation of a circular include terminates, every file is written once
+def test_circular_include_translation(translate):
+    output_path = translate('cycle')
+    assert sorted(read_files(output_path, '.sp')) == ['a.sp', 'b.sp', 'top.sp']
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+##
+## Copyright (c) 2019 Thomas Benz.
+##
+## This file is part of librecell-layout
+## (see https://codeberg.org/thommythomaso/spectre2spice/master/)
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the CERN Open Hardware License (CERN OHL-S) as it will be published
+## by the CERN, either version 2.0 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## CERN Open Hardware License for more details.
+##
+## You should have received a copy of the CERN Open Hardware License
+## along with this program. If not, see <http://ohwr.org/licenses/>.
+##
+##
+##
+
+
+# coding=utf8
+#-------------------------------------------------------------------------------
+#-- Title      : Parallel Translation Tests
+#-- Project    : Spectre2Spice
+#-------------------------------------------------------------------------------
+#-- File       : test_jobs.py
+#-------------------------------------------------------------------------------
+#-- Description: Checks the translation with worker processes (--jobs)
+#                against the baseline output
+#-------------------------------------------------------------------------------
+
+from conftest import expected_files, read_files
+
+
+def test_jobs(translate):
+    output_path = translate('ex1', jobs=[2])
+    assert read_files(output_path, '.sp') == expected_files('ex1')
+
+
+# the logs of the workers are written by the main process
+def test_jobs_with_logs(translate, tmp_path):
+    log_path    = str(tmp_path / 'log') + '/'
+    output_path = translate('ex1', jobs=[3], log_path=[log_path])
+    assert read_files(output_path, '.sp') == expected_files('ex1')
+    assert read_files(log_path, '.txt') == expected_files('ex1', '.txt')
+
+
+# the console output of the workers is printed in the order of the hierarchy
+def test_console_output_in_order(translate, capsys):
+    translate('ex1', silent=None, jobs=[2])
+    sequential = capsys.readouterr().out
+    translate('ex1', silent=None)
+    assert capsys.readouterr().out == sequential
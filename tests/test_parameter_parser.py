@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+##
+## Copyright (c) 2019 Thomas Benz.
+##
+## This file is part of librecell-layout
+## (see https://codeberg.org/thommythomaso/spectre2spice/master/)
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the CERN Open Hardware License (CERN OHL-S) as it will be published
+## by the CERN, either version 2.0 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## CERN Open Hardware License for more details.
+##
+## You should have received a copy of the CERN Open Hardware License
+## along with this program. If not, see <http://ohwr.org/licenses/>.
+##
+##
+##
+
+
+# coding=utf8
+#-------------------------------------------------------------------------------
+#-- Title      : Parameters Parser Tests
+#-- Project    : Spectre2Spice
+#-------------------------------------------------------------------------------
+#-- File       : test_parameter_parser.py
+#-------------------------------------------------------------------------------
+#-- Description: Checks the hand written parameters parser against the BNF
+#-------------------------------------------------------------------------------
+
+import re
+from conftest                          import netlist_cases, expected_files, read_files
+from spectre2spice.preprocessor        import preprocessor
+from spectre2spice.parameter_parser    import parse_parameters
+from spectre2spice.spectre_bnf         import get_grammar
+from spectre2spice.translation_context import TranslationContext
+
+
+# the equations of the card as parsed by the BNF, rendered
+def bnf_equations(card):
+    grammar = get_grammar(False, False)
+    return [result[0].spice_print() for [result, start, end] in grammar.equation.scanString(card)]
+
+
+def parameters_cards():
+    [folder, top_file] = netlist_cases['params']
+    cards = preprocessor(read_files(folder, '.scs')[top_file]).split('\n')
+    return [card for card in cards if card.startswith('parameters')]
+
+
+def test_same_equations_as_bnf():
+    with TranslationContext().activate():
+        for card in parameters_cards():
+            equations = parse_parameters(card)
+            if(equations is not None):
+                assert [equation.spice_print() for equation in equations] == bnf_equations(card), card
+
+
+# the corners of the BNF are left to the BNF
+def test_strange_cards_are_declined():
+    with TranslationContext().activate():
+        for card in ['parameters a=1m+2', 'parameters a=1 m ', 'parameters a=1\tb=2']:
+            assert parse_parameters(card) is None, card
+
+
+def test_translation(translate):
+    output_path = translate('params')
+    assert read_files(output_path, '.sp') == expected_files('params')
+
+
+# with tracing the cards are parsed by the BNF, the log is the one of the baseline
+def test_trace(translate, tmp_path):
+    log_path = str(tmp_path / 'log') + '/'
+    translate('params', log_path=[log_path])
+    log = re.sub('0x[0-9a-f]*', '0x', read_files(log_path, '.log')['params.log'])
+    assert log == expected_files('params', '.log')['params.log']
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+##
+## Copyright (c) 2019 Thomas Benz.
+##
+## This file is part of librecell-layout
+## (see https://codeberg.org/thommythomaso/spectre2spice/master/)
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the CERN Open Hardware License (CERN OHL-S) as it will be published
+## by the CERN, either version 2.0 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## CERN Open Hardware License for more details.
+##
+## You should have received a copy of the CERN Open Hardware License
+## along with this program. If not, see <http://ohwr.org/licenses/>.
+##
+##
+##
+
+
+# coding=utf8
+#-------------------------------------------------------------------------------
+#-- Title      : Streaming Tests
+#-- Project    : Spectre2Spice
+#-------------------------------------------------------------------------------
+#-- File       : test_streaming.py
+#-------------------------------------------------------------------------------
+#-- Description: Checks the streaming pipeline from the netlist to the .sp
+#                files against the baseline output
+#-------------------------------------------------------------------------------
+
+import io
+from conftest                   import netlist_cases, expected_files, read_files
+from spectre2spice.preprocessor import preprocess_lines, preprocessor
+
+
+def test_example_translation(translate):
+    output_path = translate('ex1')
+    assert read_files(output_path, '.sp') == expected_files('ex1')
+
+
+def test_preprocessed_cards(translate, tmp_path):
+    log_path = str(tmp_path / 'log') + '/'
+    translate('ex1', log_path=[log_path])
+    assert read_files(log_path, '.txt') == expected_files('ex1', '.txt')
+
+
+# the generator pipeline gives the same cards as the preprocessor of the whole text
+def test_preprocess_lines_equals_preprocessor():
+    for [case, [folder, top_file]] in netlist_cases.items():
+        for [name, text] in read_files(folder, '.scs').items():
+            assert '\n'.join(preprocess_lines(io.StringIO(text))) == preprocessor(text), name
+
+
+# the first card is returned after a few lines, not after the whole netlist is read
+def test_preprocess_lines_is_lazy():
+    read = []
+    def lines():
+        for index in range(100):
+            read.append(index)
+            yield 'parameters p' + str(index) + '=1\n'
+
+    cards = preprocess_lines(lines())
+    assert next(cards) == 'parameters p0=1'
+    assert len(read) < 10
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+##
+## Copyright (c) 2019 Thomas Benz.
+##
+## This file is part of librecell-layout
+## (see https://codeberg.org/thommythomaso/spectre2spice/master/)
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the CERN Open Hardware License (CERN OHL-S) as it will be published
+## by the CERN, either version 2.0 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## CERN Open Hardware License for more details.
+##
+## You should have received a copy of the CERN Open Hardware License
+## along with this program. If not, see <http://ohwr.org/licenses/>.
+##
+##
+##
+
+
+# coding=utf8
+#-------------------------------------------------------------------------------
+#-- Title      : Translation Cache Tests
+#-- Project    : Spectre2Spice
+#-------------------------------------------------------------------------------
+#-- File       : test_translation_cache.py
+#-------------------------------------------------------------------------------
+#-- Description: Checks the hits, misses and invalidation of the translation
+#                cache
+#-------------------------------------------------------------------------------
+
+import re
+import shutil
+from conftest                         import default_args, example_path, expected_files, read_files
+from spectre2spice.netlist_manager    import netlist_manager
+from spectre2spice.translation_cache  import cache_salt
+
+
+# translates a copy of the example and its tables with the cache, returns [hits, misses,
+# console]
+def cached_run(tmp_path, capsys, **options):
+    args = default_args(str(tmp_path / 'ex1') + '/', 'my_top.scs', str(tmp_path / 'out') + '/')
+    args.update({'cache_path' : [str(tmp_path / 'cache') + '/'], 'silent' : None,
+                 'tech_path'  : [str(tmp_path / 'ex1' / 'tech_example') + '/']})
+    args.update(options)
+    netlist_manager(args)
+    console = capsys.readouterr().out
+    [hits, misses] = re.search('Cache: ([0-9]+) hits, ([0-9]+) misses', console).groups()
+    return [int(hits), int(misses), console]
+
+
+def copy_example(tmp_path):
+    shutil.copytree(example_path, str(tmp_path / 'ex1'))
+
+
+def test_hit_after_miss(tmp_path, capsys):
+    copy_example(tmp_path)
+    [hits, misses, first] = cached_run(tmp_path, capsys)
+    assert [hits, misses] == [0, 6]
+    assert read_files(str(tmp_path / 'out'), '.sp') == expected_files('ex1')
+
+    shutil.rmtree(str(tmp_path / 'out'))
+    [hits, misses, second] = cached_run(tmp_path, capsys)
+    assert [hits, misses] == [6, 0]
+    assert read_files(str(tmp_path / 'out'), '.sp') == expected_files('ex1')
+
+    # a cached file prints the same as a translated one
+    assert second.replace('6 hits, 0 misses', '0 hits, 6 misses') == first
+
+
+def test_changed_netlist_is_translated_again(tmp_path, capsys):
+    copy_example(tmp_path)
+    cached_run(tmp_path, capsys)
+
+    netlist = open(str(tmp_path / 'ex1' / 'math.scs'), 'a')
+    netlist.write('\nparameters added=1\n')
+    netlist.close()
+    [hits, misses, console] = cached_run(tmp_path, capsys)
+    assert [hits, misses] == [5, 1]
+    assert '.param added' in open(str(tmp_path / 'out' / 'math.sp')).read()
+
+
+def test_changed_table_invalidates(tmp_path, capsys):
+    copy_example(tmp_path)
+    cached_run(tmp_path, capsys)
+
+    table = open(str(tmp_path / 'ex1' / 'tech_example' / 'model_table.toml'), 'a')
+    table.write('\n')
+    table.close()
+    [hits, misses, console] = cached_run(tmp_path, capsys)
+    assert [hits, misses] == [0, 6]
+
+
+# the stored console output depends on --silent, with --debug the cache is not used
+def test_console_settings():
+    assert cache_salt('', -1) != cache_salt('', 999)
+
+
+def test_debug_skips_cache(tmp_path, capsys):
+    copy_example(tmp_path)
+    cached_run(tmp_path, capsys)
+    args = default_args(str(tmp_path / 'ex1') + '/', 'my_top.scs', str(tmp_path / 'out') + '/')
+    args.update({'cache_path' : [str(tmp_path / 'cache') + '/'], 'debug' : 1})
+    netlist_manager(args)
+    assert 'Cache:' not in capsys.readouterr().out
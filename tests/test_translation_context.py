@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+##
+## Copyright (c) 2019 Thomas Benz.
+##
+## This file is part of librecell-layout
+## (see https://codeberg.org/thommythomaso/spectre2spice/master/)
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the CERN Open Hardware License (CERN OHL-S) as it will be published
+## by the CERN, either version 2.0 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## CERN Open Hardware License for more details.
+##
+## You should have received a copy of the CERN Open Hardware License
+## along with this program. If not, see <http://ohwr.org/licenses/>.
+##
+##
+##
+
+
+
+# coding=utf8
+#-------------------------------------------------------------------------------
+#-- Title      : Translation Context Tests
+#-- Project    : Spectre2Spice
+#-------------------------------------------------------------------------------
+#-- File       : test_translation_context.py
+#-------------------------------------------------------------------------------
+#-- Description: Checks that translations in the same process do not see the
+#                settings of each other
+#-------------------------------------------------------------------------------
+
+import shutil
+import threading
+from conftest import tech_path
+from spectre2spice.text_translator     import translate_text
+from spectre2spice.translation_context import TranslationContext, current_context, default_context
+
+
+netlist_text = ''.join('R%d a b resistor r=%dk\n' % (index, index) for index in range(50))
+
+
+# a copy of the tables of the example, that translates the resistance to 'res'
+def renamed_tech(tmp_path):
+    renamed_path = str(tmp_path / 'tech_renamed') + '/'
+    shutil.copytree(tech_path, renamed_path)
+    table = open(renamed_path + 'component_table.toml', 'r')
+    text  = table.read().replace('["r",   "r"     ]', '["r",   "res"   ]', 1)
+    table.close()
+    table = open(renamed_path + 'component_table.toml', 'w')
+    table.write(text)
+    table.close()
+    return renamed_path
+
+
+# threads translating with different tables and thresholds get their own output
+def test_threads_isolated(tmp_path):
+    techs    = [tech_path, renamed_tech(tmp_path)]
+    expected = [translate_text(netlist_text, tech=tech, thr=-1) for tech in techs]
+    assert expected[0] != expected[1]
+    assert "res='1k'" in expected[1]
+
+    barrier = threading.Barrier(4)
+    results = {}
+    def run(index):
+        barrier.wait()
+        results[index] = [translate_text(netlist_text, tech=techs[index % 2], thr=index - 1)
+                          for repeat in range(5)]
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for index in range(4):
+        assert results[index] == [expected[index % 2]] * 5
+
+
+# a nested context is active in its block only, the outer one is restored afterwards
+def test_nested_activate():
+    outer = TranslationContext(thr=1)
+    inner = TranslationContext(thr=2)
+    assert current_context() is default_context
+    with outer.activate():
+        assert current_context() is outer
+        with inner.activate():
+            assert current_context() is inner
+        assert current_context() is outer
+    assert current_context() is default_context
+
+
+# the active context of a thread is not seen by another thread
+def test_context_per_thread():
+    seen = []
+    def run():
+        seen.append(current_context())
+
+    with TranslationContext().activate():
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join()
+    assert seen == [default_context]